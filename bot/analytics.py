@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta, timezone
+from customer_summary import PAID_STATUSES
+
+# Campo gravado pelo bot ao concluir o pedido: segundos entre a criação e a conclusão
+COMPLETION_FIELD = 'completionSeconds'
+
+# Maior período aceito pelo !relatorio, em dias
+MAX_REPORT_DAYS = 3660
+
+REPORT_USAGE = "Use: !relatorio [dias] ou !relatorio DD/MM/AAAA [DD/MM/AAAA]"
+
+def order_day(order):
+    """Dia (UTC) de criação do pedido, usado como bucket do rollup"""
+    created_at = order.get('createdAt')
+    return created_at.astimezone(timezone.utc).date() if created_at else None
+
+def order_categories(order):
+    """Categorias dos itens do pedido (cada pedido conta uma vez por categoria)"""
+    return tuple(sorted({item.get('category') or 'other' for item in order.get('items') or []}))
+
+def completion_seconds(order):
+    """Tempo até a conclusão: o campo gravado pelo bot ou, sem ele, updatedAt - createdAt"""
+    if order.get('status') != 'completed':
+        return None
+    value = order.get(COMPLETION_FIELD)
+    if isinstance(value, (int, float)):
+        return float(value)
+    created_at, updated_at = order.get('createdAt'), order.get('updatedAt')
+    if created_at and updated_at:
+        return (updated_at - created_at).total_seconds()
+    return None
+
+def _bump(counts, key, amount):
+    value = counts.get(key, 0) + amount
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+class DayRollup:
+    """Totais dos pedidos criados em um dia"""
+
+    def __init__(self):
+        self.orders = 0
+        self.statuses = {}  # Mapeia status -> pedidos
+        self.categories = {}  # Mapeia categoria -> pedidos
+        self.revenue = {}  # Mapeia moeda -> total dos pedidos pagos
+        self.paid_orders = {}  # Mapeia moeda -> pedidos pagos
+        self.completion_total = 0.0
+        self.completions = 0
+
+    def apply(self, contribution, sign):
+        status, categories, currency, total, completion = contribution
+        self.orders += sign
+        _bump(self.statuses, status, sign)
+        for category in categories:
+            _bump(self.categories, category, sign)
+        if status in PAID_STATUSES:
+            _bump(self.revenue, currency, sign * total)
+            _bump(self.paid_orders, currency, sign)
+        if completion is not None:
+            self.completion_total += sign * completion
+            self.completions += sign
+
+class SalesReport:
+    """Relatório de vendas de um período [start, end)
+
+    Args:
+        source: 'aggregation' (consultas de agregação do Firestore) ou 'rollup' (totais em memória)
+    """
+
+    def __init__(self, start, end, source, statuses=None, categories=None, revenue=None,
+                 paid_orders=None, avg_completion_seconds=None):
+        self.start = start
+        self.end = end
+        self.source = source
+        self.statuses = statuses or {}
+        self.categories = categories or {}
+        self.revenue = revenue or {}
+        self.paid_orders = paid_orders or {}
+        self.avg_completion_seconds = avg_completion_seconds
+
+    @property
+    def orders(self):
+        return sum(self.statuses.values())
+
+class SalesRollup:
+    """Totais diários de vendas, mantidos pelo listener do Firestore
+
+    Como os resumos por cliente, cada mudança desfaz a contribuição anterior
+    do pedido e aplica a nova no dia em que ele foi criado, então um relatório
+    soma alguns buckets diários em vez de percorrer os pedidos. Fornece as
+    contagens por categoria (que o Firestore não agrega, pois a categoria fica
+    dentro da lista de itens) e substitui as agregações do servidor quando elas
+    falham.
+    """
+
+    def __init__(self):
+        self._days = {}  # Mapeia date -> DayRollup
+        self._orders = {}  # Mapeia order_id -> (date, contribuição aplicada)
+        self._created_at = {}  # Mapeia order_id -> createdAt
+
+    def __len__(self):
+        return len(self._days)
+
+    def _remove_contribution(self, order_id):
+        applied = self._orders.pop(order_id, None)
+        self._created_at.pop(order_id, None)
+        if applied is None:
+            return
+        day, contribution = applied
+        bucket = self._days[day]
+        bucket.apply(contribution, -1)
+        if not bucket.orders:
+            del self._days[day]
+
+    def apply_change(self, change_type, order_id, order_data):
+        """Aplica uma mudança do listener do Firestore (ADDED, MODIFIED ou REMOVED)"""
+        self._remove_contribution(order_id)
+        if change_type == 'REMOVED' or not order_data:
+            return
+        day = order_day(order_data)
+        if day is None:
+            return
+
+        contribution = (
+            order_data.get('status'),
+            order_categories(order_data),
+            order_data.get('currency', 'BRL'),
+            order_data.get('total') or 0,
+            completion_seconds(order_data),
+        )
+        bucket = self._days.get(day)
+        if bucket is None:
+            bucket = self._days[day] = DayRollup()
+        bucket.apply(contribution, 1)
+        self._orders[order_id] = (day, contribution)
+        self._created_at[order_id] = order_data['createdAt']
+
+    def created_at(self, order_id):
+        return self._created_at.get(order_id)
+
+    def currencies(self):
+        """Moedas com pedidos registrados, para as consultas de receita por moeda"""
+        return sorted({currency for bucket in self._days.values() for currency in bucket.paid_orders})
+
+    def report(self, start, end):
+        """Relatório do período [start, end) somando os buckets diários"""
+        total = DayRollup()
+        for day, bucket in self._days.items():
+            if start.date() <= day < end.date():
+                for status, count in bucket.statuses.items():
+                    _bump(total.statuses, status, count)
+                for category, count in bucket.categories.items():
+                    _bump(total.categories, category, count)
+                for currency, revenue in bucket.revenue.items():
+                    _bump(total.revenue, currency, revenue)
+                for currency, count in bucket.paid_orders.items():
+                    _bump(total.paid_orders, currency, count)
+                total.completion_total += bucket.completion_total
+                total.completions += bucket.completions
+        return SalesReport(
+            start, end, 'rollup',
+            statuses=total.statuses,
+            categories=total.categories,
+            revenue=total.revenue,
+            paid_orders=total.paid_orders,
+            avg_completion_seconds=total.completion_total / total.completions if total.completions else None
+        )
+
+def parse_report_range(args, now=None):
+    """Período do relatório a partir dos argumentos do comando
+
+    Aceita nenhum argumento (últimos 30 dias), um número de dias ('7') ou
+    datas DD/MM/AAAA de início e, opcionalmente, de fim (inclusivo). O período
+    vai de 1 a MAX_REPORT_DAYS dias.
+
+    Returns:
+        Tupla (início, fim) em UTC, com o fim exclusivo
+
+    Raises:
+        ValueError: Se os argumentos não forem um número de dias ou datas válidas, ou o período estiver fora do limite
+    """
+    now = now or datetime.now(timezone.utc)
+    tomorrow = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1)
+    if not args:
+        return tomorrow - timedelta(days=30), tomorrow
+    if len(args) == 1 and args[0].lstrip('+-').isdigit():
+        days = int(args[0])
+        if not 1 <= days <= MAX_REPORT_DAYS:
+            raise ValueError(f"O período deve ter entre 1 e {MAX_REPORT_DAYS} dias. {REPORT_USAGE}")
+        return tomorrow - timedelta(days=days), tomorrow
+    if len(args) > 2:
+        raise ValueError(REPORT_USAGE)
+    try:
+        dates = [datetime.strptime(arg, '%d/%m/%Y').replace(tzinfo=timezone.utc) for arg in args]
+    except ValueError:
+        raise ValueError("Datas inválidas. Use o formato DD/MM/AAAA.") from None
+    start = dates[0]
+    try:
+        end = dates[1] + timedelta(days=1) if len(dates) > 1 else tomorrow
+    except OverflowError:
+        raise ValueError("Datas inválidas. Use o formato DD/MM/AAAA.") from None
+    if end <= start:
+        raise ValueError("A data final deve ser igual ou posterior à inicial.")
+    if (end - start).days > MAX_REPORT_DAYS:
+        raise ValueError(f"O período deve ter entre 1 e {MAX_REPORT_DAYS} dias. {REPORT_USAGE}")
+    return start, end
@@ -0,0 +1,190 @@
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Políticas de distribuição dos trabalhos; first_react mantém o botão de aceite no canal
+FIRST_REACT = 'first_react'
+LEAST_LOAD = 'least_load'
+WEIGHTED = 'weighted'
+POLICIES = (FIRST_REACT, LEAST_LOAD, WEIGHTED)
+
+def item_skills(item):
+    """Habilidades exigidas por um item: a categoria e, se houver, o job escolhido (minúsculos)"""
+    skills = set()
+    for key in ('category', 'selectedJob'):
+        value = item.get(key)
+        if value:
+            skills.add(str(value).strip().lower())
+    return skills
+
+class WorkerProfile:
+    """Funcionário que pode receber trabalhos automaticamente
+
+    Args:
+        user_id: ID do usuário no Discord
+        name: Nome exibido
+        skills: Categorias ou jobs que o funcionário atende (vazio atende qualquer item)
+        weight: Capacidade relativa usada pela política weighted (2 recebe o dobro de trabalhos)
+        max_open: Máximo de trabalhos em aberto ao mesmo tempo (None sem limite)
+        available: Se está recebendo trabalhos agora (alterado com !disponivel / !ausente)
+    """
+
+    def __init__(self, user_id, name=None, skills=(), weight=1.0, max_open=None, available=True):
+        if weight <= 0:
+            raise ValueError("O peso do funcionário deve ser positivo")
+        self.user_id = user_id
+        self.name = name or str(user_id)
+        self.skills = frozenset(str(skill).strip().lower() for skill in skills)
+        self.weight = weight
+        self.max_open = max_open
+        self.available = available
+
+    def __repr__(self):
+        return f"WorkerProfile({self.name!r})"
+
+    def can_do(self, item):
+        """Atende o item: sem habilidades cadastradas, ou com alguma exigida pelo item"""
+        return not self.skills or bool(self.skills & item_skills(item))
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(
+            int(entry['user_id']),
+            name=entry.get('name'),
+            skills=entry.get('skills', ()),
+            weight=float(entry.get('weight', 1.0)),
+            max_open=entry.get('max_open'),
+            available=entry.get('available', True)
+        )
+
+def load_workers(path):
+    """Lê a lista de funcionários (JSON) usada pela distribuição automática"""
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as workers_file:
+        entries = json.load(workers_file)
+    try:
+        return [WorkerProfile.from_dict(entry) for entry in entries]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Funcionário inválido em {path}: {e}") from None
+
+class AssignmentEngine:
+    """Distribui os trabalhos entre os funcionários pela carga de cada um
+
+    Mantém em memória os trabalhos em aberto de cada funcionário (alimentado
+    pelos canais de atendimento criados e pelas mudanças de status do
+    listener), então a escolha não consulta o Discord nem o Firestore.
+
+    Políticas:
+        first_react: desativado; o primeiro funcionário a clicar no botão leva o trabalho
+        least_load: o funcionário disponível com menos trabalhos em aberto
+        weighted: menor carga relativa ao peso (trabalhos em aberto / weight)
+
+    Empates vão para quem recebeu trabalho há mais tempo.
+    """
+
+    def __init__(self, policy=FIRST_REACT, workers=()):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de distribuição inválida: {policy} (use {', '.join(POLICIES)})")
+        self.policy = policy
+        self.workers = {worker.user_id: worker for worker in workers}
+        self._open_jobs = {}  # Mapeia user_id -> set de (order_id, item_index)
+        self._owners = {}  # Mapeia (order_id, item_index) -> user_id
+        self._sequence = itertools.count(1)
+        self._last_assigned = {}  # Mapeia user_id -> ordem da última atribuição
+
+    @property
+    def enabled(self):
+        return self.policy != FIRST_REACT and bool(self.workers)
+
+    def __len__(self):
+        return len(self._owners)
+
+    def load(self, user_id):
+        """Trabalhos em aberto do funcionário"""
+        return len(self._open_jobs.get(user_id, ()))
+
+    def loads(self):
+        """Carga de todos os funcionários cadastrados, por user_id"""
+        return {user_id: self.load(user_id) for user_id in self.workers}
+
+    def owner(self, order_id, item_index):
+        return self._owners.get((order_id, item_index))
+
+    def set_available(self, user_id, available):
+        """Marca o funcionário como disponível ou ausente; False se ele não estiver cadastrado"""
+        worker = self.workers.get(user_id)
+        if worker is None:
+            return False
+        worker.available = available
+        return True
+
+    def track(self, user_id, order_id, item_index):
+        """Registra um trabalho em aberto do funcionário (atribuído, aceito ou assumido pelo admin)"""
+        job = (order_id, item_index)
+        previous = self._owners.get(job)
+        if previous is not None and previous != user_id:
+            self._open_jobs[previous].discard(job)
+        self._owners[job] = user_id
+        self._open_jobs.setdefault(user_id, set()).add(job)
+        self._last_assigned[user_id] = next(self._sequence)
+
+    def release(self, order_id, item_index=None):
+        """Encerra os trabalhos do pedido (ou só do item); retorna quantos estavam em aberto"""
+        if item_index is None:
+            jobs = [job for job in self._owners if job[0] == order_id]
+        else:
+            jobs = [(order_id, item_index)]
+        released = 0
+        for job in jobs:
+            user_id = self._owners.pop(job, None)
+            if user_id is None:
+                continue
+            self._open_jobs[user_id].discard(job)
+            released += 1
+        return released
+
+    def candidates(self, item, exclude=()):
+        """Funcionários disponíveis, com a habilidade do item e abaixo do limite de trabalhos"""
+        return [
+            worker for worker in self.workers.values()
+            if worker.available and worker.user_id not in exclude and worker.can_do(item)
+            and (worker.max_open is None or self.load(worker.user_id) < worker.max_open)
+        ]
+
+    def _score(self, worker):
+        load = self.load(worker.user_id)
+        if self.policy == WEIGHTED:
+            load /= worker.weight
+        return load, self._last_assigned.get(worker.user_id, 0)
+
+    def choose(self, item, exclude=()):
+        """Funcionário que deve receber o item, ou None (sem política ou sem candidatos)"""
+        if not self.enabled:
+            return None
+        candidates = self.candidates(item, exclude)
+        if not candidates:
+            return None
+        return min(candidates, key=self._score)
+
+    def snapshot(self):
+        """Estado salvo no desligamento: trabalhos em aberto e disponibilidade (lista de mapas: o Firestore não aceita listas aninhadas)"""
+        return {
+            'open_jobs': [
+                {'user_id': user_id, 'order_id': order_id, 'item_index': item_index}
+                for (order_id, item_index), user_id in self._owners.items()
+            ],
+            'unavailable': [user_id for user_id, worker in self.workers.items() if not worker.available],
+        }
+
+    def restore(self, state):
+        """Retoma o estado salvo por snapshot()"""
+        if not state:
+            return 0
+        for job in state.get('open_jobs') or []:
+            self.track(job['user_id'], job['order_id'], job.get('item_index'))
+        for user_id in state.get('unavailable') or []:
+            self.set_available(user_id, False)
+        return len(self._owners)
@@ -0,0 +1,259 @@
+"""Benchmark de ponta a ponta do fluxo de pedidos usando fakes em memória
+
+Empurra N pedidos sintéticos pelo caminho completo do bot: listener do
+Firestore -> handle_new_order -> aprovação -> confirmação e verificação do
+pagamento -> envio aos funcionários e aceite -> conclusão. Roda offline, sem
+credenciais do Discord ou do Firebase.
+
+Uso (a partir da pasta bot/):
+    python -m benchmarks.bench_order_flow --orders 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.fakes import FakeBot, FakeDiscordAPI, FakeFirestoreClient, choose, click, install_fake_firestore
+
+GUILD_ID = 1000
+ADMIN_ROLE_ID = 1001
+ADMIN_CHANNEL_ID = 1002
+WORKERS_CHANNEL_ID = 1003
+
+STAGES = ('notify', 'approve', 'payment_claim', 'payment_verify', 'assignment', 'completion', 'total')
+
+def percentile(values, pct):
+    """Percentil pelo método nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+def synthetic_order(index, customer):
+    """Pedido sintético com um item, no formato gravado pelo site"""
+    categories = ('leveling', 'gil', 'other')
+    category = categories[index % len(categories)]
+    item = {'name': f'Serviço {index}', 'category': category, 'quantity': 1, 'price': 49.9}
+    if category == 'leveling':
+        item.update({'selectedJob': 'Paladin', 'startLevel': 1, 'endLevel': 90})
+    elif category == 'gil':
+        item['gilAmount'] = 10
+    return {
+        'discordUsername': customer.name,
+        'userEmail': f'{customer.name}@example.com',
+        'items': [item],
+        'total': 49.9,
+        'currency': 'BRL' if index % 2 else 'USD',
+        'payment': {'method': 'pix'},
+        'status': 'pending',
+        'createdAt': datetime.now(timezone.utc),
+        'updatedAt': datetime.now(timezone.utc),
+    }
+
+class BenchmarkEnvironment:
+    """Bot configurado com Firestore e Discord falsos"""
+
+    def __init__(self, firestore_latency=0.0, discord_latency=0.0, customers=100, admin_digest=None):
+        self.firestore = FakeFirestoreClient(latency=firestore_latency)
+        install_fake_firestore(self.firestore)
+
+        import discord_bot
+        import tenants
+        self.discord_bot = discord_bot
+
+        self.api = FakeDiscordAPI(latency=discord_latency)
+        self.bot = FakeBot(self.api, GUILD_ID, ADMIN_ROLE_ID)
+        self.admin_channel = self.bot.add_channel('pedidos', ADMIN_CHANNEL_ID)
+        self.workers_channel = self.bot.add_channel('funcionarios', WORKERS_CHANNEL_ID)
+        self.admin = self.bot.add_user('admin', admin=True)
+        self.worker = self.bot.add_user('funcionario')
+        self.customers = [self.bot.add_user(f'cliente{i}') for i in range(customers)]
+
+        # Uma loja com os IDs falsos; sem orçamento de envios para medir apenas o bot
+        self.tenant = tenants.Tenant('bench', GUILD_ID, ADMIN_ROLE_ID, ADMIN_CHANNEL_ID, WORKERS_CHANNEL_ID, sends_per_second=0)
+        tenants.configure([self.tenant])
+
+        # O bot lê o cliente do Discord da variável do módulo
+        discord_bot.bot = self.bot
+        discord_bot.ARCHIVE_DELAY_SECONDS = 0
+        discord_bot.order_watermark = datetime.now(timezone.utc) - timedelta(seconds=1)
+        # Novos pedidos no resumo (janela em segundos) em vez de uma mensagem por pedido
+        self.admin_digest = admin_digest
+        if admin_digest:
+            discord_bot.ADMIN_DIGEST_MODE = 'on'
+            discord_bot.admin_digest_posts.delay = admin_digest
+
+        self.orders = self.firestore.collection('orders')
+        self.listener = None
+
+    def start_listener(self):
+        self.listener = self.discord_bot.setup_order_listener(
+            self.discord_bot.handle_new_order,
+            asyncio.get_running_loop(),
+            on_change=self.discord_bot.apply_order_change
+        )
+
+    def stop_listener(self):
+        if self.listener:
+            self.listener.unsubscribe()
+
+async def run_order(env, index):
+    """Leva um pedido do site até a conclusão e retorna a latência de cada etapa"""
+    customer = env.customers[index % len(env.customers)]
+    guild = env.bot.guild
+    timings = {}
+
+    def has_button(custom_id):
+        return lambda message: custom_id in message.custom_ids()
+
+    def in_digest(message):
+        item = message.find_item('digest:approve')
+        return item is not None and any(option.value == order_id for option in item.item.options)
+
+    started_at = stage_at = time.perf_counter()
+
+    def lap(stage):
+        nonlocal stage_at
+        now = time.perf_counter()
+        timings[stage] = now - stage_at
+        stage_at = now
+
+    # O site grava o pedido; o listener dispara handle_new_order
+    reference = env.orders.document()
+    order_id = reference.id
+    await asyncio.to_thread(reference.set, synthetic_order(index, customer))
+    if env.admin_digest:
+        admin_message = await env.admin_channel.wait_for_message(in_digest)
+        lap('notify')
+        await choose(env.api, env.admin, admin_message, 'digest:approve', [order_id], guild)
+    else:
+        admin_message = await env.admin_channel.wait_for_message(has_button(f'order:approve:{order_id}'))
+        lap('notify')
+        await click(env.api, env.admin, admin_message, f'order:approve:{order_id}', guild)
+    payment_message = await customer.wait_for_message(has_button(f'order:paid:{order_id}'))
+    lap('approve')
+
+    await click(env.api, customer, payment_message, f'order:paid:{order_id}')
+    verification_message = await env.admin_channel.wait_for_message(has_button(f'order:verify:{order_id}'))
+    lap('payment_claim')
+
+    await click(env.api, env.admin, verification_message, f'order:verify:{order_id}', guild)
+    decision_message = await env.admin_channel.wait_for_message(has_button(f'order:to_workers:{order_id}:0'))
+    lap('payment_verify')
+
+    await click(env.api, env.admin, decision_message, f'order:to_workers:{order_id}:0', guild)
+    work_message = await env.workers_channel.wait_for_message(has_button(f'order:claim:{order_id}:0'))
+    await click(env.api, env.worker, work_message, f'order:claim:{order_id}:0', guild)
+    work_channel = env.bot.get_channel(env.discord_bot.work_threads[order_id])
+    actions_message = await work_channel.wait_for_message(has_button(f'order:done:{order_id}:0'))
+    lap('assignment')
+
+    await click(env.api, customer, actions_message, f'order:done:{order_id}:0', guild)
+    await click(env.api, env.worker, actions_message, f'order:done:{order_id}:0', guild)
+    lap('completion')
+
+    timings['total'] = time.perf_counter() - started_at
+    if env.orders._docs[order_id].get('status') != 'completed':
+        raise RuntimeError(f"Pedido {order_id} terminou com status {env.orders._docs[order_id].get('status')}")
+    return timings
+
+async def run_benchmark(orders=100, concurrency=10, firestore_latency=0.0, discord_latency=0.0,
+                        customers=100, trace_memory=False, record_path=None, admin_digest=None):
+    """Executa o benchmark e retorna um dicionário com os resultados"""
+    env = BenchmarkEnvironment(firestore_latency, discord_latency, customers, admin_digest)
+    if record_path:
+        import trace_recorder
+        trace_recorder.start_recording(record_path, [ADMIN_ROLE_ID])
+    env.start_listener()
+
+    if trace_memory:
+        tracemalloc.start()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def bounded(index):
+        async with semaphore:
+            results.append(await run_order(env, index))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(bounded(index) for index in range(orders)))
+    elapsed = time.perf_counter() - started_at
+
+    peak_traced = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    env.stop_listener()
+    if record_path:
+        trace_recorder.stop_recording()
+
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+    return {
+        'orders': orders,
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'orders_per_second': orders / elapsed if elapsed else 0.0,
+        'stages': {
+            stage: {
+                'p50_ms': percentile([r[stage] for r in results], 50) * 1000,
+                'p99_ms': percentile([r[stage] for r in results], 99) * 1000,
+            }
+            for stage in STAGES
+        },
+        'discord_api_calls': env.api.total_calls,
+        'discord_api_calls_per_order': env.api.total_calls / orders if orders else 0.0,
+        'firestore_calls': env.firestore.calls,
+        'peak_rss_bytes': peak_rss,
+        'peak_traced_bytes': peak_traced,
+    }
+
+def print_report(result):
+    print(f"Pedidos: {result['orders']} (concorrência {result['concurrency']})")
+    print(f"Tempo total: {result['elapsed_s']:.2f}s - {result['orders_per_second']:.1f} pedidos/s")
+    print(f"{'Etapa':<16}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for stage, values in result['stages'].items():
+        print(f"{stage:<16}{values['p50_ms']:>12.1f}{values['p99_ms']:>12.1f}")
+    print(f"Chamadas à API do Discord: {result['discord_api_calls']} ({result['discord_api_calls_per_order']:.1f} por pedido)")
+    print(f"Chamadas ao Firestore: {result['firestore_calls']}")
+    print(f"Pico de memória (RSS): {result['peak_rss_bytes'] / 2**20:.1f} MiB")
+    if result['peak_traced_bytes'] is not None:
+        print(f"Pico de memória alocada (tracemalloc): {result['peak_traced_bytes'] / 2**20:.1f} MiB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100, help="número de pedidos sintéticos")
+    parser.add_argument('--concurrency', type=int, default=10, help="pedidos em andamento ao mesmo tempo")
+    parser.add_argument('--customers', type=int, default=100, help="clientes distintos no servidor falso")
+    parser.add_argument('--firestore-latency', type=float, default=0.0, help="latência simulada por chamada ao Firestore (ms)")
+    parser.add_argument('--discord-latency', type=float, default=0.0, help="latência simulada por chamada ao Discord (ms)")
+    parser.add_argument('--tracemalloc', action='store_true', help="mede o pico de memória alocada (mais lento)")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava os resultados em JSON")
+    parser.add_argument('--record', metavar='ARQUIVO', help="grava o tráfego gerado em um trace (ver replay_trace)")
+    parser.add_argument('--admin-digest', type=float, metavar='SEGUNDOS', help="anuncia os pedidos em resumos com essa janela")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_benchmark(
+        orders=args.orders,
+        concurrency=args.concurrency,
+        firestore_latency=args.firestore_latency / 1000,
+        discord_latency=args.discord_latency / 1000,
+        customers=args.customers,
+        trace_memory=args.tracemalloc,
+        record_path=args.record,
+        admin_digest=args.admin_digest,
+    ))
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark das chamadas ao Firestore dos pedidos com e sem processos de partição
+
+Executa leituras e gravações de status (get_order / update_order_status) em
+pedidos sintéticos, com latência simulada no Firestore falso, primeiro no
+processo do bot e depois divididas por hash do pedido entre N processos.
+Mede a vazão, a latência das chamadas e o atraso do event loop do
+coordenador (que precisa continuar livre para o gateway e os cliques).
+
+Uso (a partir da pasta bot/):
+    python -m benchmarks.bench_partitions --calls 2000 --processes 1 2 4 --firestore-latency 0.01
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.bench_order_flow import percentile
+from benchmarks.fakes import FakeFirestoreClient, install_fake_firestore
+
+def _install_firestore(latency, orders):
+    """Firestore falso com os pedidos sintéticos (no coordenador e em cada processo de partição)"""
+    client = FakeFirestoreClient(latency=latency)
+    collection = client.collection('orders')
+    for index in range(orders):
+        collection._write(f"order{index:016d}", {'status': 'pending'}, simulate_latency=False)
+    install_fake_firestore(client)
+
+async def _measure_loop_lag(stop, interval=0.01):
+    """Maior atraso do event loop do coordenador enquanto as chamadas rodam"""
+    worst = 0.0
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started_at - interval)
+    return worst
+
+async def run_calls(calls, concurrency, orders):
+    import firebase_service
+    import partitions
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call(index):
+        order_id = f"order{index % orders:016d}"
+        async with semaphore:
+            started_at = time.perf_counter()
+            if index % 2:
+                await firebase_service.update_order_status(order_id, 'processing')
+            else:
+                await firebase_service.get_order(order_id)
+            latencies.append(time.perf_counter() - started_at)
+
+    # Aguarda todos os processos terminarem de iniciar antes de medir
+    pool = partitions.get_pool()
+    if pool is not None:
+        await asyncio.gather(*(pool.call(None, time.sleep, 0) for _ in range(pool.count)))
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(call(index) for index in range(calls)))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    return {
+        'elapsed_s': elapsed,
+        'calls_per_s': calls / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_loop_lag_ms': await lag_task * 1000,
+    }
+
+def run_benchmark(calls=2000, processes=(0, 2, 4), concurrency=64, firestore_latency=0.01, orders=1000):
+    import partitions
+    import tenants
+    tenants.configure([tenants.Tenant('bench', 1, 2, 3, 4, sends_per_second=0)])
+    _install_firestore(firestore_latency, orders)
+
+    results = {}
+    for count in processes:
+        partitions.start_pool(count, initializer=_install_firestore, initargs=(firestore_latency, orders))
+        try:
+            results[count] = asyncio.run(run_calls(calls, concurrency, orders))
+        finally:
+            partitions.stop_pool()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000, help="número de chamadas ao Firestore")
+    parser.add_argument('--processes', type=int, nargs='+', default=[0, 2, 4], help="processos de partição (0 = no processo do bot)")
+    parser.add_argument('--concurrency', type=int, default=64, help="chamadas simultâneas")
+    parser.add_argument('--firestore-latency', type=float, default=0.01, help="latência simulada de cada chamada (s)")
+    parser.add_argument('--orders', type=int, default=1000, help="pedidos distintos")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    processes = sorted(set(args.processes))
+    results = run_benchmark(args.calls, processes, args.concurrency, args.firestore_latency, args.orders)
+
+    print(f"Chamadas: {args.calls} (concorrência {args.concurrency}, latência {args.firestore_latency * 1000:.0f}ms)")
+    print(f"{'Processos':<12}{'chamadas/s':>12}{'p50 (ms)':>10}{'p99 (ms)':>10}{'atraso máx. do loop (ms)':>26}")
+    for count, result in results.items():
+        label = str(count) if count else 'no bot'
+        print(
+            f"{label:<12}{result['calls_per_s']:>12.0f}{result['p50_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{result['max_loop_lag_ms']:>26.1f}"
+        )
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({str(count): result for count, result in results.items()}, output, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark do tempo de inicialização do bot, sem credenciais
+
+Mede, em processos novos, o tempo de importação do discord_bot e o tempo até o
+bot ficar pronto (on_ready concluído e snapshot inicial do listener aplicado
+ao índice), usando os fakes em memória no lugar do Firestore e do Discord.
+
+Uso (a partir da pasta bot/):
+    python -m benchmarks.bench_startup --runs 5 --orders 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Variáveis removidas do ambiente dos processos medidos, para provar que não são necessárias
+CREDENTIAL_VARIABLES = ('GOOGLE_APPLICATION_CREDENTIALS', 'DISCORD_BOT_TOKEN')
+
+async def _wait_until(predicate, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Tempo esgotado aguardando o bot ficar pronto")
+        await asyncio.sleep(0.001)
+
+def measure_child(orders):
+    """Executado no processo medido: importa o bot e dispara o on_ready"""
+    started_at = time.perf_counter()
+    import discord_bot
+    import_seconds = time.perf_counter() - started_at
+    firestore_imported = 'google.cloud.firestore' in sys.modules
+
+    from benchmarks.bench_order_flow import BenchmarkEnvironment
+    env = BenchmarkEnvironment()
+    # Pedidos já existentes chegam como ADDED no primeiro snapshot do listener
+    created_at = datetime.now(timezone.utc) - timedelta(days=1)
+    for index in range(orders):
+        env.orders._write(f"order{index:016d}", {'status': 'completed', 'createdAt': created_at}, simulate_latency=False)
+
+    async def ready():
+        ready_started_at = time.perf_counter()
+        await discord_bot.on_ready()
+        await _wait_until(lambda: len(env.tenant.order_index) >= orders)
+        ready_seconds = time.perf_counter() - ready_started_at
+        discord_bot.supervisor.stop_all()
+        return ready_seconds
+
+    ready_seconds = asyncio.run(ready())
+    return {
+        'import_s': import_seconds,
+        'ready_s': ready_seconds,
+        'firestore_imported': firestore_imported,
+    }
+
+def run_child(orders):
+    env = {key: value for key, value in os.environ.items() if key not in CREDENTIAL_VARIABLES}
+    env['LOG_LEVEL'] = 'WARNING'
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_startup', '--child', '--orders', str(orders)],
+        capture_output=True, text=True, env=env, check=True
+    )
+    process_seconds = time.perf_counter() - started_at
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_s'] = process_seconds
+    return result
+
+def import_profile(top_n=10):
+    """Importações diretas do discord_bot com maior tempo acumulado (python -X importtime)"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import discord_bot'],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Cada nível de profundidade adiciona dois espaços antes do nome
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        if depth == 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top_n]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="número de processos medidos")
+    parser.add_argument('--orders', type=int, default=500, help="pedidos existentes no primeiro snapshot")
+    parser.add_argument('--importtime', action='store_true', help="mostra os módulos mais lentos de importar")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava os resultados em JSON")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_child(args.orders)))
+        return
+
+    runs = [run_child(args.orders) for _ in range(args.runs)]
+    result = {
+        'runs': args.runs,
+        'orders': args.orders,
+        'firestore_imported_at_startup': any(run['firestore_imported'] for run in runs),
+    }
+    for key in ('import_s', 'ready_s', 'process_s'):
+        values = [run[key] for run in runs]
+        result[key] = {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+
+    print(f"Execuções: {args.runs} (snapshot inicial com {args.orders} pedidos)")
+    print(f"{'Etapa':<28}{'mediana (ms)':>14}{'mín (ms)':>12}{'máx (ms)':>12}")
+    labels = {'import_s': 'import discord_bot', 'ready_s': 'on_ready até snapshot', 'process_s': 'processo completo'}
+    for key, label in labels.items():
+        values = result[key]
+        print(f"{label:<28}{values['median'] * 1000:>14.1f}{values['min'] * 1000:>12.1f}{values['max'] * 1000:>12.1f}")
+    print(f"google.cloud.firestore importado na inicialização: {'sim' if result['firestore_imported_at_startup'] else 'não'}")
+
+    if args.importtime:
+        print("\nMódulos mais lentos de importar (acumulado):")
+        for cumulative, name in import_profile():
+            print(f"{cumulative / 1000:>10.1f}ms  {name}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+
+if __name__ == '__main__':
+    main()
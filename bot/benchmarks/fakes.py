@@ -0,0 +1,653 @@
+"""Fakes em memória do Firestore e do Discord usados pelos benchmarks
+
+Cobrem apenas a superfície usada por firebase_service.py e discord_bot.py,
+para que o fluxo completo de um pedido rode offline, sem credenciais.
+"""
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# IDs sequenciais para mensagens, canais e usuários falsos
+_ids = itertools.count(10_000)
+
+def next_id():
+    return next(_ids)
+
+# ---------------------------------------------------------------------------
+# Firestore
+# ---------------------------------------------------------------------------
+
+class FakeDocumentSnapshot:
+    def __init__(self, doc_id, data, reference=None):
+        self.id = doc_id
+        self._data = dict(data) if data is not None else None
+        self.exists = data is not None
+        self.reference = reference
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+class FakeDocumentReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        self._collection._client._simulate_latency()
+        return self._collection._snapshot(self.id)
+
+    def set(self, data):
+        self._collection._write(self.id, dict(data), replace=True)
+
+    def update(self, fields):
+        if self.id not in self._collection._docs:
+            raise KeyError(f"Documento {self.id} não existe")
+        self._collection._write(self.id, fields)
+
+    def delete(self):
+        self._collection._delete(self.id)
+
+class FakeQuery:
+    _OPERATORS = {
+        '==': lambda a, b: a == b,
+        '!=': lambda a, b: a != b,
+        '<': lambda a, b: a is not None and a < b,
+        '<=': lambda a, b: a is not None and a <= b,
+        '>': lambda a, b: a is not None and a > b,
+        '>=': lambda a, b: a is not None and a >= b,
+        'in': lambda a, b: a in b,
+        'not-in': lambda a, b: a not in b,
+    }
+
+    def __init__(self, collection, filters=(), order=None, limit=None, start_after=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._order = order
+        self._limit = limit
+        self._start_after = start_after
+
+    def where(self, field, op, value):
+        return FakeQuery(self._collection, self._filters + ((field, op, value),), self._order, self._limit, self._start_after)
+
+    def order_by(self, field, direction=None):
+        return FakeQuery(self._collection, self._filters, (field, direction), self._limit, self._start_after)
+
+    def limit(self, count):
+        return FakeQuery(self._collection, self._filters, self._order, count, self._start_after)
+
+    def start_after(self, snapshot):
+        return FakeQuery(self._collection, self._filters, self._order, self._limit, snapshot)
+
+    def stream(self):
+        self._collection._client._simulate_latency()
+        # Filtra e ordena os dados brutos; os snapshots (cópias) só são criados para o resultado
+        docs = [
+            (doc_id, data) for doc_id, data in list(self._collection._docs.items())
+            if all(self._OPERATORS[op](data.get(field), value) for field, op, value in self._filters)
+        ]
+        if self._order:
+            field, direction = self._order
+            # Como no Firestore, documentos sem o campo ordenado ficam de fora
+            docs = [(doc_id, data) for doc_id, data in docs if field in data]
+            docs.sort(key=lambda doc: (doc[1][field], doc[0]), reverse=direction == 'DESCENDING')
+            if self._start_after is not None:
+                cursor = (self._start_after.get(field), self._start_after.id)
+                reverse = direction == 'DESCENDING'
+                docs = [doc for doc in docs if ((doc[1][field], doc[0]) < cursor if reverse else (doc[1][field], doc[0]) > cursor)]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        return iter([self._collection._snapshot(doc_id) for doc_id, _ in docs])
+
+    def get(self):
+        return list(self.stream())
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self).count(alias=alias)
+
+class FakeAggregationQuery:
+    """Consulta de agregação (count/sum/avg) calculada sobre os documentos da consulta"""
+
+    def __init__(self, query):
+        self._query = query
+        self._aggregations = []
+
+    def _add(self, kind, field, alias):
+        self._aggregations.append((kind, field, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def count(self, alias=None):
+        return self._add('count', None, alias)
+
+    def sum(self, field, alias=None):
+        return self._add('sum', field, alias)
+
+    def avg(self, field, alias=None):
+        return self._add('avg', field, alias)
+
+    def get(self):
+        docs = list(self._query.stream())
+        results = []
+        for kind, field, alias in self._aggregations:
+            values = [doc.get(field) for doc in docs] if field else []
+            numbers = [value for value in values if isinstance(value, (int, float))]
+            if kind == 'count':
+                value = len(docs)
+            elif kind == 'sum':
+                value = sum(numbers)
+            else:
+                value = sum(numbers) / len(numbers) if numbers else None
+            results.append(SimpleNamespace(alias=alias, value=value))
+        return [results]
+
+class FakeWatch:
+    """Listener que entrega os snapshots em ordem a partir de uma thread própria, como o SDK real"""
+
+    def __init__(self, collection, callback):
+        self._collection = collection
+        self._callback = callback
+        self._queue = queue.SimpleQueue()
+        self.is_active = True
+        self._thread = threading.Thread(target=self._run, name='fake-firestore-watch', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            changes = self._queue.get()
+            if changes is None:
+                return
+            self._callback(None, changes, datetime.now(timezone.utc))
+
+    def push(self, changes):
+        if self.is_active and changes:
+            self._queue.put(changes)
+
+    def unsubscribe(self):
+        self.is_active = False
+        self._collection._watches.discard(self)
+        self._queue.put(None)
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client, name):
+        super().__init__(self)
+        self._client = client
+        self.name = name
+        self._docs = {}
+        self._watches = set()
+        self._lock = threading.Lock()
+
+    def document(self, doc_id=None):
+        return FakeDocumentReference(self, doc_id or f"doc{next_id():016d}")
+
+    def add(self, data, doc_id=None):
+        ref = self.document(doc_id)
+        ref.set(data)
+        return ref
+
+    def on_snapshot(self, callback):
+        watch = FakeWatch(self, callback)
+        self._watches.add(watch)
+        # Assim como o Firestore, o primeiro snapshot traz todos os documentos como ADDED
+        watch.push([self._change('ADDED', doc_id) for doc_id in list(self._docs)])
+        return watch
+
+    def _snapshot(self, doc_id):
+        return FakeDocumentSnapshot(doc_id, self._docs.get(doc_id), FakeDocumentReference(self, doc_id))
+
+    def _change(self, change_type, doc_id):
+        document = FakeDocumentSnapshot(doc_id, self._docs.get(doc_id), FakeDocumentReference(self, doc_id))
+        return SimpleNamespace(type=SimpleNamespace(name=change_type), document=document)
+
+    def _write(self, doc_id, fields, replace=False, simulate_latency=True):
+        if simulate_latency:
+            self._client._simulate_latency()
+        with self._lock:
+            existed = doc_id in self._docs
+            if replace or not existed:
+                self._docs[doc_id] = dict(fields)
+            else:
+                self._docs[doc_id].update(fields)
+        change = self._change('MODIFIED' if existed else 'ADDED', doc_id)
+        for watch in list(self._watches):
+            watch.push([change])
+
+    def _delete(self, doc_id, simulate_latency=True):
+        if simulate_latency:
+            self._client._simulate_latency()
+        with self._lock:
+            if doc_id not in self._docs:
+                return
+            change = self._change('REMOVED', doc_id)
+            del self._docs[doc_id]
+        for watch in list(self._watches):
+            watch.push([change])
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._operations = []
+
+    def update(self, reference, fields):
+        self._operations.append((reference, fields))
+
+    def set(self, reference, data):
+        self._operations.append((reference, None, data))
+
+    def commit(self):
+        if len(self._operations) > 500:
+            raise ValueError("Um WriteBatch aceita no máximo 500 operações")
+        self._client._simulate_latency()
+        # O lote é gravado em uma única chamada
+        for operation in self._operations:
+            if len(operation) == 2:
+                reference, fields = operation
+                reference._collection._write(reference.id, fields, simulate_latency=False)
+            else:
+                reference, _, data = operation
+                reference._collection._write(reference.id, data, replace=True, simulate_latency=False)
+        self._client.batch_commits += 1
+
+class FakeFirestoreClient:
+    """Substituto de google.cloud.firestore.Client com latência opcional por chamada"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.batch_commits = 0
+        self._collections = {}
+
+    def _simulate_latency(self):
+        self.calls += 1
+        if self.latency:
+            # Bloqueante, como as chamadas síncronas do SDK real
+            time.sleep(self.latency)
+
+    def collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, references):
+        self._simulate_latency()
+        for reference in references:
+            yield reference._collection._snapshot(reference.id)
+
+def install_fake_firestore(client):
+    """Faz o firebase_service usar o cliente falso em vez do Firestore real"""
+    import firebase_service
+    firebase_service.set_client(client)
+    return firebase_service
+
+# ---------------------------------------------------------------------------
+# Discord
+# ---------------------------------------------------------------------------
+
+class FakeDiscordAPI:
+    """Contabiliza as chamadas à API e simula a latência de rede"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {}
+        self._buttons = {}  # custom_id -> mensagem mais recente com o botão
+        self._button_waiters = {}  # custom_id -> futures aguardando o botão
+
+    async def call(self, route):
+        self.calls[route] = self.calls.get(route, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _register_buttons(self, message):
+        for custom_id in message.custom_ids():
+            if not custom_id:
+                continue
+            self._buttons[custom_id] = message
+            for future in self._button_waiters.pop(custom_id, []):
+                if not future.done():
+                    future.set_result(message)
+
+    async def wait_for_button(self, custom_id, timeout=30):
+        """Aguarda até que alguma mensagem (canal ou DM) tenha o botão custom_id"""
+        message = self._buttons.get(custom_id)
+        if message is not None:
+            return message
+        future = asyncio.get_running_loop().create_future()
+        self._button_waiters.setdefault(custom_id, []).append(future)
+        return await asyncio.wait_for(future, timeout)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+class FakeRole:
+    def __init__(self, role_id, name='role'):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+class FakeMessage:
+    def __init__(self, api, channel, content=None, embeds=None, view=None, author=None):
+        self._api = api
+        self.id = next_id()
+        self.channel = channel
+        self.content = content
+        self.embeds = list(embeds or [])
+        self.view = view
+        self.author = author
+        self.created_at = datetime.now(timezone.utc)
+        self.deleted = False
+
+    async def edit(self, content=None, embed=None, embeds=None, view=Ellipsis):
+        await self._api.call('message.edit')
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        if embeds is not None:
+            self.embeds = list(embeds)
+        if view is not Ellipsis:
+            self.view = view
+            self._api._register_buttons(self)
+        return self
+
+    async def reply(self, content=None, embed=None, **kwargs):
+        return await self.channel.send(content=content, embed=embed, **kwargs)
+
+    async def delete(self):
+        await self._api.call('message.delete')
+        self.deleted = True
+        if self in self.channel.messages:
+            self.channel.messages.remove(self)
+
+    async def pin(self):
+        await self._api.call('message.pin')
+
+    @property
+    def components(self):
+        """Componentes como o Discord os devolve (usado por View.from_message)"""
+        from discord.components import ActionRow
+        if not self.view:
+            return []
+        return [ActionRow(row) for row in self.view.to_components()]
+
+    def custom_ids(self):
+        if not self.view:
+            return []
+        return [getattr(item, 'custom_id', None) for item in self.view.children]
+
+    def find_item(self, custom_id):
+        for item in (self.view.children if self.view else []):
+            if getattr(item, 'custom_id', None) == custom_id:
+                return item
+        return None
+
+class _Messageable:
+    """Destino de mensagens (canal ou DM) que guarda o histórico e avisa quem espera"""
+
+    def _init_messageable(self, api):
+        self._api = api
+        self.messages = []
+        self._waiters = []
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self._api.call('channel.send')
+        message = FakeMessage(self._api, self, content, [embed] if embed else embeds, view)
+        self.messages.append(message)
+        self._api._register_buttons(message)
+        for waiter in list(self._waiters):
+            predicate, future = waiter
+            if not future.done() and predicate(message):
+                future.set_result(message)
+                self._waiters.remove(waiter)
+        return message
+
+    async def wait_for_message(self, predicate, timeout=30):
+        """Aguarda (ou encontra no histórico) uma mensagem que satisfaça o predicado"""
+        for message in self.messages:
+            if predicate(message):
+                return message
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((predicate, future))
+        return await asyncio.wait_for(future, timeout)
+
+    def history(self, limit=100):
+        messages = list(reversed(self.messages))[:limit]
+
+        async def iterator():
+            for message in messages:
+                yield message
+        return iterator()
+
+class FakeUser(_Messageable):
+    def __init__(self, api, name, user_id=None, roles=(), bot=False):
+        self._init_messageable(api)
+        self.id = user_id or next_id()
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{self.id}>"
+        self.roles = list(roles)
+        self.bot = bot
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+
+class FakeCategory:
+    def __init__(self, name):
+        self.id = next_id()
+        self.name = name
+
+class FakeTextChannel(_Messageable):
+    def __init__(self, api, name, guild=None, category=None, overwrites=None, channel_id=None):
+        self._init_messageable(api)
+        self.id = channel_id or next_id()
+        self.name = name
+        self.guild = guild
+        self.category = category
+        self.overwrites = dict(overwrites or {})
+        self.mention = f"<#{self.id}>"
+
+    @property
+    def members(self):
+        return [target for target in self.overwrites if isinstance(target, FakeUser)]
+
+    async def edit(self, category=None, **kwargs):
+        await self._api.call('channel.edit')
+        if category is not None:
+            self.category = category
+
+    async def set_permissions(self, target, **permissions):
+        await self._api.call('channel.set_permissions')
+
+    async def fetch_message(self, message_id):
+        await self._api.call('channel.fetch_message')
+        for message in self.messages:
+            if message.id == message_id:
+                return message
+        raise LookupError(message_id)
+
+    async def webhooks(self):
+        return []
+
+class FakeGuild:
+    def __init__(self, bot, guild_id, admin_role):
+        self._bot = bot
+        self.id = guild_id
+        self.members = []
+        self.roles = [admin_role]
+        self.categories = []
+        self.default_role = FakeRole(guild_id, '@everyone')
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    def get_member(self, user_id):
+        return next((member for member in self.members if member.id == user_id), None)
+
+    async def create_category(self, name):
+        await self._bot.api.call('guild.create_category')
+        category = FakeCategory(name)
+        self.categories.append(category)
+        return category
+
+    async def create_text_channel(self, name, category=None, overwrites=None):
+        await self._bot.api.call('guild.create_text_channel')
+        channel = FakeTextChannel(self._bot.api, name, self, category, overwrites)
+        self._bot.channels[channel.id] = channel
+        return channel
+
+class FakeCommandTree:
+    """Árvore de comandos de barra; apenas contabiliza as sincronizações"""
+
+    def __init__(self, api):
+        self._api = api
+        self.syncs = 0
+
+    def copy_global_to(self, guild):
+        pass
+
+    async def sync(self, guild=None):
+        await self._api.call('tree.sync')
+        self.syncs += 1
+        return []
+
+class FakeBot:
+    """Substituto do commands.Bot com um servidor, canais e usuários em memória"""
+
+    def __init__(self, api, guild_id, admin_role_id):
+        self.api = api
+        self.user = FakeUser(api, 'ffxiv-bot', bot=True)
+        self.admin_role = FakeRole(admin_role_id, 'Admin')
+        self.guild = FakeGuild(self, guild_id, self.admin_role)
+        self.channels = {}
+        self.users = []
+        self.latency = 0.05
+        self.tree = FakeCommandTree(api)
+        self._closed = False
+
+    @property
+    def guilds(self):
+        return [self.guild]
+
+    def is_ready(self):
+        return not self._closed
+
+    def is_closed(self):
+        return self._closed
+
+    async def close(self):
+        self._closed = True
+
+    def add_channel(self, name, channel_id):
+        channel = FakeTextChannel(self.api, name, self.guild, channel_id=channel_id)
+        self.channels[channel_id] = channel
+        return channel
+
+    def add_user(self, name, admin=False):
+        user = FakeUser(self.api, name, roles=[self.admin_role] if admin else [])
+        self.users.append(user)
+        self.guild.members.append(user)
+        return user
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == self.guild.id else None
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id):
+        return next((user for user in self.users if user.id == user_id), None)
+
+    async def fetch_user(self, user_id):
+        await self.api.call('user.fetch')
+        user = self.get_user(user_id)
+        if user is None:
+            import discord
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown User')
+        return user
+
+class _FakeInteractionResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, route):
+        if self._done:
+            raise RuntimeError("Interação já respondida")
+        self._done = True
+        await self._interaction._api.call(route)
+
+    async def edit_message(self, content=None, embed=None, embeds=None, view=Ellipsis):
+        await self._respond('interaction.edit_message')
+        message = self._interaction.message
+        if content is not None:
+            message.content = content
+        if embed is not None:
+            message.embeds = [embed]
+        if embeds is not None:
+            message.embeds = list(embeds)
+        if view is not Ellipsis:
+            message.view = view
+            self._interaction._api._register_buttons(message)
+
+    async def send_message(self, content=None, embed=None, ephemeral=False, **kwargs):
+        await self._respond('interaction.send_message')
+        self._interaction.replies.append(content)
+
+    async def defer(self, ephemeral=False, thinking=False):
+        await self._respond('interaction.defer')
+
+class _FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, embed=None, ephemeral=False, **kwargs):
+        await self._interaction._api.call('interaction.followup')
+        self._interaction.replies.append(content)
+
+class FakeInteraction:
+    """Clique em um botão de uma mensagem"""
+
+    def __init__(self, api, user, message, guild=None):
+        self._api = api
+        self.user = user
+        self.message = message
+        self.channel = message.channel
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.created_at = datetime.now(timezone.utc)
+        self.response = _FakeInteractionResponse(self)
+        self.followup = _FakeFollowup(self)
+        self.replies = []
+
+async def click(api, user, message, custom_id, guild=None):
+    """Simula o clique de `user` no botão `custom_id` da mensagem"""
+    item = message.find_item(custom_id)
+    if item is None:
+        raise LookupError(f"Botão {custom_id} não encontrado na mensagem {message.id}")
+    interaction = FakeInteraction(api, user, message, guild)
+    await item.callback(interaction)
+    return interaction
+
+async def choose(api, user, message, custom_id, values, guild=None):
+    """Simula a escolha de `values` por `user` no menu `custom_id` da mensagem"""
+    item = message.find_item(custom_id)
+    if item is None:
+        raise LookupError(f"Menu {custom_id} não encontrado na mensagem {message.id}")
+    interaction = FakeInteraction(api, user, message, guild)
+    item.item._values = list(values)
+    await item.callback(interaction)
+    return interaction
@@ -0,0 +1,219 @@
+"""Reproduz um trace gravado pelo trace_recorder contra os fakes em memória
+
+Os pedidos do trace são gravados no Firestore falso e os cliques são repetidos
+nos mesmos botões, respeitando os intervalos originais (divididos por --speed).
+Assim os picos reais (ex.: Black Friday, pedidos com muitos itens) podem ser
+usados para detectar regressões de desempenho.
+
+Uso (a partir da pasta bot/):
+    python -m benchmarks.replay_trace pedidos.trace.gz --speed 10
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_order_flow import BenchmarkEnvironment, percentile
+from benchmarks.fakes import FakeUser, click
+from trace_recorder import read_trace
+
+# Tempo máximo de espera pelo botão de um clique gravado
+BUTTON_TIMEOUT_SECONDS = 30
+
+class TraceReplayer:
+    """Aplica os eventos do trace ao ambiente falso e mede a resposta do bot
+
+    Mudanças gravadas pelo próprio bot (origin 'bot') não são aplicadas, pois o
+    bot as repete ao processar os cliques reproduzidos; o mesmo vale para
+    mudanças cujos campos já estão no documento. As demais (ex.: alterações
+    feitas pelo site) são aplicadas.
+    """
+
+    def __init__(self, env, speed=1.0):
+        self.env = env
+        self.speed = speed
+        self.users = {}
+        self.order_tasks = {}  # Último clique agendado de cada pedido (cliques do mesmo pedido são sequenciais)
+        self.notify_latencies = []
+        self.click_latencies = {}
+        self.button_lag = []
+        self.missing_buttons = 0
+        self.applied_changes = 0
+        self.skipped_changes = 0
+        self._pending = []
+
+    def user_for(self, name, admin=False):
+        user = self.users.get(name)
+        if user is None:
+            user = self.users[name] = self.env.bot.add_user(name, admin=admin)
+        elif admin and self.env.bot.admin_role not in user.roles:
+            user.roles.append(self.env.bot.admin_role)
+        return user
+
+    def order_fields(self, data):
+        fields = dict(data)
+        offset = fields.pop('createdAt', None)
+        now = datetime.now(timezone.utc)
+        # Pedidos antigos (anteriores à gravação) continuam antigos e são ignorados pelo bot
+        if offset is not None and offset < 0:
+            fields['createdAt'] = self.started_wall + timedelta(seconds=offset)
+        else:
+            fields['createdAt'] = now
+        fields['updatedAt'] = now
+        return fields
+
+    async def apply_change(self, event):
+        order_id = event['order_id']
+        data = event.get('data') or {}
+        orders = self.env.orders
+
+        if event['type'] == 'REMOVED':
+            await asyncio.to_thread(orders._delete, order_id)
+            self.applied_changes += 1
+            return
+
+        if data.get('discordUsername'):
+            self.user_for(data['discordUsername'])
+
+        if event.get('origin') == 'bot':
+            self.skipped_changes += 1
+            return
+
+        current = orders._docs.get(order_id)
+        if current is None:
+            fields = self.order_fields(data)
+            started_at = time.perf_counter()
+            await asyncio.to_thread(orders._write, order_id, fields, True)
+            self.applied_changes += 1
+            if fields['createdAt'] >= self.started_wall:
+                self._pending.append(asyncio.create_task(self.measure_notify(order_id, started_at)))
+            return
+
+        changed = {key: value for key, value in data.items() if key != 'createdAt' and current.get(key) != value}
+        if not changed:
+            self.skipped_changes += 1
+            return
+        changed['updatedAt'] = datetime.now(timezone.utc)
+        await asyncio.to_thread(orders._write, order_id, changed)
+        self.applied_changes += 1
+
+    async def measure_notify(self, order_id, started_at):
+        try:
+            await self.env.api.wait_for_button(f"order:approve:{order_id}", BUTTON_TIMEOUT_SECONDS)
+            self.notify_latencies.append(time.perf_counter() - started_at)
+        except asyncio.TimeoutError:
+            pass
+
+    async def replay_click(self, event, scheduled_at, previous):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        custom_id = f"order:{event['action']}:{event['order_id']}"
+        if event.get('item_index') is not None:
+            custom_id += f":{event['item_index']}"
+        try:
+            message = await self.env.api.wait_for_button(custom_id, BUTTON_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.missing_buttons += 1
+            return
+        # Atraso do bot em relação ao tráfego original: o botão ainda não existia quando o clique aconteceu
+        self.button_lag.append(max(0.0, time.perf_counter() - scheduled_at))
+
+        user = self.user_for(event['user'], admin=event.get('admin', False))
+        guild = None if isinstance(message.channel, FakeUser) else self.env.bot.guild
+        started_at = time.perf_counter()
+        try:
+            await click(self.env.api, user, message, custom_id, guild)
+        except LookupError:
+            # O botão foi removido antes do clique (ex.: outro admin já respondeu)
+            self.missing_buttons += 1
+            return
+        self.click_latencies.setdefault(event['action'], []).append(time.perf_counter() - started_at)
+
+    async def run(self, events):
+        self.started_wall = datetime.now(timezone.utc)
+        self.env.discord_bot.order_watermark = self.started_wall
+        self.env.start_listener()
+
+        started_at = time.perf_counter()
+        for event in events:
+            if self.speed:
+                delay = started_at + event['t'] / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            scheduled_at = time.perf_counter()
+
+            if event['kind'] == 'change':
+                await self.apply_change(event)
+            elif event['kind'] == 'interaction':
+                order_id = event['order_id']
+                task = asyncio.create_task(self.replay_click(event, scheduled_at, self.order_tasks.get(order_id)))
+                self.order_tasks[order_id] = task
+                self._pending.append(task)
+
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        elapsed = time.perf_counter() - started_at
+        self.env.stop_listener()
+        return elapsed
+
+async def run_replay(path, speed=1.0, firestore_latency=0.0, discord_latency=0.0):
+    """Reproduz o trace e retorna um dicionário com os resultados"""
+    events = sorted(read_trace(path), key=lambda event: event['t'])
+    env = BenchmarkEnvironment(firestore_latency, discord_latency, customers=0)
+    replayer = TraceReplayer(env, speed)
+    elapsed = await replayer.run(events)
+
+    def summary(values):
+        return {'count': len(values), 'p50_ms': percentile(values, 50) * 1000, 'p99_ms': percentile(values, 99) * 1000}
+
+    return {
+        'events': len(events),
+        'trace_duration_s': events[-1]['t'] if events else 0.0,
+        'replay_duration_s': elapsed,
+        'speed': speed,
+        'changes_applied': replayer.applied_changes,
+        'changes_skipped': replayer.skipped_changes,
+        'missing_buttons': replayer.missing_buttons,
+        'notify': summary(replayer.notify_latencies),
+        'button_lag': summary(replayer.button_lag),
+        'clicks': {action: summary(values) for action, values in sorted(replayer.click_latencies.items())},
+        'discord_api_calls': env.api.total_calls,
+        'firestore_calls': env.firestore.calls,
+    }
+
+def print_report(result):
+    print(f"Eventos: {result['events']} - trace de {result['trace_duration_s']:.1f}s reproduzido em "
+          f"{result['replay_duration_s']:.1f}s (velocidade {result['speed'] or 'máxima'})")
+    print(f"Mudanças aplicadas: {result['changes_applied']} (ignoradas, geradas pelo bot: {result['changes_skipped']})")
+    print(f"Cliques sem botão disponível: {result['missing_buttons']}")
+    print(f"{'Etapa':<20}{'n':>6}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    rows = [('notify', result['notify']), ('button_lag', result['button_lag'])]
+    rows += [(f"click:{action}", values) for action, values in result['clicks'].items()]
+    for name, values in rows:
+        print(f"{name:<20}{values['count']:>6}{values['p50_ms']:>12.1f}{values['p99_ms']:>12.1f}")
+    print(f"Chamadas à API do Discord: {result['discord_api_calls']}")
+    print(f"Chamadas ao Firestore: {result['firestore_calls']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('trace', help="arquivo gravado com TRACE_RECORD_PATH ou bench_order_flow --record")
+    parser.add_argument('--speed', type=float, default=1.0, help="fator de aceleração (0 = o mais rápido possível)")
+    parser.add_argument('--firestore-latency', type=float, default=0.0, help="latência simulada por chamada ao Firestore (ms)")
+    parser.add_argument('--discord-latency', type=float, default=0.0, help="latência simulada por chamada ao Discord (ms)")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_replay(
+        args.trace,
+        speed=args.speed,
+        firestore_latency=args.firestore_latency / 1000,
+        discord_latency=args.discord_latency / 1000,
+    ))
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=2)
+
+if __name__ == '__main__':
+    main()
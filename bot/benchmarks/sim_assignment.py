@@ -0,0 +1,188 @@
+"""Simulação offline da distribuição de trabalhos: primeiro aceite contra distribuição por carga
+
+Gera trabalhos sintéticos (chegadas de Poisson, categorias e durações
+aleatórias) para uma equipe com turnos, habilidades e velocidades diferentes
+e mede a espera de cada trabalho na fila (da postagem até o funcionário
+começar). No primeiro aceite (first_react), cada funcionário em turno clica
+depois de um tempo de reação próprio e só aceita enquanto tiver menos
+trabalhos que o seu limite; quem reage rápido acumula trabalho. Nas políticas
+least_load e weighted, o AssignmentEngine do bot escolhe o funcionário na
+chegada; sem candidato, o trabalho volta para o primeiro aceite, como no bot.
+
+Uso (a partir da pasta bot/):
+    python -m benchmarks.sim_assignment --hours 168 --jobs-per-hour 2 --seed 1
+"""
+import argparse
+import heapq
+import json
+import random
+
+from assignment import FIRST_REACT, LEAST_LOAD, WEIGHTED, AssignmentEngine, WorkerProfile
+from benchmarks.bench_order_flow import percentile
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+CATEGORIES = ('leveling', 'gil', 'other')
+
+class SimWorker:
+    """Funcionário simulado: turno diário, tempo de reação ao botão, velocidade e habilidades"""
+
+    def __init__(self, user_id, name, shift_start, shift_hours, reaction_mean, hoard_limit, speed=1.0, skills=()):
+        self.user_id = user_id
+        self.name = name
+        self.shift_start = shift_start * HOUR
+        self.shift_length = shift_hours * HOUR
+        self.reaction_mean = reaction_mean
+        self.hoard_limit = hoard_limit
+        self.speed = speed
+        self.skills = frozenset(skills)
+
+    def on_shift(self, at):
+        return (at - self.shift_start) % DAY < self.shift_length
+
+    def next_on_shift(self, at):
+        """Primeiro instante a partir de `at` em que o funcionário está em turno"""
+        if self.on_shift(at):
+            return at
+        return at + (self.shift_start - at) % DAY
+
+    def can_do(self, category):
+        return not self.skills or category in self.skills
+
+def default_team():
+    """Equipe de exemplo: dois funcionários que reagem rápido e acumulam, os demais mais lentos para clicar
+
+    Os turnos deixam as madrugadas (3h às 7h) sem ninguém olhando o canal.
+    """
+    return [
+        SimWorker(1, 'rapido1', 7, 9, reaction_mean=30, hoard_limit=6, speed=1.0),
+        SimWorker(2, 'rapido2', 14, 9, reaction_mean=45, hoard_limit=6, speed=0.8),
+        SimWorker(3, 'manha', 7, 8, reaction_mean=15 * 60, hoard_limit=2, speed=1.5),
+        SimWorker(4, 'tarde', 12, 8, reaction_mean=20 * 60, hoard_limit=2, speed=1.2, skills=('leveling', 'other')),
+        SimWorker(5, 'noite', 18, 9, reaction_mean=10 * 60, hoard_limit=2, speed=1.0),
+        SimWorker(6, 'gil', 9, 12, reaction_mean=25 * 60, hoard_limit=2, speed=2.0, skills=('gil',)),
+    ]
+
+def generate_jobs(hours, jobs_per_hour, service_minutes, seed):
+    """Trabalhos sintéticos: (chegada, categoria, duração base em segundos)"""
+    rng = random.Random(seed)
+    jobs, at = [], 0.0
+    while True:
+        at += rng.expovariate(jobs_per_hour / HOUR)
+        if at >= hours * HOUR:
+            return jobs
+        jobs.append((at, rng.choice(CATEGORIES), rng.expovariate(1 / (service_minutes * 60))))
+
+class Simulation:
+    """Estado da equipe durante uma simulação: fila de cada funcionário e trabalhos em aberto"""
+
+    def __init__(self, team, policy, seed):
+        self.team = {worker.user_id: worker for worker in team}
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.free_at = {worker.user_id: 0.0 for worker in team}
+        self.finish_times = {worker.user_id: [] for worker in team}  # Fim dos trabalhos de cada funcionário
+        self.engine = AssignmentEngine(policy, [
+            WorkerProfile(worker.user_id, worker.name, worker.skills, weight=worker.speed) for worker in team
+        ])
+        self._finishing = []  # Heap de (fim, job_id) para liberar a carga no engine
+        self.fallbacks = 0
+
+    def _willing_at(self, worker, at):
+        """Quando o funcionário aceitaria mais um trabalho (abaixo do seu limite de acúmulo)"""
+        pending = sorted(finish for finish in self.finish_times[worker.user_id] if finish > at)
+        if len(pending) < worker.hoard_limit:
+            return at
+        return pending[len(pending) - worker.hoard_limit]
+
+    def first_react(self, category, at):
+        """Primeiro funcionário a clicar no botão: turno, limite de acúmulo e tempo de reação"""
+        reactions = []
+        for worker in self.team.values():
+            if not worker.can_do(category):
+                continue
+            watching_at = worker.next_on_shift(self._willing_at(worker, at))
+            reactions.append((watching_at + self.rng.expovariate(1 / worker.reaction_mean), worker.user_id))
+        return min(reactions)
+
+    def assign(self, job_id, category, at):
+        """Funcionário e instante em que o trabalho foi aceito ou atribuído"""
+        if self.policy == FIRST_REACT:
+            return self.first_react(category, at)
+
+        while self._finishing and self._finishing[0][0] <= at:
+            _, finished_job = heapq.heappop(self._finishing)
+            self.engine.release(finished_job)
+        for worker in self.team.values():
+            self.engine.set_available(worker.user_id, worker.on_shift(at))
+        profile = self.engine.choose({'category': category})
+        if profile is None:
+            self.fallbacks += 1
+            return self.first_react(category, at)
+        return at, profile.user_id
+
+    def run(self, jobs):
+        waits, per_worker = [], {user_id: 0 for user_id in self.team}
+        for job_id, (arrival, category, base_duration) in enumerate(jobs):
+            job_key = f"job{job_id}"
+            assigned_at, user_id = self.assign(job_key, category, arrival)
+            worker = self.team[user_id]
+            started_at = worker.next_on_shift(max(assigned_at, self.free_at[user_id]))
+            finished_at = started_at + base_duration / worker.speed
+            self.free_at[user_id] = finished_at
+            self.finish_times[user_id].append(finished_at)
+            self.engine.track(user_id, job_key, 0)
+            heapq.heappush(self._finishing, (finished_at, job_key))
+            waits.append(started_at - arrival)
+            per_worker[user_id] += 1
+        return waits, per_worker
+
+def simulate(policy, jobs, team, seed):
+    simulation = Simulation(team, policy, seed)
+    waits, per_worker = simulation.run(jobs)
+    minutes = [wait / 60 for wait in waits]
+    return {
+        'jobs': len(jobs),
+        'mean_wait_min': sum(minutes) / len(minutes) if minutes else 0.0,
+        'p50_wait_min': percentile(minutes, 50),
+        'p90_wait_min': percentile(minutes, 90),
+        'p99_wait_min': percentile(minutes, 99),
+        'fallback_jobs': simulation.fallbacks,
+        'jobs_per_worker': {simulation.team[user_id].name: count for user_id, count in per_worker.items()},
+    }
+
+def run_simulation(hours=168, jobs_per_hour=2, service_minutes=60, seed=1, policies=(FIRST_REACT, LEAST_LOAD, WEIGHTED)):
+    jobs = generate_jobs(hours, jobs_per_hour, service_minutes, seed)
+    return {policy: simulate(policy, jobs, default_team(), seed) for policy in policies}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=168, help="duração simulada (horas)")
+    parser.add_argument('--jobs-per-hour', type=float, default=2, help="trabalhos enviados aos funcionários por hora")
+    parser.add_argument('--service-minutes', type=float, default=60, help="duração média de um trabalho (minutos)")
+    parser.add_argument('--seed', type=int, default=1, help="semente dos números aleatórios")
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    results = run_simulation(args.hours, args.jobs_per_hour, args.service_minutes, args.seed)
+
+    print(f"Trabalhos: {next(iter(results.values()))['jobs']} em {args.hours:.0f}h ({args.jobs_per_hour}/h, {args.service_minutes:.0f} min em média)")
+    print(f"{'Política':<14}{'média (min)':>12}{'p50 (min)':>11}{'p90 (min)':>11}{'p99 (min)':>11}{'sem candidato':>15}")
+    for policy, result in results.items():
+        print(
+            f"{policy:<14}{result['mean_wait_min']:>12.1f}{result['p50_wait_min']:>11.1f}"
+            f"{result['p90_wait_min']:>11.1f}{result['p99_wait_min']:>11.1f}{result['fallback_jobs']:>15}"
+        )
+    print()
+    names = list(next(iter(results.values()))['jobs_per_worker'])
+    print(f"{'Trabalhos por funcionário':<26}" + "".join(f"{name:>10}" for name in names))
+    for policy, result in results.items():
+        print(f"{policy:<26}" + "".join(f"{result['jobs_per_worker'][name]:>10}" for name in names))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == '__main__':
+    main()
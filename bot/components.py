@@ -0,0 +1,216 @@
+from datetime import datetime, timezone
+import discord
+from metrics import INTERACTION_LATENCY, INTERACTIONS
+from structured_logging import bind_order
+from trace_recorder import record_interaction
+from lifecycle import order_tasks
+from tenants import tenant_for_order_id, tenant_for_guild, bind_tenant, current_tenant
+
+# Ações disponíveis nos botões: action -> (label, estilo, emoji)
+ORDER_ACTIONS = {
+    # Aprovação inicial do pedido (canal de administração)
+    'approve': ("Aprovar Pedido", discord.ButtonStyle.success, "✅"),
+    'reject': ("Rejeitar Pedido", discord.ButtonStyle.danger, "❌"),
+    # Confirmação de pagamento pelo cliente (DM)
+    'paid': ("Confirmar Pagamento", discord.ButtonStyle.success, "✅"),
+    'cancel': ("Solicitar Cancelamento", discord.ButtonStyle.danger, "❌"),
+    # Verificação do pagamento pelos administradores
+    'verify': ("Pagamento Recebido", discord.ButtonStyle.success, "✅"),
+    'deny': ("Pagamento Não Recebido", discord.ButtonStyle.danger, "❌"),
+    # Decisão do admin sobre cada item
+    'to_workers': ("Enviar para os funcionários", discord.ButtonStyle.primary, "👥"),
+    'self_assign': ("Realizar o serviço", discord.ButtonStyle.secondary, "👨‍💼"),
+    # Trabalho disponível no canal dos funcionários
+    'claim': ("Aceitar Trabalho", discord.ButtonStyle.success, "✅"),
+    # Conclusão ou cancelamento no canal privado do pedido
+    'done': ("Concluir Atendimento", discord.ButtonStyle.success, "✅"),
+    'abort': ("Cancelar Atendimento", discord.ButtonStyle.danger, "❌"),
+}
+
+# Handlers registrados pelo bot: action -> corrotina(interaction, action, order_id, item_index)
+_handlers = {}
+
+def register_handler(handler, *actions):
+    """Registra a corrotina que trata os cliques das ações informadas"""
+    for action in actions:
+        if action not in ORDER_ACTIONS:
+            raise ValueError(f"Ação desconhecida: {action}")
+        _handlers[action] = handler
+
+# Busca da loja de um pedido fora dos índices em memória: corrotina(order_id) -> loja ou None
+_tenant_resolver = None
+
+def register_tenant_resolver(resolver):
+    """Registra a corrotina que procura a loja de um pedido que ainda não está nos índices"""
+    global _tenant_resolver
+    _tenant_resolver = resolver
+
+def order_custom_id(action, order_id, item_index=None):
+    """Monta o custom_id de um botão: order:<ação>:<id do pedido>[:<índice do item>]"""
+    custom_id = f"order:{action}:{order_id}"
+    if item_index is not None:
+        custom_id += f":{item_index}"
+    return custom_id
+
+class OrderButton(discord.ui.DynamicItem[discord.ui.Button], template=r'order:(?P<action>[a-z_]+):(?P<order_id>[A-Za-z0-9_-]+)(?::(?P<item_index>\d+))?'):
+    """Botão persistente cujo custom_id carrega a ação e o pedido
+
+    Como todo o contexto está no custom_id, o clique é roteado mesmo após
+    reinícios do bot, sem depender de caches em memória.
+    """
+
+    def __init__(self, action, order_id, item_index=None, label=None, row=None):
+        default_label, style, emoji = ORDER_ACTIONS[action]
+        super().__init__(
+            discord.ui.Button(
+                label=label or default_label,
+                style=style,
+                emoji=emoji,
+                custom_id=order_custom_id(action, order_id, item_index),
+                row=row
+            )
+        )
+        self.action = action
+        self.order_id = order_id
+        self.item_index = item_index
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        if match['action'] not in ORDER_ACTIONS:
+            raise ValueError(f"Ação desconhecida: {match['action']}")
+        item_index = int(match['item_index']) if match['item_index'] is not None else None
+        return cls(match['action'], match['order_id'], item_index)
+
+    async def callback(self, interaction):
+        # Os logs emitidos durante a ação carregam o trace id do pedido
+        bind_order(self.order_id)
+        if not order_tasks.accepting:
+            # Desligando: o clique não é processado para não ficar pela metade
+            await interaction.response.send_message("🔄 O bot está reiniciando. Tente novamente em alguns segundos.", ephemeral=True)
+            return
+        # Loja do pedido (os botões das DMs não têm servidor); senão, a do servidor do clique
+        tenant = tenant_for_order_id(self.order_id) or tenant_for_guild(interaction.guild_id) or current_tenant(default=None)
+        if tenant is None and _tenant_resolver is not None:
+            # Várias lojas e pedido ainda fora dos índices (ex.: DM logo após o início): procura no Firestore
+            tenant = await _tenant_resolver(self.order_id)
+        if tenant is None:
+            await interaction.response.send_message("❌ Pedido não encontrado.", ephemeral=True)
+            return
+        bind_tenant(tenant)
+        order_tasks.track()
+        record_interaction(interaction, self.action, self.order_id, self.item_index)
+        handler = _handlers.get(self.action)
+        if handler is None:
+            INTERACTIONS.inc(action=self.action, result='unhandled')
+            await interaction.response.send_message("❌ Esta ação não está disponível no momento.", ephemeral=True)
+            return
+        try:
+            await handler(interaction, self.action, self.order_id, self.item_index)
+            INTERACTIONS.inc(action=self.action, result='ok')
+        except Exception:
+            INTERACTIONS.inc(action=self.action, result='error')
+            raise
+        finally:
+            # Latência do clique (criação da interação no Discord) até o fim da ação
+            elapsed = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+            INTERACTION_LATENCY.observe(max(elapsed, 0.0), action=self.action)
+
+# Handler da paginação do quadro de trabalhos: corrotina(interaction, page)
+_board_page_handler = None
+
+def register_board_page_handler(handler):
+    """Registra a corrotina que troca a página do quadro de trabalhos"""
+    global _board_page_handler
+    _board_page_handler = handler
+
+class BoardPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r'board:(?P<direction>prev|next):(?P<page>\d+)'):
+    """Botão de página do quadro de trabalhos; o custom_id carrega a página de destino"""
+
+    def __init__(self, direction, page, disabled=False, row=None):
+        super().__init__(
+            discord.ui.Button(
+                label="Anterior" if direction == 'prev' else "Próxima",
+                style=discord.ButtonStyle.secondary,
+                emoji="◀️" if direction == 'prev' else "▶️",
+                custom_id=f"board:{direction}:{page}",
+                disabled=disabled,
+                row=row
+            )
+        )
+        self.direction = direction
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['direction'], int(match['page']))
+
+    async def callback(self, interaction):
+        tenant = tenant_for_guild(interaction.guild_id) or current_tenant(default=None)
+        if tenant is None or _board_page_handler is None:
+            await interaction.response.send_message("❌ Esta ação não está disponível no momento.", ephemeral=True)
+            return
+        bind_tenant(tenant)
+        order_tasks.track()
+        await _board_page_handler(interaction, self.page)
+
+# Handler dos menus do resumo de novos pedidos: corrotina(interaction, action, order_ids)
+_digest_handler = None
+
+def register_digest_handler(handler):
+    """Registra a corrotina que aprova ou rejeita os pedidos escolhidos no resumo"""
+    global _digest_handler
+    _digest_handler = handler
+
+class DigestSelect(discord.ui.DynamicItem[discord.ui.Select], template=r'digest:(?P<action>approve|reject)'):
+    """Menu persistente do resumo de novos pedidos; cada opção carrega o ID de um pedido
+
+    Os pedidos ficam nas próprias opções da mensagem, então o menu continua
+    funcionando após reinícios do bot.
+    """
+
+    def __init__(self, action, options):
+        label, _, emoji = ORDER_ACTIONS[action]
+        super().__init__(
+            discord.ui.Select(
+                custom_id=f"digest:{action}",
+                placeholder=f"{emoji} {label}...",
+                min_values=1,
+                max_values=len(options),
+                options=options
+            )
+        )
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['action'], item.options)
+
+    async def callback(self, interaction):
+        if not order_tasks.accepting:
+            await interaction.response.send_message("🔄 O bot está reiniciando. Tente novamente em alguns segundos.", ephemeral=True)
+            return
+        tenant = tenant_for_guild(interaction.guild_id) or current_tenant(default=None)
+        if tenant is None or _digest_handler is None:
+            await interaction.response.send_message("❌ Esta ação não está disponível no momento.", ephemeral=True)
+            return
+        bind_tenant(tenant)
+        order_tasks.track()
+        order_ids = list(self.item.values)
+        for order_id in order_ids:
+            record_interaction(interaction, self.action, order_id, None)
+        try:
+            await _digest_handler(interaction, self.action, order_ids)
+            INTERACTIONS.inc(action=f"digest_{self.action}", result='ok')
+        except Exception:
+            INTERACTIONS.inc(action=f"digest_{self.action}", result='error')
+            raise
+        finally:
+            elapsed = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+            INTERACTION_LATENCY.observe(max(elapsed, 0.0), action=f"digest_{self.action}")
+
+def order_view(order_id, *actions, item_index=None):
+    """Cria uma View persistente com um botão para cada ação informada"""
+    view = discord.ui.View(timeout=None)
+    for action in actions:
+        view.add_item(OrderButton(action, order_id, item_index))
+    return view
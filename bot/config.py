@@ -1,15 +1,104 @@
 import os
-from dotenv import load_dotenv
 
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
+# Configurações carregadas; preenchido no primeiro acesso (ex.: config.DISCORD_GUILD_ID)
+_settings = None
 
-# Configurações do Discord
-DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-DISCORD_GUILD_ID = int(os.getenv('DISCORD_GUILD_ID', 0))
-DISCORD_ADMIN_ROLE_ID = int(os.getenv('DISCORD_ADMIN_ROLE_ID', 0))
-DISCORD_ADMIN_CHANNEL_ID = int(os.getenv('DISCORD_ADMIN_CHANNEL_ID', 0))  # ID do canal de pedidos
+def _int_env(name, default=0):
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"A variável {name} deve ser um número inteiro (valor atual: {value!r})") from None
 
-# Configurações do Firebase
-FIREBASE_CREDENTIALS_PATH = 'firebase-credentials.json'
-GOOGLE_APPLICATION_CREDENTIALS = os.path.abspath(FIREBASE_CREDENTIALS_PATH) 
\ No newline at end of file
+def _choice_env(name, choices, default):
+    value = (os.getenv(name) or '').strip().lower()
+    if not value:
+        return default
+    if value not in choices:
+        raise ValueError(f"A variável {name} deve ser uma das opções {', '.join(choices)} (valor atual: {value!r})")
+    return value
+
+def load_config(env_file=None, **overrides):
+    """Lê as configurações das variáveis de ambiente e do arquivo .env
+
+    É chamada automaticamente no primeiro acesso a uma configuração, então
+    importar este módulo não lê arquivos nem converte valores. Chamar de novo
+    recarrega as configurações.
+
+    Args:
+        env_file: Caminho do arquivo .env (padrão: procura a partir da pasta atual)
+        **overrides: Valores que substituem os lidos do ambiente (ex.: em benchmarks)
+
+    Returns:
+        Dicionário com as configurações
+
+    Raises:
+        ValueError: Se uma variável numérica ou de opções tiver valor inválido
+    """
+    global _settings
+    from dotenv import load_dotenv
+    load_dotenv(env_file)
+
+    settings = {
+        # Configurações do Discord
+        'DISCORD_BOT_TOKEN': os.getenv('DISCORD_BOT_TOKEN'),
+        'DISCORD_GUILD_ID': _int_env('DISCORD_GUILD_ID'),
+        'DISCORD_ADMIN_ROLE_ID': _int_env('DISCORD_ADMIN_ROLE_ID'),
+        'DISCORD_ADMIN_CHANNEL_ID': _int_env('DISCORD_ADMIN_CHANNEL_ID'),  # ID do canal de pedidos
+        'DISCORD_WORKERS_CHANNEL_ID': _int_env('DISCORD_WORKERS_CHANNEL_ID'),  # ID do canal dos funcionários
+
+        # Várias lojas no mesmo processo: arquivo JSON com a lista de lojas (substitui os IDs acima)
+        'TENANTS_FILE': os.getenv('TENANTS_FILE', ''),
+        'TENANT_SENDS_PER_SECOND': _int_env('TENANT_SENDS_PER_SECOND', 5),  # 0 desativa o limite por loja
+
+        # Distribuição automática dos trabalhos: first_react (botão de aceite), least_load ou weighted
+        'ASSIGNMENT_POLICY': os.getenv('ASSIGNMENT_POLICY', 'first_react'),
+        'WORKERS_FILE': os.getenv('WORKERS_FILE', ''),  # Lista JSON de funcionários, habilidades e pesos
+
+        # 1 mostra os trabalhos em um quadro fixado e paginado em vez de uma mensagem por item
+        'JOB_BOARD_ENABLED': _int_env('JOB_BOARD_ENABLED', 0),
+
+        # Webhooks do canal de administração para os avisos sem botões (0 envia pelo bot, um por mensagem)
+        'ADMIN_WEBHOOK_POOL_SIZE': _int_env('ADMIN_WEBHOOK_POOL_SIZE', 0),
+
+        # Resumo dos novos pedidos em uma mensagem por janela: off, on ou auto (liga com ADMIN_DIGEST_THRESHOLD pedidos por minuto)
+        'ADMIN_DIGEST_MODE': _choice_env('ADMIN_DIGEST_MODE', ('off', 'on', 'auto'), 'off'),
+        'ADMIN_DIGEST_THRESHOLD': _int_env('ADMIN_DIGEST_THRESHOLD', 20),
+        'ADMIN_DIGEST_WINDOW_SECONDS': _int_env('ADMIN_DIGEST_WINDOW_SECONDS', 60),
+
+        # Configurações do Firebase (sem o arquivo, usa as credenciais padrão do ambiente)
+        'FIREBASE_CREDENTIALS_PATH': os.getenv('FIREBASE_CREDENTIALS_PATH', 'firebase-credentials.json'),
+
+        # Acesso resiliente ao Firestore: prazo e tentativas por chamada, circuit breaker e fila de gravações adiadas
+        'FIRESTORE_TIMEOUT_SECONDS': _int_env('FIRESTORE_TIMEOUT_SECONDS', 10),
+        'FIRESTORE_RETRY_ATTEMPTS': _int_env('FIRESTORE_RETRY_ATTEMPTS', 3),
+        'FIRESTORE_BREAKER_THRESHOLD': _int_env('FIRESTORE_BREAKER_THRESHOLD', 5),  # Falhas seguidas que abrem o circuito
+        'FIRESTORE_BREAKER_RESET_SECONDS': _int_env('FIRESTORE_BREAKER_RESET_SECONDS', 30),
+        'FIRESTORE_WRITE_BUFFER_PATH': os.getenv('FIRESTORE_WRITE_BUFFER_PATH', 'firestore_write_buffer.jsonl'),  # Vazio mantém a fila só em memória
+
+        # Configurações de observabilidade
+        'METRICS_PORT': _int_env('METRICS_PORT'),  # 0 desativa o endpoint /metrics
+        'METRICS_HOST': os.getenv('METRICS_HOST', '127.0.0.1'),
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'INFO'),
+        'TRACE_RECORD_PATH': os.getenv('TRACE_RECORD_PATH', ''),  # Vazio desativa a gravação de traces
+        'PROFILE_OUTPUT_DIR': os.getenv('PROFILE_OUTPUT_DIR', 'profiles'),  # Pasta dos perfis gerados pelo !perfil
+        'LOOP_STALL_THRESHOLD_MS': _int_env('LOOP_STALL_THRESHOLD_MS', 250),  # 0 desativa o detector de travamentos
+
+        # Processos que dividem o acesso ao Firestore por hash do pedido (0 mantém tudo no processo do bot)
+        'ORDER_WORKER_PROCESSES': _int_env('ORDER_WORKER_PROCESSES', 0),
+
+        # Prazo para concluir o trabalho em andamento ao receber SIGTERM
+        'SHUTDOWN_TIMEOUT_SECONDS': _int_env('SHUTDOWN_TIMEOUT_SECONDS', 25),
+    }
+    settings.update(overrides)
+    _settings = settings
+    return settings
+
+def __getattr__(name):
+    settings = _settings if _settings is not None else load_config()
+    try:
+        return settings[name]
+    except KeyError:
+        raise AttributeError(f"module 'config' has no attribute {name!r}") from None
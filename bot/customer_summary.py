@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+
+# Status em que o pedido ainda está em aberto para o cliente
+OPEN_STATUSES = ('pending', 'awaiting_payment', 'payment_confirmed', 'processing')
+
+# Status que contam como gasto do cliente (pagamento confirmado)
+PAID_STATUSES = ('payment_confirmed', 'processing', 'completed')
+
+def customer_keys(order):
+    """Chaves do cliente do pedido: o campo discordId/discordUsername, normalizado"""
+    identity = order.get('discordId') or order.get('discordUsername')
+    return str(identity).strip().lower() if identity else None
+
+class CustomerSummary:
+    """Resumo de um cliente: pedidos em aberto, último status e gasto total"""
+
+    def __init__(self, key):
+        self.key = key
+        self.orders = {}  # Mapeia order_id -> (status, atualizado em) de todos os pedidos
+        self.open_orders = {}  # Mapeia order_id -> status dos pedidos em aberto
+        self.spend = {}  # Mapeia moeda -> total gasto em pedidos pagos
+        self.last_order_id = None
+
+    def __bool__(self):
+        return bool(self.orders)
+
+    @property
+    def order_count(self):
+        return len(self.orders)
+
+    @property
+    def last_status(self):
+        return self.orders[self.last_order_id][0] if self.last_order_id in self.orders else None
+
+    def _refresh_last_order(self):
+        self.last_order_id = max(self.orders, key=lambda order_id: self.orders[order_id][1], default=None)
+
+class CustomerSummaries:
+    """Read model por cliente, mantido pelo listener do Firestore
+
+    Cada mudança de pedido desfaz a contribuição anterior do pedido e aplica a
+    nova, então o resumo é atualizado em O(1) por mudança e consultado sem
+    nenhuma leitura no Firestore.
+    """
+
+    def __init__(self):
+        self._by_key = {}  # Mapeia chave do cliente -> CustomerSummary
+        self._orders = {}  # Mapeia order_id -> (chave, status, total, moeda) aplicados
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def _summary(self, key):
+        summary = self._by_key.get(key)
+        if summary is None:
+            summary = self._by_key[key] = CustomerSummary(key)
+        return summary
+
+    def _remove_contribution(self, order_id):
+        applied = self._orders.pop(order_id, None)
+        if applied is None:
+            return
+        key, status, total, currency = applied
+        summary = self._by_key[key]
+        del summary.orders[order_id]
+        summary.open_orders.pop(order_id, None)
+        if status in PAID_STATUSES:
+            summary.spend[currency] = summary.spend.get(currency, 0) - total
+        if not summary:
+            del self._by_key[key]
+        elif summary.last_order_id == order_id:
+            summary._refresh_last_order()
+
+    def apply_change(self, change_type, order_id, order_data):
+        """Aplica uma mudança do listener do Firestore (ADDED, MODIFIED ou REMOVED)"""
+        self._remove_contribution(order_id)
+        if change_type == 'REMOVED' or not order_data:
+            return
+        key = customer_keys(order_data)
+        if key is None:
+            return
+
+        status = order_data.get('status')
+        total = order_data.get('total') or 0
+        currency = order_data.get('currency', 'BRL')
+        updated_at = order_data.get('updatedAt') or order_data.get('createdAt') or datetime.now(timezone.utc)
+        summary = self._summary(key)
+        summary.orders[order_id] = (status, updated_at)
+        if status in OPEN_STATUSES:
+            summary.open_orders[order_id] = status
+        if status in PAID_STATUSES:
+            summary.spend[currency] = summary.spend.get(currency, 0) + total
+        last = summary.orders.get(summary.last_order_id)
+        if last is None or updated_at >= last[1]:
+            summary.last_order_id = order_id
+        self._orders[order_id] = (key, status, total, currency)
+
+    def get(self, *keys):
+        """Resumo do primeiro identificador encontrado (ex.: nome e ID do usuário do Discord)"""
+        for key in keys:
+            summary = self._by_key.get(str(key).strip().lower()) if key else None
+            if summary:
+                return summary
+        return None
+
+    def for_user(self, user):
+        """Resumo de um usuário do Discord, pelo nome da conta ou pelo ID"""
+        return self.get(getattr(user, 'name', None), getattr(user, 'id', None))
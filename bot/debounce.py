@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from lifecycle import order_tasks
+from metrics import DEBOUNCED_UPDATES
+
+logger = logging.getLogger(__name__)
+
+class Debouncer:
+    """Agrupa atualizações repetidas da mesma chave (ex.: edições de uma mensagem)
+
+    schedule() guarda apenas a última ação de cada chave e a executa depois de
+    `delay` segundos; as ações agendadas nesse intervalo substituem a anterior,
+    então uma rajada de mudanças vira uma única chamada à API. As execuções de
+    uma mesma chave nunca rodam em paralelo, e as tarefas são acompanhadas pelo
+    tracker para que o desligamento aguarde as edições pendentes.
+
+    Args:
+        name: Nome usado nas métricas e nos logs
+        delay: Janela de agrupamento padrão, em segundos
+        tracker: TaskTracker das tarefas criadas
+    """
+
+    def __init__(self, name, delay, tracker=order_tasks):
+        self.name = name
+        self.delay = delay
+        self._tracker = tracker
+        self._actions = {}  # Mapeia chave -> última ação (corrotina sem argumentos) ainda não executada
+        self._timers = {}  # Mapeia chave -> TimerHandle da execução agendada
+        self._locks = {}  # Mapeia chave -> [Lock que serializa as execuções, execuções usando o lock]
+
+    def __len__(self):
+        return len(self._actions)
+
+    def __contains__(self, key):
+        return key in self._actions
+
+    def schedule(self, key, action, delay=None):
+        """Agenda `action()` para a chave, substituindo a ação que ainda não rodou"""
+        if key in self._actions:
+            DEBOUNCED_UPDATES.inc(name=self.name, result='coalesced')
+        self._actions[key] = action
+        if key not in self._timers:
+            delay = self.delay if delay is None else delay
+            self._timers[key] = asyncio.get_running_loop().call_later(delay, self._fire, key)
+
+    def cancel(self, key):
+        """Descarta a ação pendente da chave"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self._actions.pop(key, None)
+
+    def _fire(self, key):
+        self._timers.pop(key, None)
+        action = self._actions.pop(key, None)
+        if action is not None:
+            self._tracker.spawn(self._run(key, action), name=f"{self.name}:{key}")
+
+    async def _run(self, key, action):
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await action()
+            DEBOUNCED_UPDATES.inc(name=self.name, result='sent')
+        except Exception as e:
+            logger.error(f"Erro na atualização agrupada {self.name} ({key}): {e}")
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def flush(self, key, action=None):
+        """Executa agora a ação pendente da chave (ou `action`, que a substitui) e aguarda o fim
+
+        Usado no estado final de uma mensagem: a edição não espera a janela e
+        nenhuma edição agrupada anterior roda depois dela.
+        """
+        if action is not None:
+            self._actions[key] = action
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        action = self._actions.pop(key, None)
+        if action is not None:
+            await self._run(key, action)
+
+    def flush_all(self):
+        """Dispara imediatamente todas as ações pendentes (ex.: no desligamento)"""
+        for key in list(self._actions):
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            self._fire(key)
@@ -0,0 +1,140 @@
+import time
+from collections import deque
+import discord
+from components import DigestSelect
+from job_board import describe_item
+
+# Máximo de pedidos por mensagem de resumo (uma opção por pedido em cada menu; o Discord aceita até 25)
+DIGEST_PAGE_SIZE = 25
+
+# Título das mensagens de resumo no canal de administração
+DIGEST_TITLE = "📥 Resumo de Novos Pedidos"
+
+# Janela da taxa de pedidos usada pelo modo automático, em segundos
+RATE_WINDOW_SECONDS = 60.0
+
+class AdminDigest:
+    """Resumo dos novos pedidos de uma loja para o canal de administração
+
+    No modo 'on', todo novo pedido entra no resumo; no 'auto', só enquanto a
+    taxa de pedidos do último minuto estiver alta: o resumo liga ao atingir
+    `threshold` pedidos por minuto e desliga quando a taxa cai abaixo da
+    metade disso, para não alternar a cada pedido. Como o quadro de
+    trabalhos, só guarda o estado; quem envia a mensagem é o bot.
+
+    Args:
+        mode: 'off', 'auto' ou 'on'
+        threshold: Pedidos por minuto que ligam o modo automático
+        clock: Relógio em segundos (time.monotonic)
+    """
+
+    def __init__(self, mode='off', threshold=20, clock=time.monotonic):
+        self.mode = mode
+        self.threshold = threshold
+        self._clock = clock
+        self._arrivals = deque()  # Momentos de chegada dos pedidos no último minuto
+        self._auto_active = False
+        self._pending = []  # Pedidos (order, user, started_at) aguardando o próximo resumo
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def active(self):
+        return self.mode == 'on' or (self.mode == 'auto' and self._auto_active)
+
+    def record_order(self):
+        """Registra a chegada de um pedido e diz se ele deve entrar no resumo
+
+        Returns:
+            Tupla (ativo, mudou): se o resumo está ativo e se o modo automático acabou de ligar ou desligar
+        """
+        now = self._clock()
+        self._arrivals.append(now)
+        while self._arrivals and self._arrivals[0] <= now - RATE_WINDOW_SECONDS:
+            self._arrivals.popleft()
+        if self.mode != 'auto' or not self.threshold:
+            return self.active, False
+
+        rate = len(self._arrivals)
+        was_active = self._auto_active
+        if was_active:
+            self._auto_active = rate * 2 >= self.threshold
+        else:
+            self._auto_active = rate >= self.threshold
+        return self._auto_active, self._auto_active != was_active
+
+    def add(self, order, user, started_at=None):
+        self._pending.append((order, user, started_at))
+
+    def drain(self):
+        """Retira os pedidos pendentes, em grupos de até DIGEST_PAGE_SIZE (um por mensagem)"""
+        pending, self._pending = self._pending, []
+        return [pending[start:start + DIGEST_PAGE_SIZE] for start in range(0, len(pending), DIGEST_PAGE_SIZE)]
+
+def _option(order, user):
+    currency_symbol = '$' if order.get('currency', 'BRL') == 'USD' else 'R$'
+    customer = user.name if user else (order.get('discordId') or order.get('discordUsername') or 'Cliente')
+    return discord.SelectOption(
+        label=f"#{order['id'][-6:]} · {customer}"[:100],
+        value=order['id'],
+        description=f"{currency_symbol} {order.get('total', 0):.2f} · {len(order.get('items') or [])} itens"[:100]
+    )
+
+def render_digest(entries):
+    """Embed e menus de um resumo: um campo por pedido e um menu para aprovar e outro para rejeitar
+
+    O ID curto (#xxxxxx) fica só no nome dos campos, então a limpeza das
+    mensagens de um pedido (que procura no título e na descrição) não apaga o
+    resumo inteiro.
+    """
+    embed = discord.Embed(
+        title=DIGEST_TITLE,
+        description=(
+            f"{len(entries)} novos pedidos.\n"
+            "Use os menus abaixo para aprovar ou rejeitar um ou mais pedidos.\n"
+            "🔗 [Acessar Painel Admin](https://site-vendas-ffxiv.vercel.app/admin)"
+        ),
+        color=discord.Color.green(),
+        timestamp=discord.utils.utcnow()
+    )
+    for order, user, _ in entries:
+        currency_symbol = '$' if order.get('currency', 'BRL') == 'USD' else 'R$'
+        customer = user.name if user else f"❌ {order.get('discordId') or order.get('discordUsername') or 'N/A'} (não encontrado)"
+        items = ", ".join(describe_item(item) for item in order.get('items') or []) or "Nenhum item"
+        embed.add_field(
+            name=f"#{order['id'][-6:]} · {currency_symbol} {order.get('total', 0):.2f}",
+            value=f"Cliente: {customer}\n{items}"[:180],
+            inline=False
+        )
+
+    view = discord.ui.View(timeout=None)
+    # Sem o usuário do Discord não há para quem enviar as instruções de pagamento
+    approvable = [_option(order, user) for order, user, _ in entries if user]
+    if approvable:
+        view.add_item(DigestSelect('approve', approvable))
+    view.add_item(DigestSelect('reject', [_option(order, user) for order, user, _ in entries]))
+    return embed, view
+
+def resolve_digest(message, order_ids, label):
+    """Embed e menus da mensagem de resumo depois de tratar `order_ids`
+
+    Os pedidos tratados saem dos dois menus (um menu sem opções é removido) e
+    o campo de cada um recebe `label` (ex.: "✅ Aprovado por admin").
+
+    Returns:
+        Tupla (embed, view); a view é None se não sobrou nenhum pedido
+    """
+    short_ids = {f"#{order_id[-6:]}" for order_id in order_ids}
+    embed = message.embeds[0].copy()
+    for index, field in enumerate(embed.fields):
+        if field.name.split(' ', 1)[0] in short_ids:
+            embed.set_field_at(index, name=f"{field.name} — {label}"[:256], value=field.value, inline=field.inline)
+
+    remaining = discord.ui.View(timeout=None)
+    for child in discord.ui.View.from_message(message, timeout=None).children:
+        if isinstance(child, discord.ui.Select) and child.custom_id.startswith('digest:'):
+            options = [option for option in child.options if option.value not in order_ids]
+            if options:
+                remaining.add_item(DigestSelect(child.custom_id.split(':', 1)[1], options))
+    return embed, (remaining if remaining.children else None)
@@ -1,53 +1,109 @@
-import os
+import math
+import re
+import signal
+import time
+import logging
+from collections import deque
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 from datetime import datetime, timedelta, timezone
-from config import DISCORD_BOT_TOKEN, DISCORD_GUILD_ID, DISCORD_ADMIN_ROLE_ID, DISCORD_ADMIN_CHANNEL_ID
-from firebase_service import setup_order_listener, get_pending_orders, update_order_status
-from utils import format_order_message
+from config import (
+    DISCORD_BOT_TOKEN, METRICS_PORT, METRICS_HOST, LOG_LEVEL, TRACE_RECORD_PATH, PROFILE_OUTPUT_DIR,
+    LOOP_STALL_THRESHOLD_MS, SHUTDOWN_TIMEOUT_SECONDS, ORDER_WORKER_PROCESSES, JOB_BOARD_ENABLED,
+    ADMIN_WEBHOOK_POOL_SIZE, ADMIN_DIGEST_MODE, ADMIN_DIGEST_THRESHOLD, ADMIN_DIGEST_WINDOW_SECONDS
+)
+from firebase_service import (
+    setup_order_listener, get_pending_orders, update_order_status, get_order,
+    get_orders, get_orders_by_status, update_orders_status, save_bot_state, load_bot_state, clear_bot_state, get_sales_report,
+    replay_buffered_writes
+)
+from components import (
+    OrderButton, BoardPageButton, DigestSelect, order_view, register_handler, register_board_page_handler,
+    register_digest_handler, register_tenant_resolver
+)
+from tenants import (
+    all_tenants, get_tenant, order_collections, tenant_for_guild, tenant_for_order, tenant_for_order_id,
+    bind_tenant, current_tenant
+)
+from metrics import (
+    start_metrics_server, ORDER_STAGE_LATENCY, DISCORD_API_LATENCY, DISCORD_API_RETRIES,
+    CACHE_SIZE, GATEWAY_LATENCY, WORK_ASSIGNMENTS, SALES_REPORTS, ADMIN_ORDER_NOTIFICATIONS
+)
+from structured_logging import setup_logging, bind_order, log_order_stage, pending_log_records
+from trace_recorder import start_recording
+from profiling import capture_profile
+from loop_monitor import LoopStallDetector
+from supervisor import Supervisor
+from lifecycle import Scheduler, order_tasks
+from debounce import Debouncer
+from job_board import JobBoard
+from webhooks import WebhookFeed
+from digest import AdminDigest, render_digest, resolve_digest
+from analytics import parse_report_range
+from partitions import start_pool, stop_pool, get_pool
+import firebase_service
+import health
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 # Configuração do bot
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.guilds = True  # Adiciona intent para acessar membros do servidor
-intents.reactions = True  # Adiciona intent para reações
+# As ações usam botões persistentes, então o intent de reações não é necessário
+intents.reactions = False
+
+class TenantCommandTree(app_commands.CommandTree):
+    """Associa cada comando de barra (e seu autocomplete) à loja do servidor onde foi usado"""
+
+    async def interaction_check(self, interaction):
+        tenant = tenant_for_guild(interaction.guild_id)
+        if tenant is not None:
+            bind_tenant(tenant)
+        return True
 
 # Cria o bot com intents específicos
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = commands.Bot(command_prefix='!', intents=intents, tree_cls=TenantCommandTree)
+
+# Registra os botões persistentes dos pedidos (roteados pelo custom_id)
+bot.add_dynamic_items(OrderButton, BoardPageButton, DigestSelect)
 
 # Desabilita o sistema de áudio
 discord.VoiceClient.warn_nacl = False
 
-# Cache para evitar duplicação de mensagens
-processed_orders = set()
+# Cache para evitar duplicação de mensagens: order_id -> createdAt
+processed_orders = {}
 
 # Variável para armazenar o listener do Firestore
 firestore_listener = None
 
-# Emojis para reações
+# Emojis de status exibidos nos embeds
 APPROVE_EMOJI = "✅"
 REJECT_EMOJI = "❌"
-WORKER_EMOJI = "👥"  # Emoji para enviar aos funcionários
-ADMIN_EMOJI = "👨‍💼"  # Emoji para admin fazer o serviço
 
-# Cache para armazenar informações dos pedidos
-order_messages = {}  # Mapeia message_id -> (order_data, user) - Para aprovação inicial do pedido
-payment_confirmation_messages = {}  # Mapeia message_id -> (order_data, user, admin_message) - Para confirmação de pagamento
-payment_verification_messages = {}  # Mapeia message_id -> (order_data, user, original_message) - Para verificação do pagamento pelos admins
+# Título do campo adicionado ao embed quando um funcionário aceita o trabalho
+ASSIGNED_WORKER_FIELD = "👷 Funcionário Designado"
+
+# Pedidos criados antes do watermark já foram tratados (por esta ou pela instância anterior)
+order_watermark = None
+
+# Margem antes do momento do desligamento salva no watermark (atrasos do listener, relógios)
+PROCESSED_ORDERS_OVERLAP = timedelta(minutes=10)
 
-# Cache para mensagens de decisão do admin
-admin_decision_messages = {}  # Mapeia message_id -> (order_data, user, original_message)
+# Estado salvo há mais tempo que isso é ignorado (evita reprocessar dias de pedidos e retomar canais e jobs antigos)
+STATE_MAX_AGE = timedelta(hours=6)
 
-# Armazena o momento em que o bot iniciou
-bot_start_time = None
+# Tempo reservado no desligamento para salvar o estado e fechar a conexão
+SHUTDOWN_STATE_RESERVE_SECONDS = 5
 
-# Adiciona nova constante para o canal dos funcionários
-DISCORD_WORKERS_CHANNEL_ID = int(os.getenv('DISCORD_WORKERS_CHANNEL_ID', 0))
+# Tarefa de desligamento em andamento (iniciada por SIGTERM/SIGINT)
+shutdown_task = None
 
-# Cache para mensagens de trabalho
-work_messages = {}  # Mapeia message_id -> (order_data, user, worker)
+# Tempo até arquivar o canal de um pedido concluído ou cancelado
+ARCHIVE_DELAY_SECONDS = 300  # 5 minutos
 
 # Cache para threads de trabalho
 work_threads = {}  # Mapeia order_id -> thread_id
@@ -55,6 +111,166 @@ work_threads = {}  # Mapeia order_id -> thread_id
 # Cache para confirmações de conclusão
 completion_confirmations = {}  # Mapeia order_id -> {"client": bool, "worker": bool, "message_id": message_id}
 
+# Detector de travamentos do event loop (iniciado no on_ready)
+stall_detector = LoopStallDetector(threshold=LOOP_STALL_THRESHOLD_MS / 1000)
+
+# Listeners e tarefas em segundo plano, iniciados uma única vez mesmo com reconexões
+supervisor = Supervisor()
+
+# Ações atrasadas (ex.: arquivar canais) salvas no desligamento e retomadas no início
+scheduler = Scheduler()
+
+# Quadro de trabalhos de cada loja (JOB_BOARD_ENABLED): tenant_id -> JobBoard
+job_boards = {}
+
+# Janela em que as mudanças do quadro são agrupadas em uma única edição da mensagem
+JOB_BOARD_EDIT_DELAY = 2.0
+job_board_edits = Debouncer('job_board', JOB_BOARD_EDIT_DELAY)
+
+# Janela em que as confirmações de conclusão são agrupadas em uma única edição do embed de ações
+COMPLETION_EDIT_DELAY = 1.5
+completion_edits = Debouncer('completion_embed', COMPLETION_EDIT_DELAY)
+
+# Resumo dos novos pedidos de cada loja (ADMIN_DIGEST_MODE): tenant_id -> AdminDigest
+admin_digests = {}
+
+# Um resumo por loja a cada janela, com os pedidos que chegaram nela
+admin_digest_posts = Debouncer('admin_digest', ADMIN_DIGEST_WINDOW_SECONDS)
+
+# Avisos sem botões do canal de administração de cada loja (ADMIN_WEBHOOK_POOL_SIZE): tenant_id -> WebhookFeed
+admin_feeds = {}
+
+# Servidores em que os comandos de barra já foram sincronizados
+slash_commands_synced = set()
+
+# Status válidos para os pedidos
+VALID_STATUSES = [
+    'pending',
+    'awaiting_payment',
+    'payment_confirmed',
+    'processing',
+    'completed',
+    'cancelled'
+]
+
+# Status em que o pedido está encerrado e não ocupa mais nenhum funcionário
+FINISHED_STATUSES = ('completed', 'cancelled')
+
+# Transições permitidas nas alterações de status em lote (status atual -> novos status)
+ALLOWED_STATUS_TRANSITIONS = {
+    'pending': {'awaiting_payment', 'cancelled'},
+    'awaiting_payment': {'pending', 'payment_confirmed', 'cancelled'},
+    'payment_confirmed': {'processing', 'completed', 'cancelled'},
+    'processing': {'completed', 'cancelled'},
+    'completed': set(),
+    'cancelled': set()
+}
+
+# Limite de operações simultâneas no Discord ao limpar canais após alterações em lote
+DISCORD_CLEANUP_CONCURRENCY = 5
+
+# Itens de trabalho sendo aceitos no momento (evita dois funcionários no mesmo item)
+claiming_items = set()  # Conjunto de (order_id, item_index)
+
+# Tamanho dos caches e latência do gateway calculados no momento da exportação das métricas
+CACHE_SIZE.set_function(lambda: len(processed_orders), cache='processed_orders')
+CACHE_SIZE.set_function(lambda: len(work_threads), cache='work_threads')
+CACHE_SIZE.set_function(lambda: len(completion_confirmations), cache='completion_confirmations')
+CACHE_SIZE.set_function(lambda: sum(len(tenant.order_index) for tenant in all_tenants()), cache='order_index')
+CACHE_SIZE.set_function(lambda: len(claiming_items), cache='claiming_items')
+CACHE_SIZE.set_function(lambda: sum(len(tenant.customer_summaries) for tenant in all_tenants()), cache='customer_summaries')
+CACHE_SIZE.set_function(lambda: sum(len(tenant.assignment) for tenant in all_tenants()), cache='assigned_jobs')
+CACHE_SIZE.set_function(lambda: sum(len(board) for board in job_boards.values()), cache='job_board_items')
+CACHE_SIZE.set_function(lambda: sum(len(tenant.sales) for tenant in all_tenants()), cache='sales_rollup_days')
+CACHE_SIZE.set_function(lambda: len(firebase_service.get_write_buffer()), cache='firestore_write_buffer')
+CACHE_SIZE.set_function(lambda: sum(len(feed) for feed in admin_feeds.values()), cache='admin_feed_pending')
+CACHE_SIZE.set_function(lambda: sum(len(digest) for digest in admin_digests.values()), cache='admin_digest_pending')
+GATEWAY_LATENCY.set_function(lambda: bot.latency)
+
+# Novas tentativas para envios ao Discord (rate limit ou falha temporária)
+DISCORD_SEND_ATTEMPTS = 3
+DISCORD_RETRY_BASE_DELAY = 1.0  # segundos, dobra a cada tentativa
+
+# Latências das etapas de processamento dos pedidos (últimas medições)
+stage_latencies = deque(maxlen=1000)  # Tuplas (order_id, etapa, segundos)
+
+def record_stage_latency(order_id, stage, started_at):
+    """Registra quanto tempo uma etapa do pedido levou desde started_at (time.perf_counter)"""
+    elapsed = time.perf_counter() - started_at
+    stage_latencies.append((order_id, stage, elapsed))
+    ORDER_STAGE_LATENCY.observe(elapsed, stage=stage)
+    log_order_stage(logger, order_id, stage, elapsed)
+    return elapsed
+
+def retry_after_seconds(error):
+    """Espera pedida pelo Discord no cabeçalho Retry-After da resposta (429), ou None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+async def send_with_retry(send, description, attempts=DISCORD_SEND_ATTEMPTS, operation='send'):
+    """Executa um envio para o Discord com novas tentativas em caso de rate limit ou erro do servidor
+
+    Args:
+        send: Função sem argumentos que retorna a corrotina do envio
+        description: Descrição do envio usada nos logs
+        attempts: Número máximo de tentativas
+        operation: Nome curto da chamada usado nas métricas
+    """
+    tenant = current_tenant(default=None)
+    with DISCORD_API_LATENCY.time(operation=operation):
+        for attempt in range(1, attempts + 1):
+            try:
+                # Cada loja consome o próprio orçamento de envios
+                if tenant is not None:
+                    await tenant.send_budget.acquire()
+                return await send()
+            except discord.HTTPException as e:
+                # 429: rate limit, 5xx: erro do Discord, 40003: muitas DMs abertas em pouco tempo
+                retryable = e.status == 429 or e.status >= 500 or e.code == 40003
+                if not retryable or attempt == attempts:
+                    raise
+                DISCORD_API_RETRIES.inc(operation=operation)
+                delay = retry_after_seconds(e) or DISCORD_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                logger.warning(f"Falha ao {description} (tentativa {attempt}/{attempts}), aguardando {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+async def send_admin_batch(channel, content, embeds):
+    """Envio de um grupo de avisos pelo próprio bot (sem webhooks disponíveis)"""
+    return await send_with_retry(
+        lambda: channel.send(content=content, embeds=embeds),
+        "enviar avisos aos administradores",
+        operation='admin_feed'
+    )
+
+def admin_feed_for(tenant):
+    """Feed de avisos do canal de administração da loja (criado no primeiro uso)"""
+    feed = admin_feeds.get(tenant.id)
+    if feed is None:
+        feed = admin_feeds[tenant.id] = WebhookFeed(
+            tenant.id, tenant.admin_channel_id, ADMIN_WEBHOOK_POOL_SIZE,
+            bot.get_channel, send_admin_batch, bot_user=lambda: bot.user
+        )
+    return feed
+
+async def post_admin_notice(admin_channel, embed, content=None):
+    """Envia um aviso sem botões ao canal de administração
+
+    Com ADMIN_WEBHOOK_POOL_SIZE, o aviso entra no feed de webhooks da loja e
+    sai agrupado com os próximos, sem usar o orçamento de envios do bot; sem
+    ele, é enviado na hora pelo bot.
+    """
+    if ADMIN_WEBHOOK_POOL_SIZE:
+        admin_feed_for(current_tenant()).post(embed, content)
+        return
+    await send_with_retry(
+        lambda: admin_channel.send(content=content, embed=embed),
+        "enviar aviso aos administradores",
+        operation='admin_notice'
+    )
+
 def format_payment_method(method):
     """Formata o método de pagamento para exibição"""
     payment_methods = {
@@ -164,7 +380,7 @@ async def find_discord_user(username):
             return matching_users[0]
             
         # Se não encontrar, tenta buscar no servidor específico
-        guild = bot.get_guild(DISCORD_GUILD_ID)
+        guild = bot.get_guild(current_tenant().guild_id)
         if guild:
             for member in guild.members:
                 if member.name.lower() == username.lower():
@@ -172,16 +388,22 @@ async def find_discord_user(username):
         
         return None
     except Exception as e:
-        print(f"Erro ao buscar usuário '{username}': {e}")
+        logger.error(f"Erro ao buscar usuário '{username}': {e}")
         return None
 
-async def send_admin_notification(order, user=None):
-    """Envia notificação para o canal de administração"""
+async def send_admin_notification(order, user=None, started_at=None):
+    """Envia notificação para o canal de administração
+
+    Args:
+        order: Dados do pedido
+        user: Usuário do Discord do cliente, se encontrado
+        started_at: Início do processamento do pedido (time.perf_counter) para medir latência
+    """
     try:
         # Busca o canal de administração pelo ID
-        admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+        admin_channel = bot.get_channel(current_tenant().admin_channel_id)
         if not admin_channel:
-            print(f"Canal de administração não encontrado (ID: {DISCORD_ADMIN_CHANNEL_ID})")
+            logger.info(f"Canal de administração não encontrado (ID: {current_tenant().admin_channel_id})")
             return
 
         # Define o símbolo da moeda para a notificação do admin
@@ -253,30 +475,180 @@ async def send_admin_notification(order, user=None):
         admin_embed.set_footer(text="Pedido recebido em")
         
         # Menciona o cargo de admin se existir
-        guild = bot.get_guild(DISCORD_GUILD_ID)
+        guild = bot.get_guild(current_tenant().guild_id)
         mention_text = ""
         if guild:
-            admin_role = guild.get_role(DISCORD_ADMIN_ROLE_ID)
+            admin_role = guild.get_role(current_tenant().admin_role_id)
             if admin_role:
                 mention_text = admin_role.mention
 
-        # Envia a mensagem no canal de administração
-        message = await admin_channel.send(
-            content=mention_text,
-            embed=admin_embed
-        )
-
-        # Só adiciona reações se o usuário foi encontrado
+        # Só adiciona os botões de aprovação se o usuário foi encontrado; sem eles, é um aviso do feed
         if user:
-            await message.add_reaction(APPROVE_EMOJI)
-            await message.add_reaction(REJECT_EMOJI)
-            # Armazena as informações do pedido no cache
-            order_messages[message.id] = (order, user)
+            # Envia a mensagem no canal de administração (botões na mesma chamada)
+            await send_with_retry(
+                lambda: admin_channel.send(content=mention_text, embed=admin_embed, view=order_view(order['id'], 'approve', 'reject')),
+                "enviar notificação aos administradores",
+                operation='admin_notification'
+            )
+        else:
+            await post_admin_notice(admin_channel, admin_embed, mention_text)
+        if started_at is not None:
+            record_stage_latency(order['id'], 'admin_notification', started_at)
+
+        logger.info(f"Notificação do pedido {order['id']} enviada para o canal de administração")
+
+    except Exception as e:
+        logger.error(f"Erro ao enviar notificação para administradores: {e}")
+
+def admin_digest_for(tenant):
+    """Resumo de novos pedidos da loja (criado no primeiro uso)"""
+    digest = admin_digests.get(tenant.id)
+    if digest is None:
+        digest = admin_digests[tenant.id] = AdminDigest(ADMIN_DIGEST_MODE, ADMIN_DIGEST_THRESHOLD)
+    return digest
+
+async def notify_admins_of_order(order, user=None, started_at=None):
+    """Anuncia um novo pedido aos administradores
+
+    Fora do modo resumo, cada pedido tem a própria mensagem com a menção do
+    cargo; no modo resumo, o pedido entra na próxima mensagem de resumo da
+    loja, enviada uma vez por janela.
+    """
+    tenant = current_tenant()
+    if ADMIN_DIGEST_MODE == 'off':
+        ADMIN_ORDER_NOTIFICATIONS.inc(tenant=tenant.id, mode='single')
+        await send_admin_notification(order, user, started_at)
+        return
+
+    digest = admin_digest_for(tenant)
+    active, changed = digest.record_order()
+    if changed:
+        logger.info(f"Resumo de pedidos {'ativado' if active else 'desativado'} para a loja {tenant.id}")
+    if not active:
+        ADMIN_ORDER_NOTIFICATIONS.inc(tenant=tenant.id, mode='single')
+        await send_admin_notification(order, user, started_at)
+        return
+    ADMIN_ORDER_NOTIFICATIONS.inc(tenant=tenant.id, mode='digest')
+    digest.add(order, user, started_at)
+    admin_digest_posts.schedule(tenant.id, lambda: post_admin_digest(tenant))
+
+async def post_admin_digest(tenant):
+    """Envia os pedidos pendentes do resumo da loja, até 25 por mensagem"""
+    bind_tenant(tenant)
+    digest = admin_digest_for(tenant)
+    admin_channel = bot.get_channel(tenant.admin_channel_id)
+    if not admin_channel:
+        logger.info(f"Canal de administração não encontrado (ID: {tenant.admin_channel_id})")
+        digest.drain()
+        return
+
+    # Uma menção por mensagem de resumo em vez de uma por pedido
+    guild = bot.get_guild(tenant.guild_id)
+    admin_role = guild.get_role(tenant.admin_role_id) if guild else None
+    mention_text = admin_role.mention if admin_role else ""
+    for entries in digest.drain():
+        embed, view = render_digest(entries)
+        try:
+            await send_with_retry(
+                lambda: admin_channel.send(content=mention_text, embed=embed, view=view),
+                "enviar resumo de pedidos aos administradores",
+                operation='admin_digest'
+            )
+        except Exception as e:
+            logger.error(f"Erro ao enviar resumo de {len(entries)} pedidos aos administradores: {e}")
+            continue
+        for order, _, started_at in entries:
+            if started_at is not None:
+                record_stage_latency(order['id'], 'admin_notification', started_at)
+        logger.info(f"Resumo com {len(entries)} pedidos enviado para o canal de administração")
+
+async def resolve_customer(order):
+    """Encontra o usuário do Discord do cliente a partir dos dados do pedido"""
+    discord_username = order.get('discordId') or order.get('discordUsername')
+    if not discord_username:
+        return None
+
+    logger.info(f"Buscando usuário: {discord_username}")
+    user = await find_discord_user(discord_username)
 
-        print(f"Notificação enviada para o canal de administração")
+    if not user:
+        logger.info(f"Usuário não encontrado: {discord_username}")
+        # Tenta como ID numérico (compatibilidade)
+        try:
+            user = await bot.fetch_user(int(discord_username))
+        except (ValueError, discord.NotFound):
+            logger.info(f"Usuário também não encontrado por ID: {discord_username}")
+            return None
 
+    logger.info(f"Usuário encontrado: {user.name} (ID: {user.id})")
+    return user
+
+async def find_order_tenant(order_id):
+    """Loja de um pedido que não está nos índices em memória, procurando-o no Firestore de cada loja
+
+    As buscas são simultâneas para responder ao clique dentro do prazo da
+    interação. Em uma coleção compartilhada, vale a loja do storeId do pedido.
+    """
+    async def lookup(tenant):
+        bind_tenant(tenant)
+        order = await get_order(order_id)
+        return tenant if order and tenant.store_id in (None, order.get('storeId')) else None
+
+    found = await asyncio.gather(*(lookup(tenant) for tenant in all_tenants()))
+    return next((tenant for tenant in found if tenant is not None), None)
+
+async def load_order_context(order_id):
+    """Carrega o pedido e o cliente a partir do ID do pedido carregado no botão"""
+    order = await get_order(order_id)
+    if not order:
+        return None, None
+    user = await resolve_customer(order)
+    return order, user
+
+def is_admin_member(member):
+    """Verifica se o membro possui o cargo de administrador da loja atual"""
+    return discord.utils.get(getattr(member, 'roles', []), id=current_tenant().admin_role_id) is not None
+
+def bind_guild_tenant(guild):
+    """Associa a loja do servidor à task atual; None fora de um servidor de loja"""
+    tenant = tenant_for_guild(guild.id if guild else None)
+    return bind_tenant(tenant) if tenant is not None else None
+
+def admin_only():
+    """Restringe o comando aos administradores da loja do servidor em que foi usado"""
+    async def predicate(ctx):
+        if ctx.guild is None:
+            raise commands.NoPrivateMessage()
+        tenant = bind_guild_tenant(ctx.guild)
+        if tenant is None:
+            raise commands.CheckFailure("Este servidor não está associado a nenhuma loja.")
+        if not is_admin_member(ctx.author):
+            raise commands.MissingRole(tenant.admin_role_id)
+        return True
+    return commands.check(predicate)
+
+def admin_only_slash():
+    """Versão de admin_only para comandos de barra"""
+    async def predicate(interaction):
+        if interaction.guild is None:
+            raise app_commands.NoPrivateMessage()
+        tenant = bind_guild_tenant(interaction.guild)
+        if tenant is None:
+            raise app_commands.CheckFailure("Este servidor não está associado a nenhuma loja.")
+        if not is_admin_member(interaction.user):
+            raise app_commands.MissingRole(tenant.admin_role_id)
+        return True
+    return app_commands.check(predicate)
+
+async def send_customer_order_dm(order, user, started_at):
+    """Envia o resumo do pedido por DM para o cliente"""
+    try:
+        embed = create_order_embed(order)
+        await send_with_retry(lambda: user.send(embed=embed), f"enviar DM para {user.name}", operation='customer_dm')
+        record_stage_latency(order['id'], 'customer_dm', started_at)
+        logger.info(f"Mensagem enviada para {user.name}")
     except Exception as e:
-        print(f"Erro ao enviar notificação para administradores: {e}")
+        logger.error(f"Erro ao enviar DM do pedido {order['id']} para {user.name}: {e}")
 
 async def handle_new_order(order):
     """Manipula novos pedidos recebidos do Firebase"""
@@ -285,84 +657,153 @@ async def handle_new_order(order):
         if order['id'] in processed_orders:
             return
 
-        # Verifica se o pedido é novo (criado após o início do bot)
+        # Desligando: o pedido fica para a próxima instância (é posterior ao watermark salvo)
+        if not order_tasks.accepting:
+            return
+
+        # Verifica se o pedido é novo (criado após o watermark)
         order_time = order.get('createdAt')
-        if not order_time or order_time < bot_start_time:
+        if not order_time or order_time < order_watermark:
             # Adiciona ao cache de processados e ignora
-            processed_orders.add(order['id'])
+            processed_orders[order['id']] = order_time
             return
-            
-        # Tenta encontrar o usuário pelo nome do Discord
-        user = None
-        discord_username = order.get('discordId') or order.get('discordUsername')
-        
-        if discord_username:
-            print(f"Buscando usuário: {discord_username}")
-            user = await find_discord_user(discord_username)
-            
-            if not user:
-                print(f"Usuário não encontrado: {discord_username}")
-                # Tenta como ID numérico (compatibilidade)
-                try:
-                    user = await bot.fetch_user(int(discord_username))
-                except (ValueError, discord.NotFound):
-                    print(f"Usuário também não encontrado por ID: {discord_username}")
-                    # Mesmo sem encontrar o usuário, notifica os administradores
-                    await send_admin_notification(order)
-                    processed_orders.add(order['id'])
-                    return
 
-            print(f"Usuário encontrado: {user.name} (ID: {user.id})")
+        # Marca como processado antes de qualquer await para evitar notificações duplicadas
+        processed_orders[order['id']] = order_time
+        tenant = tenant_for_order(order)
+        if tenant is None:
+            logger.warning(f"Pedido {order['id']} sem loja correspondente (coleção {order.get('_collection')}, storeId {order.get('storeId')})")
+            return
+        bind_tenant(tenant)
+        order_tasks.track()
+        bind_order(order['id'])
+        # Mede as etapas desde a chegada no listener (snapshot -> DM), quando disponível
+        started_at = order.get('_received_at') or time.perf_counter()
 
+        # Tenta encontrar o usuário pelo nome do Discord
+        user = await resolve_customer(order)
+        if order.get('discordId') or order.get('discordUsername'):
+            record_stage_latency(order['id'], 'user_lookup', started_at)
+
+        # DM do cliente e notificação dos administradores são independentes:
+        # rodam em paralelo, cada uma com suas próprias novas tentativas.
+        # Mesmo sem encontrar o usuário, notifica os administradores
+        stages = [notify_admins_of_order(order, user, started_at)]
         if user:
-            try:
-                # Cria e envia o embed do pedido para o usuário
-                embed = create_order_embed(order)
-                await user.send(embed=embed)
-                print(f"Mensagem enviada para {user.name}")
-                
-                # Aguarda 2 segundos antes de continuar
-                await asyncio.sleep(2)
+            stages.append(send_customer_order_dm(order, user, started_at))
+        await asyncio.gather(*stages)
+        record_stage_latency(order['id'], 'total', started_at)
 
-                # Notifica os administradores
-                await send_admin_notification(order, user)
+    except Exception as e:
+        logger.error(f"Erro ao processar pedido {order['id']}: {e}")
+
+def apply_order_change(change_type, order_id, order_data):
+    """Atualiza o índice, os resumos por cliente e o rollup de vendas da loja do pedido com uma mudança do listener"""
+    tenant = tenant_for_order(order_data) or tenant_for_order_id(order_id)
+    if tenant is not None:
+        tenant.order_index.apply_change(change_type, order_id, order_data)
+        tenant.customer_summaries.apply_change(change_type, order_id, order_data)
+        tenant.sales.apply_change(change_type, order_id, order_data)
+        # Pedido encerrado libera os trabalhos dos funcionários na distribuição automática
+        if change_type == 'REMOVED' or order_data.get('status') in FINISHED_STATUSES:
+            tenant.assignment.release(order_id)
+            board = job_boards.get(tenant.id)
+            if board is not None and board.remove_order(order_id):
+                schedule_job_board_update(tenant)
+
+def start_order_listener():
+    """Configura um listener do Firebase por coleção de pedidos, com o event loop principal"""
+    global firestore_listener
+    loop = asyncio.get_running_loop()
+    firestore_listener = [
+        setup_order_listener(handle_new_order, loop, on_change=apply_order_change, collection=collection)
+        for collection in order_collections()
+    ]
+    return firestore_listener
+
+def start_stall_detector():
+    """Mede o atraso do event loop e registra as chamadas que o bloqueiam"""
+    stall_detector.start()
+    return stall_detector
+
+async def restore_state():
+    """Carrega o estado salvo no último desligamento: watermark, pedidos processados, jobs e canais
+
+    O estado é apagado logo após a leitura: só o desligamento gradual o grava,
+    então um reinício depois de uma queda (sem novo estado) não volta a um
+    watermark antigo nem reenvia as notificações dos pedidos já tratados.
+    """
+    global order_watermark
+    now = datetime.now(timezone.utc)
+    order_watermark = now
+    state = await load_bot_state()
+    if not state:
+        return
+    await clear_bot_state()
 
-                # Adiciona ao cache de pedidos processados
-                processed_orders.add(order['id'])
-                
-            except discord.errors.HTTPException as e:
-                if e.code == 40003:  # Rate limit error
-                    print(f"Rate limit atingido, aguardando 5 segundos...")
-                    await asyncio.sleep(5)
-                    # Tenta enviar novamente
-                    await user.send(embed=embed)
-                else:
-                    raise e
+    saved_at = state.get('saved_at') or state.get('watermark')
+    if not saved_at or now - saved_at > STATE_MAX_AGE:
+        # Canais, jobs e quadros de um estado tão antigo podem não existir mais
+        logger.warning(f"Estado salvo ignorado: gravado em {saved_at.isoformat() if saved_at else 'data desconhecida'}")
+        return
 
-    except Exception as e:
-        print(f"Erro ao processar pedido {order['id']}: {e}")
+    watermark = state.get('watermark')
+    if watermark:
+        # Pedidos criados enquanto nenhuma instância estava ouvindo serão processados agora
+        order_watermark = watermark
+        for order_id in state.get('processed_orders') or []:
+            processed_orders.setdefault(order_id, watermark)
+
+    work_threads.update(state.get('work_threads') or {})
+    for tenant in all_tenants():
+        tenant.assignment.restore((state.get('assignments') or {}).get(tenant.id))
+    for tenant_id, board_state in (state.get('job_boards') or {}).items():
+        tenant = get_tenant(tenant_id)
+        if tenant is not None:
+            job_board_for(tenant).restore(board_state)
+    restored_jobs = scheduler.restore(state.get('scheduled_jobs'))
+    logger.info(
+        f"Estado restaurado: watermark {order_watermark.isoformat()}, "
+        f"{len(processed_orders)} pedidos processados, {restored_jobs} jobs agendados, {len(work_threads)} canais"
+    )
 
 @bot.event
 async def on_ready():
-    """Evento disparado quando o bot está pronto"""
-    global bot_start_time
-    bot_start_time = datetime.now(timezone.utc)
-    
-    print(f'Bot conectado como {bot.user}')
-    print(f'Membros visíveis: {len(bot.users)}')
-    print(f'Servidores: {len(bot.guilds)}')
-    print(f'Iniciado em: {bot_start_time}')
+    """Evento disparado quando o bot está pronto (de novo a cada reconexão do gateway)"""
+    # Apenas na primeira conexão: retoma o estado deixado pela instância anterior
+    if order_watermark is None:
+        await restore_state()
     
-    # Configura o listener do Firebase com o event loop principal
-    global firestore_listener
-    firestore_listener = setup_order_listener(handle_new_order, asyncio.get_event_loop())
-    
-    # Inicia o loop de verificação de pedidos pendentes
-    check_pending_orders.start()
+    logger.info(f'Bot conectado como {bot.user}')
+    logger.info(f'Membros visíveis: {len(bot.users)}')
+    logger.info(f'Servidores: {len(bot.guilds)}')
+    logger.info(f'Processando pedidos criados após: {order_watermark}')
+
+    # Inicia o listener e as tarefas que ainda não rodam; os ativos não são duplicados
+    supervisor.ensure_running()
+    supervisor.start_watchdog()
+
+    # Registra os comandos de barra no servidor (sincronização por servidor é imediata)
+    for tenant in all_tenants():
+        if not tenant.guild_id or tenant.guild_id in slash_commands_synced:
+            continue
+        try:
+            guild = discord.Object(id=tenant.guild_id)
+            bot.tree.copy_global_to(guild=guild)
+            await bot.tree.sync(guild=guild)
+            slash_commands_synced.add(tenant.guild_id)
+        except discord.HTTPException as e:
+            logger.error(f"Erro ao sincronizar comandos de barra da loja {tenant.id}: {e}")
 
 @tasks.loop(minutes=30)
 async def check_pending_orders():
-    """Verifica pedidos pendentes periodicamente"""
+    """Verifica pedidos pendentes de cada loja periodicamente"""
+    # Cada loja em uma task própria, com seus lembretes e seu orçamento de envios
+    await asyncio.gather(*(remind_pending_orders(tenant) for tenant in all_tenants()))
+
+async def remind_pending_orders(tenant):
+    """Envia lembretes dos pedidos pendentes há mais de 24 horas de uma loja"""
+    bind_tenant(tenant)
     try:
         pending_orders = await get_pending_orders()
         now = datetime.now(timezone.utc)
@@ -399,44 +840,301 @@ async def check_pending_orders():
                             description=description,
                             color=discord.Color.yellow()
                         )
-                        await user.send(embed=reminder_embed)
+                        await send_with_retry(
+                            lambda: user.send(embed=reminder_embed),
+                            f"enviar lembrete do pedido {order['id']}",
+                            operation='customer_dm'
+                        )
                         # Aguarda 2 segundos entre cada mensagem
                         await asyncio.sleep(2)
                 except Exception as e:
-                    print(f"Erro ao enviar lembrete para o pedido {order['id']}: {e}")
+                    logger.error(f"Erro ao enviar lembrete para o pedido {order['id']}: {e}")
 
     except Exception as e:
-        print(f"Erro ao verificar pedidos pendentes: {e}")
+        logger.error(f"Erro ao verificar pedidos pendentes: {e}")
+
+@tasks.loop(seconds=5)
+async def replay_write_buffer():
+    """Regrava as mudanças de status adiadas assim que o Firestore volta a responder"""
+    if len(firebase_service.get_write_buffer()):
+        await replay_buffered_writes()
+
+supervisor.add_listener('firestore_orders', start_order_listener)
+supervisor.add_loop('check_pending_orders', check_pending_orders)
+supervisor.add_loop('firestore_write_buffer', replay_write_buffer)
+if LOOP_STALL_THRESHOLD_MS:
+    supervisor.add_service(
+        'loop_stall_detector', 'task', start_stall_detector,
+        is_alive=lambda detector: detector.running,
+        stop=lambda detector: detector.stop()
+    )
+
+def _seconds_since(timestamp):
+    return round(time.time() - timestamp, 1) if timestamp else None
+
+def check_gateway():
+    """Conectado ao gateway do Discord, com a latência do último heartbeat"""
+    latency = bot.latency
+    connected = bot.is_ready() and not bot.is_closed() and math.isfinite(latency)
+    return connected, {'latency_ms': round(latency * 1000, 1) if connected else None}
+
+def check_firestore_listener():
+    """Listener de pedidos ativo; mostra há quanto tempo chegou o último snapshot"""
+    alive = any(name == 'firestore_orders' and live for name, _, live, _ in supervisor.status())
+    return alive, {'last_snapshot_age_s': _seconds_since(firebase_service.last_snapshot_at)}
+
+def check_background_tasks():
+    """Todas as tarefas em segundo plano supervisionadas estão rodando"""
+    tasks_alive = {name: live for name, kind, live, _ in supervisor.status() if kind == 'task'}
+    return all(tasks_alive.values()), {'tasks': tasks_alive}
+
+def check_accepting_work():
+    """Falha durante o desligamento gradual, para o orquestrador não enviar trabalho novo"""
+    return order_tasks.accepting, {'shutting_down': shutdown_task is not None}
+
+health.add_check('gateway', check_gateway)
+health.add_check('firestore_listener', check_firestore_listener)
+health.add_check('background_tasks', check_background_tasks)
+health.add_check('accepting_work', check_accepting_work)
+health.add_detail('queues', lambda: {
+    'in_flight_tasks': len(order_tasks),
+    'scheduled_jobs': len(scheduler),
+    'pending_log_records': pending_log_records(),
+})
+def check_order_partitions():
+    """Processos de partição vivos (sempre ok quando o bot roda em um único processo)"""
+    pool = get_pool()
+    if pool is None:
+        return True, {'processes': 0}
+    return pool.live_count() == pool.count, {
+        'processes': pool.count, 'live': pool.live_count(), 'restarts': pool.restarts, 'pending_calls': pool.pending()
+    }
+
+health.add_check('order_partitions', check_order_partitions)
+health.add_detail('firestore', lambda: {
+    'last_write_age_s': _seconds_since(firebase_service.last_write_at),
+    'circuit': firebase_service.get_breaker().state,
+    'buffered_writes': len(firebase_service.get_write_buffer()),
+})
+
+def resolve_order_id(text):
+    """Converte o número exibido (#xxxxxx) ou o ID completo no ID do pedido
+
+    Returns:
+        Tupla (order_id, mensagem_de_erro); apenas um dos dois é preenchido
+    """
+    order_index = current_tenant().order_index
+    matches = order_index.resolve(text)
+    if len(matches) == 1:
+        return matches[0], None
+    if len(matches) > 1:
+        return None, f"O número #{text.lstrip('#')} corresponde a mais de um pedido. Use o ID completo."
+    # Fora do índice: aceita como ID completo (ex.: antes do listener carregar)
+    if len(text.lstrip('#')) > order_index.suffix_length:
+        return text.lstrip('#'), None
+    return None, f"Pedido {text} não encontrado."
+
+async def change_order_status(order_id, new_status):
+    """Atualiza o status de um pedido e arquiva o canal se ele foi encerrado"""
+    success = await update_order_status(order_id, new_status)
+    if success and new_status in ['completed', 'cancelled']:
+        # Se o pedido foi concluído ou cancelado, arquiva o canal
+        await archive_work_thread(order_id)
+    return success
+
+async def bulk_change_order_status(new_status, order_ids=None, from_statuses=None):
+    """Altera o status de vários pedidos de uma vez
+
+    Os pedidos são lidos em uma única chamada, cada transição é validada e as
+    gravações são feitas em WriteBatch de até 500 operações. Os canais dos
+    pedidos encerrados são arquivados em paralelo, limitados por
+    DISCORD_CLEANUP_CONCURRENCY.
+
+    Args:
+        new_status: Novo status para todos os pedidos
+        order_ids: IDs dos pedidos a alterar
+        from_statuses: Alternativa a order_ids: altera todos os pedidos com esses status
+
+    Returns:
+        Tupla (atualizados, rejeitados), onde rejeitados mapeia order_id -> motivo
+    """
+    if order_ids is not None:
+        orders = await get_orders(order_ids)
+        rejected = {order_id: "não encontrado" for order_id in order_ids if order_id not in orders}
+        orders = list(orders.values())
+    else:
+        orders = await get_orders_by_status(from_statuses)
+        rejected = {}
+
+    updates = []
+    for order in orders:
+        current_status = order.get('status')
+        if new_status not in ALLOWED_STATUS_TRANSITIONS.get(current_status, set()):
+            rejected[order['id']] = f"transição {current_status} → {new_status} não permitida"
+        else:
+            updates.append((order['id'], new_status))
+
+    updated = await update_orders_status(updates)
+    for order_id, _ in updates:
+        if order_id not in updated:
+            rejected[order_id] = "erro ao gravar no Firestore"
+
+    # Arquiva os canais dos pedidos encerrados respeitando o limite de chamadas simultâneas
+    if new_status in ['completed', 'cancelled'] and updated:
+        semaphore = asyncio.Semaphore(DISCORD_CLEANUP_CONCURRENCY)
+
+        async def cleanup(order_id):
+            async with semaphore:
+                await archive_work_thread(order_id)
+
+        await asyncio.gather(*(cleanup(order_id) for order_id in updated))
+
+    return updated, rejected
+
+async def order_autocomplete(interaction, current):
+    """Sugere pedidos pelo sufixo digitado usando o índice em memória"""
+    return [
+        app_commands.Choice(name=f"#{order_id[-6:]} ({order_status or 'sem status'})", value=order_id)
+        for order_id, order_status in current_tenant().order_index.search(current)
+    ]
+
+async def open_order_autocomplete(interaction, current):
+    """Sugere apenas pedidos em andamento"""
+    return [
+        app_commands.Choice(name=f"#{order_id[-6:]} ({order_status})", value=order_id)
+        for order_id, order_status in current_tenant().order_index.search(current, statuses=('payment_confirmed', 'processing'))
+    ]
 
 @bot.command()
-@commands.has_role(DISCORD_ADMIN_ROLE_ID)
+@admin_only()
 async def status(ctx, order_id: str, new_status: str):
-    """Atualiza o status de um pedido"""
+    """Atualiza o status de um pedido (aceita o ID completo ou o número #xxxxxx)"""
     try:
-        valid_statuses = [
-            'pending',
-            'awaiting_payment',
-            'payment_confirmed',
-            'processing',
-            'completed',
-            'cancelled'
-        ]
-        if new_status not in valid_statuses:
-            await ctx.send(f"Status inválido. Use um dos seguintes: {', '.join(valid_statuses)}")
+        if new_status not in VALID_STATUSES:
+            await ctx.send(f"Status inválido. Use um dos seguintes: {', '.join(VALID_STATUSES)}")
+            return
+
+        order_id, error = resolve_order_id(order_id)
+        if error:
+            await ctx.send(error)
             return
 
-        success = await update_order_status(order_id, new_status)
+        success = await change_order_status(order_id, new_status)
         if success:
             await ctx.send(f"Status do pedido #{order_id[-6:]} atualizado para: {new_status}")
-            
-            # Se o pedido foi concluído ou cancelado, exclui o canal
-            if new_status in ['completed', 'cancelled']:
-                await delete_work_thread(order_id)
         else:
             await ctx.send("Erro ao atualizar o status do pedido.")
     except Exception as e:
         await ctx.send(f"Erro: {str(e)}")
 
+@bot.command(name='status_lote')
+@admin_only()
+async def status_lote(ctx, new_status: str, *pedidos: str):
+    """Atualiza o status de vários pedidos de uma vez
+
+    Uso: !status_lote <novo_status> <pedido> [pedido ...]
+    ou:  !status_lote <novo_status> status=<status_atual>[,<status_atual>...]
+    """
+    try:
+        if new_status not in VALID_STATUSES:
+            await ctx.send(f"Status inválido. Use um dos seguintes: {', '.join(VALID_STATUSES)}")
+            return
+        if not pedidos:
+            await ctx.send("Informe os pedidos ou um filtro no formato status=<status_atual>.")
+            return
+
+        if len(pedidos) == 1 and pedidos[0].startswith('status='):
+            from_statuses = [s for s in pedidos[0][len('status='):].split(',') if s]
+            invalid = [s for s in from_statuses if s not in VALID_STATUSES]
+            if invalid or not from_statuses:
+                await ctx.send(f"Filtro inválido. Use um dos seguintes: {', '.join(VALID_STATUSES)}")
+                return
+            updated, rejected = await bulk_change_order_status(new_status, from_statuses=from_statuses)
+        else:
+            order_ids = []
+            rejected = {}
+            for pedido in pedidos:
+                order_id, error = resolve_order_id(pedido)
+                if error:
+                    rejected[pedido] = error
+                else:
+                    order_ids.append(order_id)
+            updated, bulk_rejected = await bulk_change_order_status(new_status, order_ids=order_ids)
+            rejected.update(bulk_rejected)
+
+        lines = [f"✅ {len(updated)} pedido(s) atualizado(s) para: {new_status}"]
+        if rejected:
+            lines.append(f"❌ {len(rejected)} pedido(s) não atualizado(s):")
+            for order_id, reason in list(rejected.items())[:20]:
+                lines.append(f"• #{order_id.lstrip('#')[-6:]}: {reason}")
+            if len(rejected) > 20:
+                lines.append(f"• ... e mais {len(rejected) - 20}")
+        await ctx.send("\n".join(lines))
+    except Exception as e:
+        await ctx.send(f"Erro: {str(e)}")
+
+# Modos aceitos pelo !perfil
+PROFILE_MODE_ALIASES = {'wall': 'wall', 'cpu': 'cpu', 'memoria': 'memory', 'memória': 'memory', 'memory': 'memory'}
+
+@bot.command(name='perfil')
+@admin_only()
+async def perfil(ctx, modo: str = 'wall', segundos: int = 30, top: int = 15):
+    """Captura um perfil do bot em execução e envia o resumo no canal de administração
+
+    Uso: !perfil [wall|cpu|memoria] [segundos] [top]
+    """
+    mode = PROFILE_MODE_ALIASES.get(modo.lower())
+    if mode is None:
+        await ctx.send("Modo inválido. Use: wall, cpu ou memoria.")
+        return
+
+    await ctx.send(f"⏱️ Capturando perfil {modo} por {segundos}s...")
+    try:
+        path, title, lines = await capture_profile(mode, segundos, max(1, min(top, 40)), PROFILE_OUTPUT_DIR)
+    except (ValueError, RuntimeError) as e:
+        await ctx.send(f"❌ {e}")
+        return
+
+    # Mantém a mensagem dentro do limite de 2000 caracteres do Discord
+    header = f"📊 **{title}** - arquivo completo: `{path}`\n"
+    body = "\n".join(lines)
+    while len(header) + len(body) + 8 > 2000 and len(lines) > 1:
+        lines = lines[:-1]
+        body = "\n".join(lines)
+    channel = bot.get_channel(current_tenant().admin_channel_id) or ctx.channel
+    await channel.send(f"{header}```\n{body}\n```")
+
+@bot.tree.command(name="status", description="Atualiza o status de um pedido")
+@app_commands.describe(pedido="Número do pedido (#xxxxxx)", novo_status="Novo status do pedido")
+@app_commands.choices(novo_status=[app_commands.Choice(name=s, value=s) for s in VALID_STATUSES])
+@app_commands.autocomplete(pedido=order_autocomplete)
+@admin_only_slash()
+async def status_slash(interaction, pedido: str, novo_status: app_commands.Choice[str]):
+    """Versão em comando de barra do !status"""
+    order_id, error = resolve_order_id(pedido)
+    if error:
+        await interaction.response.send_message(error, ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    success = await change_order_status(order_id, novo_status.value)
+    if success:
+        await interaction.followup.send(f"Status do pedido #{order_id[-6:]} atualizado para: {novo_status.value}", ephemeral=True)
+    else:
+        await interaction.followup.send("Erro ao atualizar o status do pedido.", ephemeral=True)
+
+@bot.tree.error
+async def on_app_command_error(interaction, error):
+    """Tratamento global de erros dos comandos de barra"""
+    if isinstance(error, app_commands.MissingRole):
+        message = "Você não tem permissão para usar este comando."
+    else:
+        message = f"Erro ao executar o comando: {str(error)}"
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
 @bot.event
 async def on_command_error(ctx, error):
     """Tratamento global de erros de comandos"""
@@ -445,72 +1143,93 @@ async def on_command_error(ctx, error):
     else:
         await ctx.send(f"Erro ao executar o comando: {str(error)}")
 
-# Cleanup ao fechar o bot
-@bot.event
-async def on_close():
-    """Evento disparado quando o bot é fechado"""
-    global firestore_listener
-    if firestore_listener:
-        firestore_listener.unsubscribe()
+def create_error_embed():
+    """Embed de erro das ações sobre pedidos (ex.: status recusado pelo Firestore)"""
+    return discord.Embed(
+        title="❌ Erro",
+        description="Ocorreu um erro ao processar a ação. Por favor, tente novamente.",
+        color=discord.Color.red()
+    )
 
-@bot.event
-async def on_raw_reaction_add(payload):
-    """Manipula reações adicionadas às mensagens"""
-    # Ignora reações do próprio bot
-    if payload.user_id == bot.user.id:
-        return
+async def begin_admin_action(interaction, order_id):
+    """Valida o administrador, confirma o clique e carrega o contexto do pedido
 
-    # Verifica se é uma mensagem de aprovação inicial do pedido
-    if payload.message_id in order_messages:
-        await handle_admin_reaction(payload)
-    # Verifica se é uma mensagem de confirmação de pagamento do cliente
-    elif payload.message_id in payment_confirmation_messages:
-        order, user, admin_message = payment_confirmation_messages[payload.message_id]
-        if payload.user_id == user.id:
-            await handle_payment_reaction(payload)
-    # Verifica se é uma mensagem de verificação de pagamento dos admins
-    elif payload.message_id in payment_verification_messages:
-        await handle_payment_verification(payload)
-    # Verifica se é uma mensagem de decisão do admin
-    elif payload.message_id in admin_decision_messages:
-        await handle_admin_decision(payload)
-    # Verifica se é uma mensagem de trabalho disponível
-    elif payload.message_id in work_messages:
-        await handle_work_reaction(payload)
-    # Verifica se é uma confirmação de conclusão
-    else:
-        await handle_completion_confirmation(payload)
+    Os botões da mensagem são removidos na própria resposta à interação,
+    evitando que a mesma ação seja executada duas vezes.
+    """
+    if not is_admin_member(interaction.user):
+        await interaction.response.send_message("Você não tem permissão para usar este botão.", ephemeral=True)
+        return None, None
 
-async def handle_admin_reaction(payload):
-    """Manipula reações dos administradores nos pedidos"""
-    order, user = order_messages[payload.message_id]
-    
-    # Busca o membro que reagiu
-    guild = bot.get_guild(payload.guild_id)
-    if not guild:
-        return
-    
-    admin = guild.get_member(payload.user_id)
-    if not admin or not discord.utils.get(admin.roles, id=DISCORD_ADMIN_ROLE_ID):
+    await interaction.response.edit_message(view=None)
+
+    order, user = await load_order_context(order_id)
+    if not order:
+        await interaction.followup.send(f"❌ Pedido #{order_id[-6:]} não encontrado.", ephemeral=True)
+    return order, user
+
+async def handle_admin_approval(interaction, action, order_id, item_index):
+    """Manipula os botões de aprovação ou rejeição dos pedidos pelos administradores"""
+    order, user = await begin_admin_action(interaction, order_id)
+    if not order:
         return
+    await apply_admin_decision(action, order, user, interaction.user)
 
-    # Processa a reação
-    if str(payload.emoji) == APPROVE_EMOJI:
+async def apply_admin_decision(action, order, user, admin):
+    """Aprova (envia as instruções de pagamento) ou rejeita um novo pedido"""
+    if action == 'approve':
         if user:
             # Atualiza o status para aguardando pagamento antes de enviar as instruções
-            await update_order_status(order['id'], 'awaiting_payment')
-            await send_payment_instructions(user, order, payload.message_id)
+            if not await update_order_status(order['id'], 'awaiting_payment'):
+                await admin.send(embed=create_error_embed())
+                return
+            log_order_stage(logger, order['id'], 'approved', admin=admin.name)
+            await send_payment_instructions(user, order)
         else:
             await admin.send("❌ Não foi possível enviar as instruções de pagamento pois o usuário não foi encontrado.")
 
-    elif str(payload.emoji) == REJECT_EMOJI:
+    elif action == 'reject':
+        log_order_stage(logger, order['id'], 'rejected', admin=admin.name)
         await handle_order_rejection(order, user, admin)
 
+async def handle_admin_digest(interaction, action, order_ids):
+    """Aprova ou rejeita os pedidos escolhidos em um menu do resumo de novos pedidos
+
+    Os pedidos escolhidos saem dos menus na própria resposta à interação, e
+    cada um só é tratado se ainda estiver pendente (outro admin pode ter
+    respondido antes).
+    """
+    if not is_admin_member(interaction.user):
+        await interaction.response.send_message("Você não tem permissão para usar este menu.", ephemeral=True)
+        return
+    admin = interaction.user
+    label = f"✅ Aprovado por {admin.name}" if action == 'approve' else f"❌ Rejeitado por {admin.name}"
+    embed, view = resolve_digest(interaction.message, order_ids, label)
+    await interaction.response.edit_message(embed=embed, view=view)
+
+    async def decide(order_id):
+        bind_order(order_id)
+        try:
+            order, user = await load_order_context(order_id)
+            if not order:
+                await interaction.followup.send(f"❌ Pedido #{order_id[-6:]} não encontrado.", ephemeral=True)
+                return
+            if order.get('status') != 'pending':
+                await interaction.followup.send(f"ℹ️ O pedido #{order_id[-6:]} já foi tratado.", ephemeral=True)
+                return
+            await apply_admin_decision(action, order, user, admin)
+        except Exception as e:
+            logger.error(f"Erro ao tratar o pedido {order_id} pelo resumo: {e}")
+
+    await asyncio.gather(*(decide(order_id) for order_id in order_ids))
+
 async def handle_order_rejection(order, user, admin):
     """Manipula a rejeição de pedidos pelos administradores"""
     try:
         # Atualiza o status do pedido para cancelled
-        await update_order_status(order['id'], 'cancelled')
+        if not await update_order_status(order['id'], 'cancelled'):
+            await admin.send(embed=create_error_embed())
+            return
         
         # Notifica o cliente se ele existir
         if user:
@@ -525,7 +1244,7 @@ async def handle_order_rejection(order, user, admin):
             await user.send(embed=reject_embed)
         
         # Notifica os administradores
-        admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+        admin_channel = bot.get_channel(current_tenant().admin_channel_id)
         if admin_channel:
             admin_embed = discord.Embed(
                 title="❌ Pedido Rejeitado",
@@ -541,15 +1260,15 @@ async def handle_order_rejection(order, user, admin):
                     inline=True
                 )
             
-            await admin_channel.send(embed=admin_embed)
+            await post_admin_notice(admin_channel, admin_embed)
             
             # Apaga as mensagens relacionadas ao pedido
             await delete_order_messages(order['id'])
             
-            print(f"Pedido {order['id']} rejeitado por {admin.name}")
+            logger.info(f"Pedido {order['id']} rejeitado por {admin.name}")
             
     except Exception as e:
-        print(f"Erro ao processar rejeição do pedido: {e}")
+        logger.error(f"Erro ao processar rejeição do pedido: {e}")
         error_embed = discord.Embed(
             title="❌ Erro ao Rejeitar",
             description="Ocorreu um erro ao processar a rejeição do pedido.",
@@ -557,19 +1276,22 @@ async def handle_order_rejection(order, user, admin):
         )
         await admin.send(embed=error_embed)
 
-async def handle_payment_reaction(payload):
-    """Manipula reações dos clientes nas mensagens de pagamento"""
-    if payload.message_id not in payment_confirmation_messages:
-        return
+async def handle_payment_reaction(interaction, action, order_id, item_index):
+    """Manipula os botões dos clientes nas mensagens de pagamento"""
+    # Remove os botões da DM para evitar confirmações repetidas
+    await interaction.response.edit_message(view=None)
 
-    order, user, admin_message = payment_confirmation_messages[payload.message_id]
-    
-    # Verifica se quem reagiu é o cliente
-    if payload.user_id != user.id:
+    order, user = await load_order_context(order_id)
+    if not order:
+        await interaction.followup.send(f"❌ Pedido #{order_id[-6:]} não encontrado.")
         return
 
-    if str(payload.emoji) == APPROVE_EMOJI:
+    # A mensagem está na DM do cliente, então quem clicou é o próprio cliente
+    user = user or interaction.user
+
+    if action == 'paid':
         # Cliente confirmou o pagamento
+        log_order_stage(logger, order['id'], 'payment_claimed')
         await notify_payment_confirmation(order, user)
         # Não atualiza o status aqui, apenas notifica os admins
         
@@ -581,14 +1303,15 @@ async def handle_payment_reaction(payload):
         )
         await user.send(embed=confirm_embed)
 
-    elif str(payload.emoji) == REJECT_EMOJI:
+    elif action == 'cancel':
         # Cliente solicitou cancelamento
+        log_order_stage(logger, order['id'], 'cancel_requested')
         await handle_payment_cancellation(order, user)
 
 async def notify_payment_confirmation(order, user):
     """Notifica os administradores sobre a confirmação de pagamento do cliente"""
     try:
-        admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+        admin_channel = bot.get_channel(current_tenant().admin_channel_id)
         if not admin_channel:
             return
 
@@ -612,35 +1335,29 @@ async def notify_payment_confirmation(order, user):
         )
 
         # Menciona o cargo de admin
-        guild = bot.get_guild(DISCORD_GUILD_ID)
+        guild = bot.get_guild(current_tenant().guild_id)
         mention_text = ""
         if guild:
-            admin_role = guild.get_role(DISCORD_ADMIN_ROLE_ID)
+            admin_role = guild.get_role(current_tenant().admin_role_id)
             if admin_role:
                 mention_text = admin_role.mention
 
-        # Envia a mensagem e adiciona as reações
-        message = await admin_channel.send(
-            content=mention_text,
-            embed=confirm_embed
+        # Envia a mensagem com os botões de verificação
+        await send_with_retry(
+            lambda: admin_channel.send(content=mention_text, embed=confirm_embed, view=order_view(order['id'], 'verify', 'deny')),
+            "enviar confirmação de pagamento aos administradores",
+            operation='admin_notification'
         )
-        
-        # Adiciona as reações de confirmação
-        await message.add_reaction(APPROVE_EMOJI)  # ✅
-        await message.add_reaction(REJECT_EMOJI)   # ❌
-        
-        # Armazena a mensagem no cache para verificação de pagamento
-        payment_verification_messages[message.id] = (order, user, message)
 
-        print(f"Notificação de pagamento enviada para administradores")
+        logger.info(f"Notificação de pagamento do pedido {order['id']} enviada para administradores")
 
     except Exception as e:
-        print(f"Erro ao notificar confirmação de pagamento: {e}")
+        logger.error(f"Erro ao notificar confirmação de pagamento: {e}")
 
-async def send_admin_decision_request(order, user, original_message):
+async def send_admin_decision_request(order, user):
     """Envia mensagem para o admin decidir se envia para funcionários ou faz o serviço por item"""
     try:
-        admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+        admin_channel = bot.get_channel(current_tenant().admin_channel_id)
         if not admin_channel:
             return
 
@@ -668,7 +1385,11 @@ async def send_admin_decision_request(order, user, original_message):
             )
             
             # Envia o embed principal
-            main_message = await admin_channel.send(embed=main_embed)
+            await send_with_retry(
+                lambda: admin_channel.send(embed=main_embed),
+                "enviar solicitação de decisão aos administradores",
+                operation='admin_notification'
+            )
             
             # Cria um embed para cada item
             for i, item in enumerate(items):
@@ -695,31 +1416,12 @@ async def send_admin_decision_request(order, user, original_message):
                     inline=False
                 )
                 
-                item_embed.add_field(
-                    name="🎯 Opções",
-                    value=(
-                        f"{WORKER_EMOJI} - Enviar para os funcionários\n"
-                        f"{ADMIN_EMOJI} - Realizar o serviço você mesmo"
-                    ),
-                    inline=False
+                # Envia o embed do item com os botões de decisão (o índice do item vai no custom_id)
+                await send_with_retry(
+                    lambda: admin_channel.send(embed=item_embed, view=order_view(order['id'], 'to_workers', 'self_assign', item_index=i)),
+                    f"enviar decisão do item {i + 1} aos administradores",
+                    operation='admin_notification'
                 )
-                
-                # Envia o embed do item e adiciona reações
-                item_message = await admin_channel.send(embed=item_embed)
-                await item_message.add_reaction(WORKER_EMOJI)
-                await item_message.add_reaction(ADMIN_EMOJI)
-                
-                # Armazena no cache com informações do item
-                admin_decision_messages[item_message.id] = {
-                    "order": order,
-                    "user": user,
-                    "original_message": original_message,
-                    "item_index": i,
-                    "item": item
-                }
-                
-                # Aguarda um pouco entre as mensagens
-                await asyncio.sleep(1)
         else:
             # Comportamento original para pedidos com um único item
             decision_embed = discord.Embed(
@@ -750,58 +1452,36 @@ async def send_admin_decision_request(order, user, original_message):
                 inline=True
             )
 
-            decision_embed.add_field(
-                name="🎯 Opções",
-                value=(
-                    f"{WORKER_EMOJI} - Enviar para os funcionários\n"
-                    f"{ADMIN_EMOJI} - Realizar o serviço você mesmo"
-                ),
-                inline=False
+            # Envia a mensagem com os botões de decisão
+            await send_with_retry(
+                lambda: admin_channel.send(embed=decision_embed, view=order_view(order['id'], 'to_workers', 'self_assign', item_index=0)),
+                "enviar solicitação de decisão aos administradores",
+                operation='admin_notification'
             )
 
-            # Envia a mensagem e adiciona as reações
-            message = await admin_channel.send(embed=decision_embed)
-            await message.add_reaction(WORKER_EMOJI)
-            await message.add_reaction(ADMIN_EMOJI)
-
-            # Armazena no cache
-            admin_decision_messages[message.id] = {
-                "order": order,
-                "user": user,
-                "original_message": original_message,
-                "item_index": 0,
-                "item": order.get('items', [])[0] if order.get('items') else None
-            }
-
     except Exception as e:
-        print(f"Erro ao enviar solicitação de decisão: {e}")
+        logger.error(f"Erro ao enviar solicitação de decisão: {e}")
 
-async def handle_admin_decision(payload):
+async def handle_admin_decision(interaction, action, order_id, item_index):
     """Manipula a decisão do admin sobre o destino do pedido ou item específico"""
-    if payload.message_id not in admin_decision_messages:
+    order, user = await begin_admin_action(interaction, order_id)
+    if not order:
         return
 
-    data = admin_decision_messages[payload.message_id]
-    order = data["order"]
-    user = data["user"]
-    original_message = data["original_message"]
-    item_index = data["item_index"]
-    item = data["item"]
-    
-    # Busca o membro que reagiu
-    guild = bot.get_guild(payload.guild_id)
-    if not guild:
-        return
-    
-    admin = guild.get_member(payload.user_id)
-    if not admin or not discord.utils.get(admin.roles, id=DISCORD_ADMIN_ROLE_ID):
+    items = order.get('items', [])
+    if user is None or item_index is None or item_index >= len(items):
+        await interaction.followup.send("❌ Não foi possível identificar o cliente ou o item deste pedido.", ephemeral=True)
         return
 
+    item = items[item_index]
+    admin = interaction.user
+    original_message = interaction.message
     channel = original_message.channel
 
-    if str(payload.emoji) == WORKER_EMOJI:
+    if action == 'to_workers':
         # Admin decidiu enviar para os funcionários
-        await send_work_notification(order, user, item)
+        await send_work_notification(order, user, item, item_index)
+        log_order_stage(logger, order['id'], 'sent_to_workers', item_index=item_index)
         
         # Notifica a decisão
         decision_notification = discord.Embed(
@@ -814,63 +1494,15 @@ async def handle_admin_decision(payload):
         )
         await original_message.reply(embed=decision_notification)
 
-    elif str(payload.emoji) == ADMIN_EMOJI:
+    elif action == 'self_assign':
         # Admin decidiu fazer o serviço
         try:
-            # Atualiza o status do pedido para processing
-            await update_order_status(order['id'], 'processing')
-            
-            # Cria canal privado para o admin e o cliente
-            work_channel = await create_work_thread(order, user, admin, channel, item)
-            
-            if work_channel:
-                # Notifica o cliente
-                client_embed = discord.Embed(
-                    title="🎮 Seu pedido foi iniciado!",
-                    description=(
-                        f"O funcionário {admin.name} foi designado para seu pedido.\n"
-                        f"Um canal privado foi criado para comunicação: {work_channel.mention}"
-                    ),
-                    color=discord.Color.green()
-                )
-                await user.send(embed=client_embed)
-                
-                # Notifica o funcionário por DM
-                worker_embed = discord.Embed(
-                    title="✅ Trabalho Aceito",
-                    description=(
-                        f"Você aceitou o pedido #{order['id'][-6:]}\n"
-                        f"Canal de comunicação: {work_channel.mention}"
-                    ),
-                    color=discord.Color.green()
-                )
-                worker_embed.add_field(
-                    name="📝 Próximos Passos",
-                    value=(
-                        "1. Utilize o canal criado para comunicação com o cliente\n"
-                        "2. Realize o serviço conforme especificado\n"
-                        "3. Confirme a conclusão do trabalho quando finalizar"
-                    ),
-                    inline=False
-                )
-                await admin.send(embed=worker_embed)
-
-                # Avisa que o canal será arquivado
-                await work_channel.send(
-                    embed=discord.Embed(
-                        title="⚠️ Aviso",
-                        description="Este canal será movido para a categoria 'Arquivado' em 5 minutos.",
-                        color=discord.Color.orange()
-                    )
-                )
-
+            if not await start_work(order, user, admin, channel, item, item_index):
+                await interaction.followup.send(embed=create_error_embed(), ephemeral=True)
         except Exception as e:
-            print(f"Erro ao processar decisão do admin: {e}")
+            logger.error(f"Erro ao processar decisão do admin: {e}")
 
-    # Remove a mensagem de decisão do cache
-    del admin_decision_messages[payload.message_id]
-
-async def send_payment_instructions(user, order, admin_message=None):
+async def send_payment_instructions(user, order):
     """Envia instruções de pagamento para o usuário"""
     try:
         payment_embed = discord.Embed(
@@ -957,11 +1589,11 @@ async def send_payment_instructions(user, order, admin_message=None):
         payment_embed.set_footer(text="Pedido aprovado em")
         payment_embed.timestamp = datetime.now(timezone.utc)
 
-        # Cria um segundo embed explicando as reações
-        reactions_embed = discord.Embed(
+        # Cria um segundo embed explicando os botões
+        actions_embed = discord.Embed(
             title="🔄 Ações Disponíveis",
             description=(
-                "Use as reações abaixo para interagir com seu pedido:\n\n"
+                "Use os botões abaixo para interagir com seu pedido:\n\n"
                 f"{APPROVE_EMOJI} **Confirmar Pagamento**\n"
                 "• Clique aqui quando finalizar o pagamento\n"
                 "• Nossa equipe será notificada para verificar\n"
@@ -974,29 +1606,59 @@ async def send_payment_instructions(user, order, admin_message=None):
             color=discord.Color.blue()
         )
         
-        reactions_embed.set_footer(text="Reaja a esta mensagem para prosseguir")
-
-        # Envia as mensagens e adiciona as reações
-        payment_message = await user.send(embeds=[payment_embed, reactions_embed])
-        await payment_message.add_reaction(APPROVE_EMOJI)
-        await payment_message.add_reaction(REJECT_EMOJI)
+        actions_embed.set_footer(text="Clique em um dos botões para prosseguir")
 
-        # Armazena a mensagem no cache de confirmação de pagamento
-        payment_confirmation_messages[payment_message.id] = (order, user, admin_message)
+        # Envia as mensagens com os botões de confirmação
+        await send_with_retry(
+            lambda: user.send(embeds=[payment_embed, actions_embed], view=order_view(order['id'], 'paid', 'cancel')),
+            f"enviar instruções de pagamento para {user.name}",
+            operation='customer_dm'
+        )
 
-        print(f"Instruções de pagamento enviadas para {user.name}")
+        logger.info(f"Instruções de pagamento enviadas para {user.name}")
 
     except Exception as e:
-        print(f"Erro ao enviar instruções de pagamento: {e}")
+        logger.error(f"Erro ao enviar instruções de pagamento: {e}")
+
+def choose_worker(tenant, item):
+    """Funcionário que recebe o item pela distribuição automática da loja, ou None (fica para o primeiro aceite)
 
-async def send_work_notification(order, user, item):
-    """Envia notificação de trabalho disponível para os funcionários"""
+    O trabalho já é registrado na carga do escolhido, então envios simultâneos
+    não escolhem o mesmo funcionário por engano.
+    """
+    engine = tenant.assignment
+    guild = bot.get_guild(tenant.guild_id)
+    if not engine.enabled or guild is None:
+        return None
+    skipped = set()
+    while (profile := engine.choose(item, exclude=skipped)) is not None:
+        member = guild.get_member(profile.user_id)
+        if member is not None:
+            return member
+        # Funcionário cadastrado que saiu do servidor
+        logger.warning(f"Funcionário {profile.name} não encontrado no servidor; ignorado na distribuição")
+        skipped.add(profile.user_id)
+    return None
+
+async def send_work_notification(order, user, item, item_index):
+    """Envia o trabalho aos funcionários: atribuído pela distribuição automática ou com botão de aceite"""
     try:
-        workers_channel = bot.get_channel(DISCORD_WORKERS_CHANNEL_ID)
+        tenant = current_tenant()
+        workers_channel = bot.get_channel(tenant.workers_channel_id)
         if not workers_channel:
-            print(f"Canal dos funcionários não encontrado (ID: {DISCORD_WORKERS_CHANNEL_ID})")
+            logger.info(f"Canal dos funcionários não encontrado (ID: {tenant.workers_channel_id})")
             return
 
+        worker = choose_worker(tenant, item)
+        if worker is not None:
+            tenant.assignment.track(worker.id, order['id'], item_index)
+
+        # Com o quadro, o item entra na mensagem fixada em vez de ganhar uma mensagem própria
+        board = job_board_for(tenant) if JOB_BOARD_ENABLED else None
+        if board is not None:
+            board.add(order['id'], item_index, item, user.name, worker.name if worker is not None else None)
+            schedule_job_board_update(tenant)
+
         # Cria o embed para o trabalho
         work_embed = discord.Embed(
             title="🛠️ Novo Trabalho Disponível!",
@@ -1028,11 +1690,32 @@ async def send_work_notification(order, user, item):
             inline=True
         )
 
+        if worker is not None:
+            # Atribuído automaticamente: o trabalho aparece no canal já com o responsável
+            if board is None:
+                work_embed.add_field(name=ASSIGNED_WORKER_FIELD, value=f"{worker.name}", inline=True)
+                work_embed.color = discord.Color.green()
+                await send_with_retry(
+                    lambda: workers_channel.send(embed=work_embed),
+                    "enviar trabalho atribuído ao canal dos funcionários",
+                    operation='work_post'
+                )
+            WORK_ASSIGNMENTS.inc(tenant=tenant.id, result='assigned')
+            if not await start_work(order, user, worker, workers_channel, item, item_index, assigned=True):
+                tenant.assignment.release(order['id'], item_index)
+            logger.info(f"Trabalho atribuído automaticamente a {worker.name}")
+            return
+
+        if board is not None:
+            WORK_ASSIGNMENTS.inc(tenant=tenant.id, result='posted')
+            logger.info(f"Item {item_index} do pedido {order['id']} adicionado ao quadro do canal dos funcionários")
+            return
+
         # Adiciona instruções para os funcionários
         work_embed.add_field(
             name="📝 Instruções",
             value=(
-                "Reaja com ✅ para aceitar este trabalho.\n"
+                "Clique em ✅ Aceitar Trabalho para aceitar este trabalho.\n"
                 "Ao aceitar, você será responsável por:\n"
                 "1. Entrar em contato com o cliente\n"
                 "2. Realizar o serviço conforme especificado\n"
@@ -1041,118 +1724,207 @@ async def send_work_notification(order, user, item):
             inline=False
         )
 
-        # Envia a mensagem e adiciona a reação
-        message = await workers_channel.send(embed=work_embed)
-        await message.add_reaction(APPROVE_EMOJI)  # ✅
+        # Envia a mensagem com o botão de aceite
+        await send_with_retry(
+            lambda: workers_channel.send(embed=work_embed, view=order_view(order['id'], 'claim', item_index=item_index)),
+            "enviar trabalho ao canal dos funcionários",
+            operation='work_post'
+        )
+        WORK_ASSIGNMENTS.inc(tenant=tenant.id, result='posted')
 
-        # Armazena a mensagem no cache
-        work_messages[message.id] = (order, user, None, item)
-        
-        print(f"Notificação de trabalho enviada para o canal dos funcionários")
+        logger.info(f"Notificação de trabalho do pedido {order['id']} enviada para o canal dos funcionários")
 
     except Exception as e:
-        print(f"Erro ao enviar notificação de trabalho: {e}")
+        logger.error(f"Erro ao enviar notificação de trabalho: {e}")
+
+def job_board_for(tenant):
+    """Quadro de trabalhos da loja (criado no primeiro uso)"""
+    board = job_boards.get(tenant.id)
+    if board is None:
+        board = job_boards[tenant.id] = JobBoard(tenant.workers_channel_id)
+    return board
+
+def schedule_job_board_update(tenant):
+    """Agenda a edição do quadro; mudanças dentro da janela saem em uma única edição"""
+    job_board_edits.schedule(tenant.id, lambda: render_job_board(tenant))
+
+async def render_job_board(tenant):
+    """Edita a mensagem do quadro com o estado atual, criando e fixando a mensagem se preciso"""
+    board = job_boards.get(tenant.id)
+    channel = bot.get_channel(tenant.workers_channel_id)
+    if board is None or channel is None:
+        return
+    embed, view = board.render()
 
-async def handle_work_reaction(payload):
-    """Manipula reações dos funcionários nos trabalhos disponíveis"""
-    if payload.message_id not in work_messages:
+    message = board.message
+    if message is None and board.message_id:
+        try:
+            message = await channel.fetch_message(board.message_id)
+        except discord.NotFound:
+            logger.warning(f"Mensagem do quadro de trabalhos da loja {tenant.id} não encontrada; criando outra")
+    if message is not None:
+        try:
+            await message.edit(embed=embed, view=view)
+            board.message = message
+            return
+        except discord.NotFound:
+            logger.warning(f"Mensagem do quadro de trabalhos da loja {tenant.id} apagada; criando outra")
+
+    message = await channel.send(embed=embed, view=view)
+    board.message, board.message_id = message, message.id
+    try:
+        await message.pin()
+    except discord.HTTPException as e:
+        logger.warning(f"Não foi possível fixar o quadro de trabalhos: {e}")
+
+async def handle_job_board_page(interaction, page):
+    """Troca a página do quadro de trabalhos na própria resposta ao clique"""
+    tenant = current_tenant()
+    board = job_boards.get(tenant.id)
+    if board is None:
+        await interaction.response.send_message("❌ Quadro de trabalhos indisponível.", ephemeral=True)
         return
+    board.set_page(page)
+    embed, view = board.render()
+    # A resposta já mostra o estado atual; uma edição agrupada pendente seria redundante
+    job_board_edits.cancel(tenant.id)
+    await interaction.response.edit_message(embed=embed, view=view)
+
+async def claim_from_job_board(interaction, board, order_id, item_index):
+    """Aceite de um item pelo botão do quadro: marca o item e agenda a edição do quadro"""
+    worker = interaction.user
+    if not board.claim(order_id, item_index, worker.name):
+        await interaction.response.send_message("❌ Este trabalho já foi aceito por outro funcionário.", ephemeral=True)
+        return
+    tenant = current_tenant()
+    schedule_job_board_update(tenant)
+    await interaction.response.send_message(f"✅ Você aceitou o item do pedido #{order_id[-6:]}.", ephemeral=True)
 
-    order, user, current_worker, item = work_messages[payload.message_id]
-    
-    # Busca o membro que reagiu
-    guild = bot.get_guild(payload.guild_id)
-    if not guild:
+    try:
+        order, user = await load_order_context(order_id)
+        items = order.get('items', []) if order else []
+        if not order or not user or item_index is None or item_index >= len(items):
+            await interaction.followup.send("❌ Não foi possível carregar o pedido deste trabalho.", ephemeral=True)
+            return
+        if not await start_work(order, user, worker, interaction.message.channel, items[item_index], item_index):
+            await interaction.followup.send(embed=create_error_embed(), ephemeral=True)
+    except Exception as e:
+        logger.error(f"Erro ao processar aceitação do trabalho: {e}")
+
+async def handle_work_reaction(interaction, action, order_id, item_index):
+    """Manipula o botão de aceite dos funcionários nos trabalhos disponíveis"""
+    worker = interaction.user
+    if worker.bot:
         return
-    
-    worker = guild.get_member(payload.user_id)
-    if not worker or worker.bot:
+
+    message = interaction.message
+    board = job_boards.get(current_tenant().id)
+    if board is not None and message.id == board.message_id:
+        await claim_from_job_board(interaction, board, order_id, item_index)
         return
+    embed = message.embeds[0] if message.embeds else None
 
-    # Verifica se já tem um funcionário designado
-    if current_worker:
-        # Remove a reação se não for o funcionário designado
-        if worker.id != current_worker.id:
-            message = await bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
-            await message.remove_reaction(payload.emoji, worker)
+    # Verifica se já tem um funcionário designado (campo no embed ou aceite em andamento)
+    claim_key = (order_id, item_index)
+    already_assigned = embed and any(field.name == ASSIGNED_WORKER_FIELD for field in embed.fields)
+    if already_assigned or claim_key in claiming_items:
+        await interaction.response.send_message("❌ Este trabalho já foi aceito por outro funcionário.", ephemeral=True)
         return
 
-    if str(payload.emoji) == APPROVE_EMOJI:
-        try:
-            # Atualiza o status do pedido para processing
-            await update_order_status(order['id'], 'processing')
-            
-            # Atualiza o cache com o funcionário designado
-            work_messages[payload.message_id] = (order, user, worker, item)
-            
-            # Atualiza o embed com as informações do funcionário
-            message = await bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
-            embed = message.embeds[0]
-            
-            # Adiciona campo com informações do funcionário
+    claiming_items.add(claim_key)
+    try:
+        # Atualiza o embed com as informações do funcionário e remove o botão
+        # na própria resposta à interação
+        if embed:
             embed.add_field(
-                name="👷 Funcionário Designado",
+                name=ASSIGNED_WORKER_FIELD,
                 value=f"{worker.name}",
                 inline=True
             )
-            
             embed.color = discord.Color.green()
-            await message.edit(embed=embed)
-            
-            # Cria canal privado
-            work_channel = await create_work_thread(order, user, worker, message.channel, item)
-            
-            if work_channel:
-                # Notifica o cliente
-                client_embed = discord.Embed(
-                    title="🎮 Seu pedido foi iniciado!",
-                    description=(
-                        f"O funcionário {worker.name} foi designado para seu pedido.\n"
-                        f"Um canal privado foi criado para comunicação: {work_channel.mention}"
-                    ),
-                    color=discord.Color.green()
-                )
-                await user.send(embed=client_embed)
-                
-                # Notifica o funcionário por DM
-                worker_embed = discord.Embed(
-                    title="✅ Trabalho Aceito",
-                    description=(
-                        f"Você aceitou o pedido #{order['id'][-6:]}\n"
-                        f"Canal de comunicação: {work_channel.mention}"
-                    ),
-                    color=discord.Color.green()
-                )
-                worker_embed.add_field(
-                    name="📝 Próximos Passos",
-                    value=(
-                        "1. Utilize o canal criado para comunicação com o cliente\n"
-                        "2. Realize o serviço conforme especificado\n"
-                        "3. Confirme a conclusão do trabalho quando finalizar"
-                    ),
-                    inline=False
-                )
-                await worker.send(embed=worker_embed)
+        await interaction.response.edit_message(embed=embed, view=None)
 
-                # Avisa que o canal será arquivado
-                await work_channel.send(
-                    embed=discord.Embed(
-                        title="⚠️ Aviso",
-                        description="Este canal será movido para a categoria 'Arquivado' em 5 minutos.",
-                        color=discord.Color.orange()
-                    )
-                )
+        order, user = await load_order_context(order_id)
+        items = order.get('items', []) if order else []
+        if not order or not user or item_index is None or item_index >= len(items):
+            await interaction.followup.send("❌ Não foi possível carregar o pedido deste trabalho.", ephemeral=True)
+            return
 
-        except Exception as e:
-            print(f"Erro ao processar aceitação do trabalho: {e}")
+        if not await start_work(order, user, worker, message.channel, items[item_index], item_index):
+            await interaction.followup.send(embed=create_error_embed(), ephemeral=True)
+
+    except Exception as e:
+        logger.error(f"Erro ao processar aceitação do trabalho: {e}")
+    finally:
+        claiming_items.discard(claim_key)
+
+async def start_work(order, user, worker, channel, item, item_index, assigned=False):
+    """Inicia o trabalho de um item: status processing, canal privado e avisos ao cliente e ao funcionário
+
+    Args:
+        assigned: O trabalho foi atribuído pela distribuição automática (e não aceito pelo funcionário)
+
+    Returns:
+        Canal do trabalho, ou None se o status foi recusado ou o canal não pôde ser criado
+    """
+    # Atualiza o status do pedido para processing
+    if not await update_order_status(order['id'], 'processing'):
+        return None
+    log_order_stage(logger, order['id'], 'assigned', item_index=item_index, worker=worker.name)
+
+    # Cria canal privado
+    work_channel = await create_work_thread(order, user, worker, channel, item, item_index)
+    if not work_channel:
+        return None
 
-async def create_work_thread(order, user, worker, channel, item):
+    # Notifica o cliente
+    client_embed = discord.Embed(
+        title="🎮 Seu pedido foi iniciado!",
+        description=(
+            f"O funcionário {worker.name} foi designado para seu pedido.\n"
+            f"Um canal privado foi criado para comunicação: {work_channel.mention}"
+        ),
+        color=discord.Color.green()
+    )
+    await send_with_retry(lambda: user.send(embed=client_embed), f"enviar DM para {user.name}", operation='customer_dm')
+
+    # Notifica o funcionário por DM
+    worker_embed = discord.Embed(
+        title="📌 Trabalho Atribuído" if assigned else "✅ Trabalho Aceito",
+        description=(
+            f"{'Você foi designado para' if assigned else 'Você aceitou'} o pedido #{order['id'][-6:]}\n"
+            f"Canal de comunicação: {work_channel.mention}"
+        ),
+        color=discord.Color.green()
+    )
+    worker_embed.add_field(
+        name="📝 Próximos Passos",
+        value=(
+            "1. Utilize o canal criado para comunicação com o cliente\n"
+            "2. Realize o serviço conforme especificado\n"
+            "3. Confirme a conclusão do trabalho quando finalizar"
+        ),
+        inline=False
+    )
+    await send_with_retry(lambda: worker.send(embed=worker_embed), f"enviar DM para {worker.name}", operation='worker_dm')
+
+    # Avisa que o canal será arquivado
+    await work_channel.send(
+        embed=discord.Embed(
+            title="⚠️ Aviso",
+            description="Este canal será movido para a categoria 'Arquivado' em 5 minutos.",
+            color=discord.Color.orange()
+        )
+    )
+    return work_channel
+
+async def create_work_thread(order, user, worker, channel, item, item_index=None):
     """Cria um canal privado para comunicação entre cliente e funcionário"""
     try:
         # Busca o servidor
-        guild = bot.get_guild(DISCORD_GUILD_ID)
+        guild = bot.get_guild(current_tenant().guild_id)
         if not guild:
-            print(f"Servidor não encontrado (ID: {DISCORD_GUILD_ID})")
+            logger.info(f"Servidor não encontrado (ID: {current_tenant().guild_id})")
             return None
 
         # Busca ou cria a categoria "Em Andamento"
@@ -1179,8 +1951,9 @@ async def create_work_thread(order, user, worker, channel, item):
             overwrites=overwrites
         )
 
-        # Armazena o canal no cache
+        # Armazena o canal no cache e conta o trabalho na carga do funcionário
         work_threads[order['id']] = work_channel.id
+        current_tenant().assignment.track(worker.id, order['id'], item_index)
 
         # Cria o embed de boas-vindas
         welcome_embed = discord.Embed(
@@ -1238,7 +2011,7 @@ async def create_work_thread(order, user, worker, channel, item):
         actions_embed = discord.Embed(
             title="🎮 Ações Disponíveis",
             description=(
-                "Use as reações abaixo para gerenciar este atendimento:\n\n"
+                "Use os botões abaixo para gerenciar este atendimento:\n\n"
                 f"{APPROVE_EMOJI} **Concluir Atendimento**\n"
                 "• Use quando o serviço estiver finalizado\n"
                 "• Requer confirmação do cliente e funcionário\n\n"
@@ -1264,9 +2037,10 @@ async def create_work_thread(order, user, worker, channel, item):
             embed=welcome_embed
         )
         
-        actions_msg = await work_channel.send(embed=actions_embed)
-        await actions_msg.add_reaction(APPROVE_EMOJI)  # ✅
-        await actions_msg.add_reaction(REJECT_EMOJI)   # ❌
+        actions_msg = await work_channel.send(
+            embed=actions_embed,
+            view=order_view(order['id'], 'done', 'abort', item_index=item_index)
+        )
 
         # Armazena a mensagem de ações no cache
         completion_confirmations[order['id']] = {
@@ -1277,14 +2051,14 @@ async def create_work_thread(order, user, worker, channel, item):
             "channel": work_channel,
             "client_user": user,
             "worker_user": worker,
-            "type": None,  # Será 'complete' ou 'cancel' dependendo da reação
+            "type": None,  # Será 'complete' ou 'cancel' dependendo do botão
             "item": item  # Armazena o item específico
         }
 
         return work_channel
 
     except Exception as e:
-        print(f"Erro ao criar canal de trabalho: {e}")
+        logger.error(f"Erro ao criar canal de trabalho: {e}")
         return None
 
 async def archive_work_thread(order_id):
@@ -1311,30 +2085,28 @@ async def archive_work_thread(order_id):
                 
                 # Remove do cache
                 del work_threads[order_id]
-                print(f"Canal do pedido {order_id[-6:]} movido para Arquivado com sucesso")
+                logger.info(f"Canal do pedido {order_id[-6:]} movido para Arquivado com sucesso")
     except Exception as e:
-        print(f"Erro ao arquivar canal de trabalho: {e}")
-
-async def handle_payment_verification(payload):
-    """Manipula reações dos administradores na confirmação de pagamento"""
-    if payload.message_id not in payment_verification_messages:
-        return
+        logger.error(f"Erro ao arquivar canal de trabalho: {e}")
 
-    order, user, message = payment_verification_messages[payload.message_id]
-    
-    # Busca o membro que reagiu
-    guild = bot.get_guild(payload.guild_id)
-    if not guild:
+async def handle_payment_verification(interaction, action, order_id, item_index):
+    """Manipula os botões dos administradores na confirmação de pagamento"""
+    order, user = await begin_admin_action(interaction, order_id)
+    if not order:
         return
-    
-    admin = guild.get_member(payload.user_id)
-    if not admin or not discord.utils.get(admin.roles, id=DISCORD_ADMIN_ROLE_ID):
+    if not user:
+        await interaction.followup.send("❌ Cliente do pedido não encontrado no Discord.", ephemeral=True)
         return
 
-    # Processa a reação
-    if str(payload.emoji) == APPROVE_EMOJI:
+    admin = interaction.user
+    message = interaction.message
+
+    if action == 'verify':
         # Admin confirmou o pagamento
-        await update_order_status(order['id'], 'payment_confirmed')
+        if not await update_order_status(order['id'], 'payment_confirmed'):
+            await interaction.followup.send(embed=create_error_embed(), ephemeral=True)
+            return
+        log_order_stage(logger, order['id'], 'payment_verified', admin=admin.name)
         
         # Notifica o cliente
         confirm_embed = discord.Embed(
@@ -1353,11 +2125,14 @@ async def handle_payment_verification(payload):
         await message.reply(embed=admin_embed)
 
         # Envia solicitação de decisão para o admin
-        await send_admin_decision_request(order, user, message)
+        await send_admin_decision_request(order, user)
 
-    elif str(payload.emoji) == REJECT_EMOJI:
+    elif action == 'deny':
         # Admin rejeitou o pagamento
-        await update_order_status(order['id'], 'awaiting_payment')
+        if not await update_order_status(order['id'], 'awaiting_payment'):
+            await interaction.followup.send(embed=create_error_embed(), ephemeral=True)
+            return
+        log_order_stage(logger, order['id'], 'payment_denied', admin=admin.name)
         
         # Notifica o cliente
         reject_embed = discord.Embed(
@@ -1375,64 +2150,75 @@ async def handle_payment_verification(payload):
         )
         await message.reply(embed=admin_embed)
 
-@bot.command()
-async def concluir(ctx):
-    """Marca um pedido como concluído no canal privado após confirmação do cliente e funcionário"""
+def find_channel_order_id(channel):
+    """Encontra o ID do pedido associado a um canal privado 'pedido-xxxxxx'"""
+    for oid, thread_id in work_threads.items():
+        if thread_id == channel.id:
+            return oid
+
+    # Após um reinício o cache está vazio: resolve pelo sufixo no nome do canal
+    matches = current_tenant().order_index.resolve(channel.name[len('pedido-'):])
+    return matches[0] if len(matches) == 1 else None
+
+async def start_completion(channel, member, send, order_id=None):
+    """Envia a confirmação de conclusão de um pedido no seu canal privado
+
+    Args:
+        channel: Canal privado do pedido
+        member: Membro que solicitou a conclusão
+        send: Corrotina usada para responder ao membro
+        order_id: ID do pedido; se omitido, é obtido pelo canal
+    """
     try:
         # Verifica se o comando foi usado em um canal privado de pedido
-        channel_name = ctx.channel.name
+        channel_name = getattr(channel, 'name', None) or ''
         if not channel_name.startswith('pedido-'):
+            await send("❌ Use este comando no canal privado do pedido.")
             return
 
         # Encontra o ID do pedido pelo nome do canal
-        order_id = None
-        for oid, thread_id in work_threads.items():
-            if thread_id == ctx.channel.id:
-                order_id = oid
-                break
+        order_id = order_id or find_channel_order_id(channel)
 
         if not order_id:
-            await ctx.send("❌ Não foi possível identificar o pedido associado a este canal.")
+            await send("❌ Não foi possível identificar o pedido associado a este canal.")
             return
 
         # Busca o cliente e o funcionário nos caches
         client = worker = None
-        thread = ctx.channel
+        thread = channel
         
-        # Busca o pedido nos work_messages
-        for msg_id, (order, user, assigned_worker, item) in work_messages.items():
-            if order['id'] == order_id:
-                client = user
-                worker = assigned_worker
-                break
+        # Busca os participantes registrados quando o canal foi criado
+        existing = completion_confirmations.get(order_id)
+        if existing:
+            client = existing["client_user"]
+            worker = existing["worker_user"]
 
         # Se não encontrou no cache, busca nos membros da thread
         if not client or not worker:
             try:
                 thread_members = thread.members  # Lista de membros atual da thread
-                for member in thread_members:
-                    if member.id != bot.user.id:  # Ignora o bot
+                for thread_member in thread_members:
+                    if thread_member.id != bot.user.id:  # Ignora o bot
                         # Verifica se é admin/funcionário
-                        is_admin = discord.utils.get(member.roles, id=DISCORD_ADMIN_ROLE_ID)
+                        is_admin = discord.utils.get(thread_member.roles, id=current_tenant().admin_role_id)
                         if is_admin:
-                            worker = member
+                            worker = thread_member
                         else:
-                            client = member
+                            client = thread_member
             except Exception as e:
-                print(f"Erro ao buscar membros da thread: {e}")
+                logger.error(f"Erro ao buscar membros da thread: {e}")
 
         if not client or not worker:
-            await ctx.send("❌ Não foi possível identificar o cliente e funcionário deste pedido.")
+            await send("❌ Não foi possível identificar o cliente e funcionário deste pedido.")
             return
 
         # Verifica se quem usou o comando é um admin, o funcionário designado ou o cliente
-        member = ctx.author
-        is_admin = discord.utils.get(member.roles, id=DISCORD_ADMIN_ROLE_ID) is not None
+        is_admin = discord.utils.get(member.roles, id=current_tenant().admin_role_id) is not None
         is_worker = member.id == worker.id
         is_client = member.id == client.id
 
         if not (is_admin or is_worker or is_client):
-            await ctx.send("❌ Apenas participantes do pedido podem iniciar a conclusão.")
+            await send("❌ Apenas participantes do pedido podem iniciar a conclusão.")
             return
 
         # Cria o embed de confirmação
@@ -1440,7 +2226,7 @@ async def concluir(ctx):
             title="🎮 Confirmação de Conclusão",
             description=(
                 f"O pedido #{order_id[-6:]} está sendo marcado como concluído.\n"
-                "**Para concluir o pedido, tanto o cliente quanto o funcionário precisam reagir com ✅**"
+                "**Para concluir o pedido, tanto o cliente quanto o funcionário precisam clicar em ✅**"
             ),
             color=discord.Color.blue()
         )
@@ -1457,7 +2243,7 @@ async def concluir(ctx):
         confirm_embed.add_field(
             name="📝 Instruções",
             value=(
-                "• Reaja com ✅ para confirmar a conclusão do serviço\n"
+                "• Clique em ✅ para confirmar a conclusão do serviço\n"
                 "• O pedido será concluído quando ambos confirmarem\n"
                 "• A thread será arquivada 5 minutos após a conclusão"
             ),
@@ -1465,8 +2251,10 @@ async def concluir(ctx):
         )
 
         # Envia a mensagem de confirmação
-        confirm_msg = await ctx.send(embed=confirm_embed)
-        await confirm_msg.add_reaction(APPROVE_EMOJI)
+        confirm_msg = await channel.send(
+            embed=confirm_embed,
+            view=order_view(order_id, 'done')
+        )
 
         # Armazena no cache de confirmações
         completion_confirmations[order_id] = {
@@ -1474,10 +2262,12 @@ async def concluir(ctx):
             "worker_confirmed": False,
             "message_id": confirm_msg.id,
             "message": confirm_msg,
-            "channel": ctx.channel,
+            "channel": channel,
             "client_user": client,
-            "worker_user": worker
+            "worker_user": worker,
+            "type": 'complete'
         }
+        return confirm_msg
 
     except Exception as e:
         error_embed = discord.Embed(
@@ -1485,70 +2275,334 @@ async def concluir(ctx):
             description=f"Ocorreu um erro ao processar o comando: {str(e)}",
             color=discord.Color.red()
         )
-        await ctx.send(embed=error_embed)
-        print(f"Erro ao concluir pedido: {e}")
+        await channel.send(embed=error_embed)
+        logger.error(f"Erro ao concluir pedido: {e}")
 
-async def handle_completion_confirmation(payload):
-    """Manipula as reações de confirmação de conclusão ou cancelamento"""
-    # Verifica se a mensagem é uma confirmação
+@bot.command()
+async def concluir(ctx):
+    """Marca um pedido como concluído no canal privado após confirmação do cliente e funcionário"""
+    # Fora de um canal de pedido (ou de um servidor de loja) o comando é ignorado silenciosamente
+    if not getattr(ctx.channel, 'name', '').startswith('pedido-') or bind_guild_tenant(ctx.guild) is None:
+        return
+    await start_completion(ctx.channel, ctx.author, ctx.send)
+
+@bot.tree.command(name="concluir", description="Solicita a conclusão de um pedido no seu canal privado")
+@app_commands.describe(pedido="Número do pedido (#xxxxxx); por padrão, o pedido deste canal")
+@app_commands.autocomplete(pedido=open_order_autocomplete)
+async def concluir_slash(interaction, pedido: str = None):
+    """Versão em comando de barra do !concluir"""
     order_id = None
-    for oid, data in completion_confirmations.items():
-        if payload.message_id == data["message_id"]:
-            order_id = oid
-            break
+    if pedido:
+        order_id, error = resolve_order_id(pedido)
+        if error:
+            await interaction.response.send_message(error, ephemeral=True)
+            return
+
+    async def reply(content):
+        await interaction.followup.send(content, ephemeral=True)
+
+    await interaction.response.defer(ephemeral=True)
+    confirm_msg = await start_completion(interaction.channel, interaction.user, reply, order_id)
+    if confirm_msg:
+        await reply("✅ Confirmação de conclusão enviada.")
+
+def create_customer_orders_embed(user):
+    """Embed com os pedidos do usuário, montado a partir dos resumos em memória (sem leituras no Firestore)
+
+    Em um servidor de loja mostra só os pedidos dela; na DM, os de todas as lojas.
+    """
+    tenant = current_tenant(default=None)
+    summaries = [
+        (store, summary) for store in ([tenant] if tenant is not None else all_tenants())
+        if (summary := store.customer_summaries.for_user(user))
+    ]
+    if not summaries:
+        return None
 
-    if not order_id:
+    embed = discord.Embed(title="📦 Seus pedidos", color=discord.Color.blue())
+    for store, summary in summaries:
+        open_orders = "\n".join(
+            f"• #{order_id[-6:]} - {status}" for order_id, status in summary.open_orders.items()
+        ) or "Nenhum pedido em aberto"
+        spend = ", ".join(
+            f"{'$' if currency == 'USD' else 'R$'} {total:.2f}"
+            for currency, total in summary.spend.items() if total
+        ) or "-"
+        embed.add_field(
+            name=store.name if len(summaries) > 1 else "Pedidos em aberto",
+            value=(
+                f"{open_orders}\n\n"
+                f"Último pedido: #{summary.last_order_id[-6:]} ({summary.last_status})\n"
+                f"Total de pedidos: {summary.order_count}\n"
+                f"Total gasto: {spend}"
+            ),
+            inline=False
+        )
+    return embed
+
+@bot.command()
+async def pedidos(ctx):
+    """Mostra ao cliente seus pedidos em aberto, o último status e o total gasto"""
+    if ctx.guild is not None and bind_guild_tenant(ctx.guild) is None:
         return
+    embed = create_customer_orders_embed(ctx.author)
+    if embed is None:
+        await ctx.send("Nenhum pedido encontrado para a sua conta.")
+        return
+    await ctx.send(embed=embed)
+
+@bot.tree.command(name="pedidos", description="Mostra seus pedidos em aberto e o total gasto")
+async def pedidos_slash(interaction):
+    """Versão em comando de barra do !pedidos (resposta visível só para o cliente)"""
+    embed = create_customer_orders_embed(interaction.user)
+    if embed is None:
+        await interaction.response.send_message("Nenhum pedido encontrado para a sua conta.", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    data = completion_confirmations[order_id]
-    
-    # Verifica se é uma reação válida
-    if str(payload.emoji) not in [APPROVE_EMOJI, REJECT_EMOJI]:
+async def set_worker_availability(ctx, available):
+    """Altera a disponibilidade do funcionário que usou o comando na distribuição automática"""
+    if bind_guild_tenant(ctx.guild) is None:
         return
+    if not current_tenant().assignment.set_available(ctx.author.id, available):
+        await ctx.send("Você não está cadastrado na distribuição automática de trabalhos.")
+        return
+    if available:
+        await ctx.send(f"✅ {ctx.author.name}, você voltará a receber trabalhos automaticamente.")
+    else:
+        await ctx.send(f"⏸️ {ctx.author.name}, você não receberá novos trabalhos até usar !disponivel.")
 
-    # Identifica se é o cliente ou funcionário
-    is_client = payload.user_id == data["client_user"].id
-    is_worker = payload.user_id == data["worker_user"].id
-    
-    if not (is_client or is_worker):
+@bot.command()
+async def disponivel(ctx):
+    """Volta a receber trabalhos da distribuição automática"""
+    await set_worker_availability(ctx, True)
+
+@bot.command()
+async def ausente(ctx):
+    """Para de receber novos trabalhos da distribuição automática"""
+    await set_worker_availability(ctx, False)
+
+@bot.command()
+@admin_only()
+async def carga(ctx):
+    """Mostra a política de distribuição e os trabalhos em aberto de cada funcionário"""
+    engine = current_tenant().assignment
+    if not engine.workers:
+        await ctx.send(f"Distribuição: {engine.policy}. Nenhum funcionário cadastrado.")
         return
+    lines = [
+        f"• {worker.name}: {engine.load(user_id)} em aberto"
+        f"{f' / {worker.max_open}' if worker.max_open else ''}"
+        f"{'' if worker.available else ' (ausente)'}"
+        for user_id, worker in sorted(engine.workers.items(), key=lambda entry: entry[1].name.lower())
+    ]
+    await ctx.send(f"Distribuição: **{engine.policy}**\n" + "\n".join(lines))
+
+# Moedas sempre consultadas no relatório de vendas (além das vistas pelo rollup)
+REPORT_CURRENCIES = ('BRL', 'USD')
+
+def format_duration(seconds):
+    """Duração legível (ex.: 2d 3h, 4h 12min, 35min)"""
+    minutes = int(seconds // 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}min"
+    return f"{minutes}min"
+
+async def build_sales_report(start, end):
+    """Relatório de vendas da loja atual: agregações no Firestore e categorias do rollup em memória
+
+    Se as consultas de agregação falharem (ex.: índice ausente), o relatório
+    inteiro vem do rollup mantido pelo listener.
+    """
+    tenant = current_tenant()
+    rollup = tenant.sales.report(start, end)
+    currencies = sorted(set(REPORT_CURRENCIES) | set(tenant.sales.currencies()))
+    report = await get_sales_report(start, end, VALID_STATUSES, currencies)
+    if report is None:
+        report = rollup
+    else:
+        report.categories = rollup.categories
+    SALES_REPORTS.inc(tenant=tenant.id, source=report.source)
+    return report
 
-    # Define o tipo de ação se ainda não foi definido
-    if data["type"] is None:
-        data["type"] = 'complete' if str(payload.emoji) == APPROVE_EMOJI else 'cancel'
-    elif data["type"] == 'complete' and str(payload.emoji) == REJECT_EMOJI:
-        return  # Ignora reação de cancelamento se já está em modo de conclusão
-    elif data["type"] == 'cancel' and str(payload.emoji) == APPROVE_EMOJI:
-        return  # Ignora reação de conclusão se já está em modo de cancelamento
+def create_sales_report_embed(report):
+    """Embed do relatório de vendas: receita por moeda, pedidos por status e categoria e tempo médio de conclusão"""
+    last_day = report.end - timedelta(days=1)
+    embed = discord.Embed(
+        title="📊 Relatório de Vendas",
+        description=f"{report.start:%d/%m/%Y} a {last_day:%d/%m/%Y} (UTC) · {report.orders} pedidos",
+        color=discord.Color.blue()
+    )
+    revenue = "\n".join(
+        f"• {'$' if currency == 'USD' else 'R$'} {total:.2f} ({report.paid_orders.get(currency, 0)} pedidos)"
+        for currency, total in sorted(report.revenue.items())
+    ) or "Nenhum pedido pago"
+    embed.add_field(name="Receita (pedidos pagos)", value=revenue, inline=False)
+    statuses = "\n".join(
+        f"• {status}: {report.statuses[status]}" for status in VALID_STATUSES if report.statuses.get(status)
+    ) or "-"
+    embed.add_field(name="Pedidos por status", value=statuses, inline=True)
+    categories = "\n".join(
+        f"• {category}: {count}" for category, count in sorted(report.categories.items())
+    ) or "-"
+    embed.add_field(name="Pedidos por categoria", value=categories, inline=True)
+    average = report.avg_completion_seconds
+    embed.add_field(
+        name="Tempo médio até a conclusão",
+        value=format_duration(average) if average is not None else "-",
+        inline=False
+    )
+    source = "agregações do Firestore" if report.source == 'aggregation' else "totais em memória"
+    embed.set_footer(text=f"Fonte: {source}")
+    return embed
 
-    # Atualiza o status de confirmação
-    if is_client:
-        data["client_confirmed"] = True
-    elif is_worker:
-        data["worker_confirmed"] = True
+@bot.command()
+@admin_only()
+async def relatorio(ctx, *args):
+    """Relatório de vendas do período: !relatorio [dias] ou !relatorio DD/MM/AAAA [DD/MM/AAAA]"""
+    try:
+        start, end = parse_report_range(args)
+    except ValueError as e:
+        await ctx.send(str(e))
+        return
+    async with ctx.typing():
+        report = await build_sales_report(start, end)
+    await ctx.send(embed=create_sales_report_embed(report))
+
+# Rodapé do embed de ações indicando o tipo de solicitação em andamento
+COMPLETION_TYPE_LABELS = {'complete': "conclusão", 'cancel': "cancelamento"}
+COMPLETION_TYPE_FOOTERS = {t: f"Solicitação em andamento: {label}" for t, label in COMPLETION_TYPE_LABELS.items()}
+
+async def rebuild_completion_state(order_id, message):
+    """Reconstrói o estado de confirmação a partir do embed da mensagem (ex.: após reinício do bot)
+
+    O primeiro campo do embed lista cliente e funcionário com ✅/❌ e o rodapé
+    indica o tipo de solicitação em andamento.
+    """
+    if not message.embeds or not message.embeds[0].fields:
+        return None
+
+    embed = message.embeds[0]
+    lines = embed.fields[0].value.split('\n')
+    if len(lines) < 2:
+        return None
+
+    participants = []
+    for line in lines[:2]:
+        match = re.search(r'<@!?(\d+)>', line)
+        if not match:
+            return None
+        user_id = int(match.group(1))
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        participants.append((user, line.rstrip().endswith('✅')))
+
+    (client, client_confirmed), (worker, worker_confirmed) = participants
+    footer = embed.footer.text if embed.footer else None
+    completion_type = next((t for t, text in COMPLETION_TYPE_FOOTERS.items() if text == footer), None)
+
+    return {
+        "client_confirmed": client_confirmed,
+        "worker_confirmed": worker_confirmed,
+        "message_id": message.id,
+        "message": message,
+        "channel": message.channel,
+        "client_user": client,
+        "worker_user": worker,
+        "type": completion_type
+    }
 
-    # Atualiza o embed com as confirmações
-    embed = data["message"].embeds[0]
+def render_completion_status(embed, data):
+    """Preenche no embed de ações as confirmações de cliente e funcionário e a solicitação em andamento"""
     status_field = embed.fields[0]
     new_value = (
         f"**Cliente:** {data['client_user'].mention} - {'✅' if data['client_confirmed'] else '❌'}\n"
         f"**Funcionário:** {data['worker_user'].mention} - {'✅' if data['worker_confirmed'] else '❌'}"
     )
     embed.set_field_at(0, name=status_field.name, value=new_value, inline=False)
-    await data["message"].edit(embed=embed)
+    embed.set_footer(text=COMPLETION_TYPE_FOOTERS[data["type"]])
+    return embed
+
+async def handle_completion_confirmation(interaction, action, order_id, item_index):
+    """Manipula os botões de confirmação de conclusão ou cancelamento"""
+    # Usa o estado em memória quando disponível, senão reconstrói pelo embed
+    data = completion_confirmations.get(order_id)
+    if not data or data["message_id"] != interaction.message.id:
+        data = await rebuild_completion_state(order_id, interaction.message)
+        if not data:
+            await interaction.response.send_message("❌ Não foi possível identificar os participantes deste pedido.", ephemeral=True)
+            return
+        completion_confirmations[order_id] = data
+
+    # Identifica se é o cliente ou funcionário
+    is_client = interaction.user.id == data["client_user"].id
+    is_worker = interaction.user.id == data["worker_user"].id
+    
+    if not (is_client or is_worker):
+        await interaction.response.send_message("❌ Apenas o cliente e o funcionário do pedido podem confirmar.", ephemeral=True)
+        return
+
+    # Define o tipo de ação se ainda não foi definido
+    requested_type = 'complete' if action == 'done' else 'cancel'
+    if data["type"] is None:
+        data["type"] = requested_type
+    elif data["type"] != requested_type:
+        # Ignora o botão oposto enquanto houver outra solicitação em andamento
+        await interaction.response.send_message(
+            f"⚠️ Já existe uma solicitação de {COMPLETION_TYPE_LABELS[data['type']]} em andamento para este pedido.",
+            ephemeral=True
+        )
+        return
+
+    # Clique repetido de quem já confirmou: nada muda no embed, então não há edição
+    confirmed_key = "client_confirmed" if is_client else "worker_confirmed"
+    if data[confirmed_key]:
+        await interaction.response.send_message(
+            f"ℹ️ Você já confirmou a {COMPLETION_TYPE_LABELS[data['type']]}. Aguardando a outra parte.",
+            ephemeral=True
+        )
+        return
+
+    # Atualiza o status de confirmação
+    data[confirmed_key] = True
+
+    message = interaction.message
 
     # Verifica se ambos confirmaram
-    if data["client_confirmed"] and data["worker_confirmed"]:
+    if not (data["client_confirmed"] and data["worker_confirmed"]):
+        # Estado intermediário: vai na própria resposta ao clique, que não conta no limite de edições do canal
+        try:
+            await interaction.response.edit_message(embed=render_completion_status(message.embeds[0], data))
+        except discord.NotFound:
+            # Interação expirada (ex.: estado reconstruído devagar): edita pelo canal, agrupando com os próximos cliques
+            completion_edits.schedule(
+                message.id,
+                lambda: message.edit(embed=render_completion_status(message.embeds[0], data))
+            )
+    else:
+        # Estado final: o clique é confirmado sem editar a mensagem e, depois de gravar o status,
+        # uma única edição imediata substitui qualquer edição pendente da mensagem
+        await interaction.response.defer()
+        embed = render_completion_status(message.embeds[0], data)
         try:
             if data["type"] == 'complete':
                 # Atualiza o status do pedido para completed
-                await update_order_status(order_id, 'completed')
+                if not await update_order_status(order_id, 'completed'):
+                    # Libera o clique de quem finalizou para que possa tentar de novo
+                    data[confirmed_key] = False
+                    await data["channel"].send(embed=create_error_embed())
+                    return
+                log_order_stage(logger, order_id, 'completed')
                 
                 # Atualiza o embed para mostrar conclusão
                 embed.color = discord.Color.green()
                 embed.title = "🎉 Pedido Concluído!"
                 embed.description = "O pedido foi concluído com sucesso! Cliente e funcionário confirmaram a conclusão."
-                await data["message"].edit(embed=embed)
+                embed.remove_footer()
+                await completion_edits.flush(message.id, lambda: message.edit(embed=embed, view=None))
 
                 # Notifica o cliente
                 await data["client_user"].send(
@@ -1579,13 +2633,19 @@ async def handle_completion_confirmation(payload):
 
             else:  # cancelamento
                 # Atualiza o status do pedido para cancelled
-                await update_order_status(order_id, 'cancelled')
+                if not await update_order_status(order_id, 'cancelled'):
+                    # Libera o clique de quem finalizou para que possa tentar de novo
+                    data[confirmed_key] = False
+                    await data["channel"].send(embed=create_error_embed())
+                    return
+                log_order_stage(logger, order_id, 'cancelled')
                 
                 # Atualiza o embed para mostrar cancelamento
                 embed.color = discord.Color.red()
                 embed.title = "❌ Pedido Cancelado"
                 embed.description = "O pedido foi cancelado por acordo mútuo entre cliente e funcionário."
-                await data["message"].edit(embed=embed)
+                embed.remove_footer()
+                await completion_edits.flush(message.id, lambda: message.edit(embed=embed, view=None))
 
                 # Notifica o cliente
                 await data["client_user"].send(
@@ -1609,11 +2669,12 @@ async def handle_completion_confirmation(payload):
                 await delete_order_messages(order_id)
 
             # Notifica no canal de admins
-            admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+            admin_channel = bot.get_channel(current_tenant().admin_channel_id)
             if admin_channel:
                 status_text = "concluído" if data["type"] == 'complete' else "cancelado"
-                await admin_channel.send(
-                    embed=discord.Embed(
+                await post_admin_notice(
+                    admin_channel,
+                    discord.Embed(
                         title=f"{'✅' if data['type'] == 'complete' else '❌'} Pedido {status_text.title()}",
                         description=(
                             f"O pedido #{order_id[-6:]} foi {status_text}.\n"
@@ -1635,29 +2696,23 @@ async def handle_completion_confirmation(payload):
             # Remove do cache de confirmações
             del completion_confirmations[order_id]
 
-            # Agenda o arquivamento da thread
-            await asyncio.sleep(300)  # 5 minutos
-            await archive_work_thread(order_id)
+            # Agenda o arquivamento da thread (salvo no desligamento e retomado no próximo início)
+            scheduler.schedule('archive_work_thread', ARCHIVE_DELAY_SECONDS, job_id=f"archive:{order_id}", order_id=order_id)
 
         except Exception as e:
-            print(f"Erro ao finalizar pedido: {e}")
-            await data["channel"].send(
-                embed=discord.Embed(
-                    title="❌ Erro",
-                    description="Ocorreu um erro ao processar a ação. Por favor, tente novamente.",
-                    color=discord.Color.red()
-                )
-            )
+            logger.error(f"Erro ao finalizar pedido: {e}")
+            await data["channel"].send(embed=create_error_embed())
 
 async def delete_order_messages(order_id):
     """Apaga todas as mensagens relacionadas ao pedido"""
     try:
         # Apaga mensagem do canal de admin
-        admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+        admin_channel = bot.get_channel(current_tenant().admin_channel_id)
         if admin_channel:
-            # Procura e apaga mensagens relacionadas ao pedido no canal de admin
+            # Procura e apaga mensagens relacionadas ao pedido no canal de admin (os avisos do feed ficam como histórico)
+            feed = admin_feeds.get(current_tenant().id)
             async for message in admin_channel.history(limit=100):
-                if message.embeds:
+                if message.embeds and (feed is None or not feed.owns(message)):
                     for embed in message.embeds:
                         # Verifica se o ID do pedido está no título ou descrição
                         if f"#{order_id[-6:]}" in (embed.title or '') or f"#{order_id[-6:]}" in (embed.description or ''):
@@ -1665,11 +2720,12 @@ async def delete_order_messages(order_id):
                             await asyncio.sleep(0.5)  # Pequeno delay para evitar rate limits
 
         # Apaga mensagem do canal de funcionários
-        workers_channel = bot.get_channel(DISCORD_WORKERS_CHANNEL_ID)
+        workers_channel = bot.get_channel(current_tenant().workers_channel_id)
         if workers_channel:
-            # Procura e apaga mensagens relacionadas ao pedido no canal de funcionários
+            # Procura e apaga mensagens relacionadas ao pedido no canal de funcionários (nunca o quadro)
+            board = job_boards.get(current_tenant().id)
             async for message in workers_channel.history(limit=100):
-                if message.embeds:
+                if message.embeds and (board is None or message.id != board.message_id):
                     for embed in message.embeds:
                         # Verifica se o ID do pedido está no título ou descrição
                         if f"#{order_id[-6:]}" in (embed.title or '') or f"#{order_id[-6:]}" in (embed.description or ''):
@@ -1677,13 +2733,15 @@ async def delete_order_messages(order_id):
                             await asyncio.sleep(0.5)  # Pequeno delay para evitar rate limits
 
     except Exception as e:
-        print(f"Erro ao apagar mensagens do pedido {order_id}: {e}")
+        logger.error(f"Erro ao apagar mensagens do pedido {order_id}: {e}")
 
 async def handle_payment_cancellation(order, user):
     """Manipula o cancelamento de pedido solicitado pelo cliente"""
     try:
         # Atualiza o status do pedido para cancelled
-        await update_order_status(order['id'], 'cancelled')
+        if not await update_order_status(order['id'], 'cancelled'):
+            await user.send(embed=create_error_embed())
+            return
         
         # Notifica o cliente
         cancel_embed = discord.Embed(
@@ -1694,7 +2752,7 @@ async def handle_payment_cancellation(order, user):
         await user.send(embed=cancel_embed)
         
         # Notifica os administradores
-        admin_channel = bot.get_channel(DISCORD_ADMIN_CHANNEL_ID)
+        admin_channel = bot.get_channel(current_tenant().admin_channel_id)
         if admin_channel:
             admin_embed = discord.Embed(
                 title="❌ Pedido Cancelado pelo Cliente",
@@ -1710,25 +2768,22 @@ async def handle_payment_cancellation(order, user):
             )
             
             # Menciona o cargo de admin
-            guild = bot.get_guild(DISCORD_GUILD_ID)
+            guild = bot.get_guild(current_tenant().guild_id)
             mention_text = ""
             if guild:
-                admin_role = guild.get_role(DISCORD_ADMIN_ROLE_ID)
+                admin_role = guild.get_role(current_tenant().admin_role_id)
                 if admin_role:
                     mention_text = admin_role.mention
             
-            await admin_channel.send(
-                content=mention_text,
-                embed=admin_embed
-            )
+            await post_admin_notice(admin_channel, admin_embed, mention_text)
             
             # Apaga as mensagens relacionadas ao pedido
             await delete_order_messages(order['id'])
             
-            print(f"Pedido {order['id']} cancelado pelo cliente")
+            logger.info(f"Pedido {order['id']} cancelado pelo cliente")
             
     except Exception as e:
-        print(f"Erro ao processar cancelamento do pedido: {e}")
+        logger.error(f"Erro ao processar cancelamento do pedido: {e}")
         # Notifica o cliente sobre o erro
         error_embed = discord.Embed(
             title="❌ Erro ao Cancelar",
@@ -1737,5 +2792,113 @@ async def handle_payment_cancellation(order, user):
         )
         await user.send(embed=error_embed)
 
-# Inicia o bot
-bot.run(DISCORD_BOT_TOKEN) 
\ No newline at end of file
+# Registra os handlers dos botões persistentes
+register_handler(handle_admin_approval, 'approve', 'reject')
+register_handler(handle_payment_reaction, 'paid', 'cancel')
+register_handler(handle_payment_verification, 'verify', 'deny')
+register_handler(handle_admin_decision, 'to_workers', 'self_assign')
+register_handler(handle_work_reaction, 'claim')
+register_handler(handle_completion_confirmation, 'done', 'abort')
+register_board_page_handler(handle_job_board_page)
+register_digest_handler(handle_admin_digest)
+register_tenant_resolver(find_order_tenant)
+
+# Registra as ações que podem ser agendadas
+scheduler.register('archive_work_thread', archive_work_thread)
+
+async def graceful_shutdown(timeout=SHUTDOWN_TIMEOUT_SECONDS):
+    """Desliga o bot sem perder trabalho, dentro do prazo `timeout`
+
+    1. Para a entrada: encerra o listener e as tarefas periódicas e recusa novos cliques
+    2. Aguarda os pedidos e cliques em andamento, incluindo suas gravações no Firestore
+    3. Salva o watermark, os pedidos processados recentes, os jobs agendados e os canais
+    4. Fecha a conexão com o Discord
+    """
+    started_at = time.monotonic()
+    logger.info(f"Desligamento iniciado ({len(order_tasks)} tarefas em andamento, prazo {timeout}s)")
+
+    order_tasks.accepting = False
+    watermark = datetime.now(timezone.utc) - PROCESSED_ORDERS_OVERLAP
+    supervisor.stop_all()
+    scheduler.stop()
+    # Edições e avisos agrupados pendentes saem agora e entram no drain abaixo
+    job_board_edits.flush_all()
+    completion_edits.flush_all()
+    for feed in admin_feeds.values():
+        feed.flush_all()
+    admin_digest_posts.flush_all()
+
+    completed, cancelled = await order_tasks.drain(max(0.0, timeout - SHUTDOWN_STATE_RESERVE_SECONDS))
+    if cancelled:
+        logger.warning(f"{cancelled} tarefas canceladas ao atingir o prazo de desligamento")
+    logger.info(f"{completed} tarefas concluídas durante o desligamento")
+
+    state = {
+        'watermark': watermark,
+        'processed_orders': [
+            order_id for order_id, created_at in processed_orders.items()
+            if created_at and created_at >= watermark
+        ],
+        'scheduled_jobs': scheduler.pending(),
+        'work_threads': dict(work_threads),
+        'assignments': {tenant.id: tenant.assignment.snapshot() for tenant in all_tenants()},
+        'job_boards': {tenant_id: board.snapshot() for tenant_id, board in job_boards.items()},
+        'saved_at': datetime.now(timezone.utc),
+    }
+    try:
+        remaining = max(1.0, timeout - (time.monotonic() - started_at))
+        if await asyncio.wait_for(save_bot_state(state), remaining):
+            logger.info(f"Estado salvo: {len(state['scheduled_jobs'])} jobs agendados, {len(state['work_threads'])} canais")
+    except asyncio.TimeoutError:
+        logger.error("Tempo esgotado ao salvar o estado do bot")
+
+    buffered = len(firebase_service.get_write_buffer())
+    if buffered:
+        logger.warning(f"{buffered} gravações adiadas continuam na fila e serão regravadas no próximo início")
+
+    # Os processos de partição só param depois que as gravações dos pedidos terminaram
+    await asyncio.to_thread(stop_pool, SHUTDOWN_STATE_RESERVE_SECONDS)
+    await bot.close()
+    logger.info(f"Desligamento concluído em {time.monotonic() - started_at:.1f}s")
+
+def request_shutdown():
+    """Inicia o desligamento gradual (uma única vez)"""
+    global shutdown_task
+    if shutdown_task is None:
+        shutdown_task = asyncio.get_running_loop().create_task(graceful_shutdown())
+    return shutdown_task
+
+async def run_bot():
+    """Conecta o bot e desliga de forma gradual ao receber SIGTERM ou SIGINT"""
+    loop = asyncio.get_running_loop()
+    health.set_event_loop(loop)
+    # Processos que dividem o acesso ao Firestore dos pedidos, cada um com seus logs
+    start_pool(ORDER_WORKER_PROCESSES, initializer=setup_logging, initargs=(LOG_LEVEL,))
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signal_number, request_shutdown)
+        except NotImplementedError:
+            pass  # Windows: o event loop não trata sinais
+
+    async with bot:
+        await bot.start(DISCORD_BOT_TOKEN)
+    if shutdown_task is not None:
+        await shutdown_task
+
+def main():
+    """Configura logs, métricas e gravação de traces e inicia o bot"""
+    # Logs estruturados em JSON, escritos por uma thread em segundo plano
+    setup_logging(LOG_LEVEL)
+
+    # Exporta as métricas localmente, se configurado
+    start_metrics_server(METRICS_PORT, METRICS_HOST)
+
+    # Grava um trace anonimizado do tráfego para reprodução nos benchmarks
+    if TRACE_RECORD_PATH:
+        start_recording(TRACE_RECORD_PATH, [tenant.admin_role_id for tenant in all_tenants()])
+
+    # Inicia o bot; sem bot.run(), os logs do discord.py seguem na mesma fila
+    asyncio.run(run_bot())
+
+if __name__ == '__main__':
+    main() 
\ No newline at end of file
@@ -0,0 +1,311 @@
+"""Exportação dos pedidos para a contabilidade em CSV.gz ou Parquet
+
+Percorre a coleção de pedidos em páginas (cursor no último documento) e grava
+uma linha por item, em arquivos de até --rows-per-file linhas, mantendo em
+memória apenas uma página e, no Parquet, um grupo de linhas. Por padrão
+exporta só os pedidos criados depois da última exportação; --full exporta
+todos.
+
+Uso (a partir da pasta bot/):
+    python export.py --output exports --format csv
+    python export.py --output exports --format parquet --full
+"""
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+import tenants
+from analytics import COMPLETION_FIELD
+from firebase_service import FIRESTORE_PAGE_SIZE, iter_order_pages
+
+logger = logging.getLogger(__name__)
+
+# Linhas por arquivo exportado (um novo arquivo é aberto ao atingir o limite)
+ROWS_PER_FILE = 100_000
+
+# Linhas acumuladas por grupo de linhas do Parquet
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+# Colunas exportadas e seus tipos: um pedido sem itens gera uma linha com os campos do item vazios
+COLUMNS = (
+    ('order_id', 'string'),
+    ('created_at', 'timestamp'),
+    ('updated_at', 'timestamp'),
+    ('status', 'string'),
+    ('currency', 'string'),
+    ('order_total', 'float'),
+    ('payment_method', 'string'),
+    ('discord_username', 'string'),
+    ('user_email', 'string'),
+    ('completion_seconds', 'float'),
+    ('item_index', 'int'),
+    ('item_id', 'string'),
+    ('item_name', 'string'),
+    ('category', 'string'),
+    ('quantity', 'int'),
+    ('price', 'float'),
+    ('selected_job', 'string'),
+    ('start_level', 'int'),
+    ('end_level', 'int'),
+    ('gil_amount', 'float'),
+)
+
+def _coerce(kind, value):
+    """Converte o valor para o tipo da coluna; valores ausentes ou inválidos viram None"""
+    if value is None or value == '':
+        return None
+    try:
+        if kind == 'int':
+            return int(value)
+        if kind == 'float':
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    if kind == 'string':
+        return str(value)
+    return value
+
+def flatten_order(order):
+    """Linhas exportadas de um pedido: uma por item, com os campos do pedido repetidos"""
+    base = {
+        'order_id': order['id'],
+        'created_at': order.get('createdAt'),
+        'updated_at': order.get('updatedAt'),
+        'status': order.get('status'),
+        'currency': order.get('currency'),
+        'order_total': order.get('total'),
+        'payment_method': (order.get('payment') or {}).get('method'),
+        'discord_username': order.get('discordUsername'),
+        'user_email': order.get('userEmail'),
+        'completion_seconds': order.get(COMPLETION_FIELD),
+    }
+    items = order.get('items') or [{}]
+    for index, item in enumerate(items):
+        row = dict(base)
+        row.update({
+            'item_index': index if item else None,
+            'item_id': item.get('id'),
+            'item_name': item.get('name'),
+            'category': item.get('category'),
+            'quantity': item.get('quantity'),
+            'price': item.get('price'),
+            'selected_job': item.get('selectedJob'),
+            'start_level': item.get('startLevel'),
+            'end_level': item.get('endLevel'),
+            'gil_amount': item.get('gilAmount'),
+        })
+        yield {name: _coerce(kind, row[name]) for name, kind in COLUMNS}
+
+class CsvGzWriter:
+    """Arquivo CSV compactado com gzip, gravado linha a linha"""
+    extension = '.csv.gz'
+
+    def __init__(self, path):
+        self._file = gzip.open(path, 'wt', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in COLUMNS])
+
+    def write(self, rows):
+        for row in rows:
+            self._writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else ('' if value is None else value)
+                for value in (row[name] for name, _ in COLUMNS)
+            ])
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """Arquivo Parquet (requer pyarrow), gravado em grupos de até PARQUET_ROW_GROUP_SIZE linhas"""
+    extension = '.parquet'
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("A exportação em Parquet requer o pacote pyarrow (pip install pyarrow)") from None
+        self._pa = pyarrow
+        types = {
+            'string': pyarrow.string(),
+            'timestamp': pyarrow.timestamp('us', tz='UTC'),
+            'float': pyarrow.float64(),
+            'int': pyarrow.int64(),
+        }
+        self._schema = pyarrow.schema([(name, types[kind]) for name, kind in COLUMNS])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression='zstd')
+        self._rows = []
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def write(self, rows):
+        for row in rows:
+            self._rows.append(row)
+            if len(self._rows) >= PARQUET_ROW_GROUP_SIZE:
+                self._flush()
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+WRITERS = {'csv': CsvGzWriter, 'parquet': ParquetWriter}
+
+class ChunkedOutput:
+    """Divide a exportação em arquivos de até rows_per_file linhas
+
+    Cada arquivo é gravado com o sufixo .part e renomeado ao ser fechado, então
+    um arquivo com o nome final está sempre completo.
+    """
+
+    def __init__(self, output_dir, prefix, writer_class, rows_per_file=ROWS_PER_FILE):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.writer_class = writer_class
+        self.rows_per_file = rows_per_file
+        self.files = []
+        self.rows = 0
+        self._writer = None
+        self._path = None
+        self._file_rows = 0
+
+    def _open(self):
+        self._path = os.path.join(
+            self.output_dir, f"{self.prefix}-{len(self.files) + 1:04d}{self.writer_class.extension}"
+        )
+        self._writer = self.writer_class(self._path + '.part')
+        self._file_rows = 0
+
+    def _close(self):
+        self._writer.close()
+        os.replace(self._path + '.part', self._path)
+        self.files.append(self._path)
+        self._writer = None
+
+    def write(self, rows):
+        for row in rows:
+            if self._writer is None:
+                self._open()
+            self._writer.write((row,))
+            self._file_rows += 1
+            self.rows += 1
+            if self._file_rows >= self.rows_per_file:
+                self._close()
+
+    def close(self):
+        if self._writer is not None:
+            self._close()
+
+    def abort(self):
+        """Descarta os arquivos da exportação com erro: o .part em andamento e os já fechados
+
+        O estado não avança em uma exportação com erro, então a próxima grava
+        esses pedidos de novo; manter os arquivos duplicaria as linhas.
+        """
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar o arquivo descartado {self._path}.part: {e}")
+            self._writer = None
+            if os.path.exists(self._path + '.part'):
+                os.remove(self._path + '.part')
+        for path in self.files:
+            os.remove(path)
+        self.files = []
+
+def _state_path(output_dir, tenant_id):
+    return os.path.join(output_dir, f".export-state-{tenant_id}.json")
+
+def load_export_state(output_dir, tenant_id):
+    """Estado da última exportação da loja nessa pasta, ou None"""
+    try:
+        with open(_state_path(output_dir, tenant_id), encoding='utf-8') as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return None
+
+def save_export_state(output_dir, tenant_id, state):
+    path = _state_path(output_dir, tenant_id)
+    with open(path + '.tmp', 'w', encoding='utf-8') as state_file:
+        json.dump(state, state_file, indent=2)
+    os.replace(path + '.tmp', path)
+
+def export_orders(scope, output_dir, tenant_id='default', fmt='csv', full=False,
+                  page_size=FIRESTORE_PAGE_SIZE, rows_per_file=ROWS_PER_FILE):
+    """Exporta os pedidos da loja e grava o estado para a próxima exportação incremental
+
+    Args:
+        scope: Escopo da loja (coleção, storeId)
+        output_dir: Pasta dos arquivos e do estado da exportação
+        tenant_id: Loja exportada (separa o estado de cada loja)
+        fmt: 'csv' (CSV.gz) ou 'parquet'
+        full: Exporta todos os pedidos em vez de só os criados depois da última exportação
+        page_size: Documentos lidos por página do Firestore
+        rows_per_file: Linhas por arquivo
+
+    Returns:
+        Dicionário com os arquivos gravados e o número de pedidos e linhas
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = None if full else load_export_state(output_dir, tenant_id)
+    created_after = datetime.fromisoformat(state['last_created_at']) if state else None
+
+    started_at = datetime.now(timezone.utc)
+    output = ChunkedOutput(output_dir, f"orders-{tenant_id}-{started_at:%Y%m%dT%H%M%S}", WRITERS[fmt], rows_per_file)
+    orders, last_created_at = 0, created_after
+    try:
+        for page in iter_order_pages(scope, page_size, created_after):
+            for order in page:
+                output.write(flatten_order(order))
+            orders += len(page)
+            last_created_at = page[-1]['createdAt']
+            logger.info(f"Exportação: {orders} pedidos, {output.rows} linhas")
+    except BaseException:
+        output.abort()
+        raise
+    output.close()
+
+    # O estado só avança depois que todos os arquivos foram fechados
+    if last_created_at is not None:
+        save_export_state(output_dir, tenant_id, {
+            'last_created_at': last_created_at.isoformat(),
+            'exported_at': started_at.isoformat(),
+            'format': fmt,
+            'orders': orders,
+        })
+    return {'files': output.files, 'orders': orders, 'rows': output.rows, 'since': created_after}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='exports', help="pasta dos arquivos exportados")
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv', help="csv (CSV.gz) ou parquet")
+    parser.add_argument('--full', action='store_true', help="exporta todos os pedidos, não só os novos")
+    parser.add_argument('--tenant', default=None, help="id da loja (TENANTS_FILE); por padrão, a primeira")
+    parser.add_argument('--page-size', type=int, default=FIRESTORE_PAGE_SIZE, help="documentos por página")
+    parser.add_argument('--rows-per-file', type=int, default=ROWS_PER_FILE, help="linhas por arquivo")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    stores = tenants.load_tenants()
+    tenant = tenants.get_tenant(args.tenant) if args.tenant else stores[0]
+    if tenant is None:
+        parser.error(f"Loja não encontrada: {args.tenant}")
+
+    result = export_orders(
+        (tenant.orders_collection, tenant.store_id), args.output, tenant.id, args.format,
+        args.full, args.page_size, args.rows_per_file
+    )
+    since = f" criados depois de {result['since']:%d/%m/%Y %H:%M:%S}" if result['since'] else ""
+    print(f"{result['orders']} pedidos{since} exportados em {result['rows']} linhas")
+    for path in result['files']:
+        print(f"  {path}")
+
+if __name__ == '__main__':
+    main()
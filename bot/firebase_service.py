@@ -1,17 +1,195 @@
 import os
 import asyncio
+import functools
+import logging
 import threading
+import time
 from datetime import datetime, timezone
-from google.cloud import firestore
-from config import FIREBASE_CREDENTIALS_PATH
+import config
+from metrics import FIRESTORE_LATENCY, FIRESTORE_ERRORS, FIRESTORE_RETRIES, FIRESTORE_CIRCUIT_STATE, BUFFERED_WRITES
+from trace_recorder import record_change, record_own_write
+from tenants import current_tenant
+from partitions import run_partitioned, get_pool
+from analytics import COMPLETION_FIELD, SalesReport
+from customer_summary import PAID_STATUSES
+from resilience import CircuitBreaker, WriteBuffer, call_with_retries, is_transient, is_transient_message
 
-# Configuração do cliente Firestore
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.path.abspath(FIREBASE_CREDENTIALS_PATH)
-db = firestore.Client()
+logger = logging.getLogger(__name__)
+
+# Cliente do Firestore, criado no primeiro uso ou injetado com set_client
+_db = None
+_db_lock = threading.Lock()
+
+def set_client(client):
+    """Define o cliente do Firestore usado pelo serviço (ex.: um fake nos benchmarks)"""
+    global _db
+    _db = client
+
+def get_db():
+    """Retorna o cliente do Firestore, criando-o no primeiro uso
+
+    A importação do google-cloud-firestore e a leitura das credenciais só
+    acontecem aqui, então importar este módulo não exige credenciais.
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                from google.cloud import firestore
+                credentials_path = config.FIREBASE_CREDENTIALS_PATH
+                if os.path.exists(credentials_path):
+                    _db = firestore.Client.from_service_account_json(credentials_path)
+                else:
+                    # Sem o arquivo, usa as credenciais padrão do ambiente (GOOGLE_APPLICATION_CREDENTIALS etc.)
+                    _db = firestore.Client()
+                logger.info("Cliente do Firestore inicializado")
+    return _db
 
 # Event loop principal para callbacks
 main_loop = None
 
+# Horários (epoch) do último snapshot recebido pelo listener e da última gravação bem-sucedida
+last_snapshot_at = None
+last_write_at = None
+
+# Limite de operações por WriteBatch do Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+# Documentos lidos por página nas leituras paginadas (exportação)
+FIRESTORE_PAGE_SIZE = 500
+
+# Documento onde o bot guarda seu estado entre reinícios
+BOT_STATE_COLLECTION = 'bot_state'
+BOT_STATE_DOCUMENT = 'runtime'
+
+# Circuit breaker das chamadas ao Firestore e fila durável das gravações adiadas, criados no primeiro uso
+_breaker = None
+_write_buffer = None
+_replay_lock = None
+_buffer_writes_in_flight = 0  # Gravações sendo anexadas ao arquivo da fila (em uma thread)
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker('firestore', config.FIRESTORE_BREAKER_THRESHOLD, config.FIRESTORE_BREAKER_RESET_SECONDS)
+    return _breaker
+
+def get_write_buffer():
+    """Fila das gravações de status feitas enquanto o Firestore estava indisponível"""
+    global _write_buffer
+    if _write_buffer is None:
+        _write_buffer = WriteBuffer(config.FIRESTORE_WRITE_BUFFER_PATH)
+    return _write_buffer
+
+# 0 = fechado, 1 = meio aberto (testando), 2 = aberto
+_CIRCUIT_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+FIRESTORE_CIRCUIT_STATE.set_function(lambda: _CIRCUIT_STATE_VALUES[get_breaker().state])
+
+def instrumented(func):
+    """Registra a duração da operação do Firestore no histograma de métricas"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with FIRESTORE_LATENCY.time(operation=func.__name__):
+            return await func(*args, **kwargs)
+    return wrapper
+
+def _scope():
+    """Escopo da loja associada à operação atual: (coleção, storeId)"""
+    tenant = current_tenant()
+    return tenant.orders_collection, tenant.store_id
+
+def _orders_collection(scope):
+    return get_db().collection(scope[0])
+
+def _orders_query(scope):
+    """Consulta dos pedidos da loja (filtra por storeId quando a coleção é compartilhada)"""
+    collection, store_id = scope
+    query = get_db().collection(collection)
+    if store_id is not None:
+        query = query.where('storeId', '==', store_id)
+    return query
+
+def _mark_write():
+    global last_write_at
+    last_write_at = time.time()
+
+async def _guarded(operation, call):
+    """Executa `await call()` com prazo, novas tentativas com jitter e o circuit breaker do Firestore
+
+    Com o circuito aberto, falha na hora com CircuitOpenError: durante uma
+    queda, os handlers não ficam presos esperando o prazo de cada chamada.
+    """
+    return await call_with_retries(
+        call, get_breaker(),
+        attempts=config.FIRESTORE_RETRY_ATTEMPTS,
+        timeout=config.FIRESTORE_TIMEOUT_SECONDS,
+        on_retry=lambda e: FIRESTORE_RETRIES.inc(operation=operation)
+    )
+
+async def _call(operation, key, function, *args):
+    """run_partitioned protegido por _guarded"""
+    return await _guarded(operation, lambda: run_partitioned(key, function, *args))
+
+async def _buffer_status_writes(scope, writes):
+    """Adia as gravações de status para a fila durável
+
+    O arquivo é gravado (com fsync) em uma thread, para não travar o event
+    loop durante a queda do Firestore.
+
+    Args:
+        writes: Lista de tuplas (order_id, new_status, created_at)
+
+    Returns:
+        IDs dos pedidos cujas gravações foram guardadas
+    """
+    if not writes:
+        return []
+    tenant_id = current_tenant().id
+    queued_at = datetime.now(timezone.utc).isoformat()
+    entries = [{
+        'key': order_id,
+        'tenant': tenant_id,
+        'scope': list(scope),
+        'status': new_status,
+        'created_at': created_at.isoformat() if created_at else None,
+        'queued_at': queued_at,
+    } for order_id, new_status, created_at in writes]
+    global _buffer_writes_in_flight
+    _buffer_writes_in_flight += 1
+    try:
+        await asyncio.to_thread(get_write_buffer().extend, entries)
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='buffer_write')
+        logger.error(f"Erro ao guardar {len(entries)} gravações adiadas: {e}")
+        return []
+    finally:
+        _buffer_writes_in_flight -= 1
+    BUFFERED_WRITES.inc(len(entries), result='queued')
+    for order_id, new_status, _ in writes:
+        logger.warning(
+            f"Firestore indisponível: status {new_status} do pedido {order_id} guardado para regravação",
+            extra={'order_id': order_id}
+        )
+    return [order_id for order_id, _, _ in writes]
+
+def _buffer_pending():
+    """Há gravações na fila ou sendo guardadas (novas gravações devem entrar atrás delas)"""
+    return bool(_buffer_writes_in_flight or len(get_write_buffer()))
+
+async def _buffer_status_write(scope, order_id, new_status, created_at=None):
+    """Adia uma gravação de status; True se ela foi guardada"""
+    return bool(await _buffer_status_writes(scope, [(order_id, new_status, created_at)]))
+
+def _with_buffered_status(orders):
+    """Aplica aos pedidos lidos o status das gravações que ainda estão na fila"""
+    buffer = get_write_buffer()
+    if len(buffer):
+        for order in orders:
+            status = buffer.latest(order['id'], 'status')
+            if status is not None:
+                order['status'] = status
+    return orders
+
 def convert_timestamp(timestamp):
     """Converte um timestamp do Firestore para datetime com timezone"""
     if timestamp:
@@ -19,40 +197,70 @@ def convert_timestamp(timestamp):
         return dt
     return None
 
-def setup_order_listener(callback, loop):
+def snapshot_to_order(doc):
+    """Converte um documento do Firestore em um dicionário de pedido"""
+    order = doc.to_dict() or {}
+    order['id'] = doc.id
+
+    # Converte timestamps para datetime com timezone
+    if 'createdAt' in order:
+        order['createdAt'] = convert_timestamp(order['createdAt'])
+    if 'updatedAt' in order:
+        order['updatedAt'] = convert_timestamp(order['updatedAt'])
+
+    return order
+
+def setup_order_listener(callback, loop, on_change=None, collection='orders'):
     """Configura um listener para novos pedidos
     
     Args:
         callback: Função de callback assíncrona para processar novos pedidos
         loop: Event loop principal do Discord
+        on_change: Função síncrona opcional chamada no event loop para toda
+            mudança (change_type, order_id, order_data), usada pelos índices em memória
+        collection: Coleção de pedidos observada; é anotada em order_data['_collection']
     """
     global main_loop
     main_loop = loop
     
     def on_snapshot(doc_snapshots, changes, read_time):
         """Callback do Firestore para mudanças nos documentos"""
+        global last_snapshot_at
+        last_snapshot_at = time.time()
         for change in changes:
-            if change.type.name == 'ADDED':
-                order_data = change.document.to_dict()
-                order_data['id'] = change.document.id
-                
-                # Converte timestamps para datetime com timezone
-                if 'createdAt' in order_data:
-                    order_data['createdAt'] = convert_timestamp(order_data['createdAt'])
-                if 'updatedAt' in order_data:
-                    order_data['updatedAt'] = convert_timestamp(order_data['updatedAt'])
-                
-                # Agenda o callback no event loop principal do Discord
-                if main_loop and not main_loop.is_closed():
-                    future = asyncio.run_coroutine_threadsafe(
-                        callback(order_data),
-                        main_loop
-                    )
-                    # Opcional: handle future.result() para erros
-                    future.add_done_callback(lambda f: handle_callback_result(f, order_data['id']))
+            change_type = change.type.name
+            if change_type != 'ADDED' and on_change is None:
+                continue
+
+            order_data = snapshot_to_order(change.document)
+            record_change(change_type, order_data)
+            # Coleção de origem, usada para identificar a loja do pedido
+            order_data['_collection'] = collection
+            # Momento da chegada no listener, usado para medir a latência até a DM
+            order_data['_received_at'] = time.perf_counter()
+            logger.debug(
+                f"Mudança {change_type} recebida no listener",
+                extra={'order_id': order_data['id'], 'stage': 'listener', 'change_type': change_type}
+            )
+
+            if not main_loop or main_loop.is_closed():
+                continue
+
+            # Atualiza os índices no event loop principal (evita acesso concorrente)
+            if on_change is not None:
+                main_loop.call_soon_threadsafe(on_change, change_type, order_data['id'], order_data)
+
+            # Agenda o callback no event loop principal do Discord
+            if change_type == 'ADDED':
+                future = asyncio.run_coroutine_threadsafe(
+                    callback(order_data),
+                    main_loop
+                )
+                # Opcional: handle future.result() para erros
+                future.add_done_callback(lambda f, order_id=order_data['id']: handle_callback_result(f, order_id))
     
     # Inicia o listener
-    orders_ref = db.collection('orders')
+    orders_ref = get_db().collection(collection)
     return orders_ref.on_snapshot(on_snapshot)
 
 def handle_callback_result(future, order_id):
@@ -60,65 +268,364 @@ def handle_callback_result(future, order_id):
     try:
         future.result()  # Isso levantará qualquer exceção que ocorreu
     except Exception as e:
-        print(f"Erro ao processar pedido {order_id}: {e}")
+        logger.error(f"Erro ao processar pedido {order_id}: {e}", extra={'order_id': order_id})
+
+# Leituras e gravações de pedidos. As funções síncronas abaixo fazem o acesso
+# ao Firestore e rodam no processo dono do pedido (partitions.py) ou aqui
+# mesmo; recebem o escopo da loja (coleção, storeId) em vez de ler o contexto.
+
+def _query_orders_by_status(scope, statuses):
+    query = _orders_query(scope).where('status', 'in', list(statuses))
+    return [snapshot_to_order(doc) for doc in query.stream()]
+
+def _fetch_order(scope, order_id):
+    doc = _orders_collection(scope).document(order_id).get()
+    return snapshot_to_order(doc) if doc.exists else None
+
+def _fetch_orders(scope, order_ids):
+    orders_ref = _orders_collection(scope)
+    refs = [orders_ref.document(order_id) for order_id in order_ids]
+    return {doc.id: snapshot_to_order(doc) for doc in get_db().get_all(refs) if doc.exists}
+
+def _status_fields(new_status, now, created_at=None):
+    """Campos gravados na mudança de status; a conclusão também grava o tempo desde a criação"""
+    fields = {'status': new_status, 'updatedAt': now}
+    if new_status == 'completed' and created_at is not None:
+        fields[COMPLETION_FIELD] = max(0.0, (now - created_at).total_seconds())
+    return fields
+
+def _write_order_status(scope, order_id, new_status, created_at=None):
+    _orders_collection(scope).document(order_id).update(
+        _status_fields(new_status, datetime.now(timezone.utc), created_at)
+    )
 
+def _write_orders_status(scope, updates, created_at=None):
+    """Grava as atualizações em WriteBatch de até 500 operações
+
+    Args:
+        created_at: Mapeia order_id -> createdAt, usado no tempo de conclusão
+
+    Returns:
+        Tupla (IDs atualizados, lista de (atualizações do lote, "Tipo: erro") dos lotes que falharam)
+    """
+    orders_ref = _orders_collection(scope)
+    updated, failures = [], []
+    for start in range(0, len(updates), FIRESTORE_BATCH_LIMIT):
+        chunk = updates[start:start + FIRESTORE_BATCH_LIMIT]
+        try:
+            now = datetime.now(timezone.utc)
+            batch = get_db().batch()
+            for order_id, new_status in chunk:
+                batch.update(
+                    orders_ref.document(order_id),
+                    _status_fields(new_status, now, (created_at or {}).get(order_id))
+                )
+            batch.commit()
+            updated.extend(order_id for order_id, _ in chunk)
+        except Exception as e:
+            failures.append((chunk, f"{type(e).__name__}: {e}"))
+    return updated, failures
+
+@instrumented
 async def get_pending_orders():
     """Retorna todos os pedidos pendentes que não foram cancelados"""
     try:
-        orders_ref = db.collection('orders')
         # Busca pedidos com status 'pending' ou 'awaiting_payment' que não foram cancelados
-        query = orders_ref.where('status', 'in', ['pending', 'awaiting_payment'])
-        docs = query.stream()
-        
-        pending_orders = []
-        for doc in docs:
-            order_data = doc.to_dict()
-            order_data['id'] = doc.id
-            
-            # Converte timestamps para datetime com timezone
-            if 'createdAt' in order_data:
-                order_data['createdAt'] = convert_timestamp(order_data['createdAt'])
-            if 'updatedAt' in order_data:
-                order_data['updatedAt'] = convert_timestamp(order_data['updatedAt'])
-            
-            # Verifica se o pedido não foi cancelado
-            if order_data.get('status') != 'cancelled':
-                pending_orders.append(order_data)
-        
-        return pending_orders
+        orders = await _call('get_pending_orders', None, _query_orders_by_status, _scope(), ['pending', 'awaiting_payment'])
+        return [
+            order for order in _with_buffered_status(orders)
+            if order.get('status') in ('pending', 'awaiting_payment')
+        ]
     except Exception as e:
-        print(f"Erro ao buscar pedidos pendentes: {e}")
+        FIRESTORE_ERRORS.inc(operation='get_pending_orders')
+        logger.error(f"Erro ao buscar pedidos pendentes: {e}")
         return []
 
+@instrumented
 async def update_order_status(order_id, new_status):
-    """Atualiza o status de um pedido"""
+    """Atualiza o status de um pedido
+
+    Se o Firestore estiver indisponível (erro passageiro depois das novas
+    tentativas, ou circuito aberto), a gravação vai para a fila durável e é
+    refeita na ordem quando ele voltar; nesse caso também retorna True.
+    Retorna False apenas se a gravação foi recusada (ex.: pedido inexistente).
+    """
+    scope = _scope()
+    created_at = current_tenant().sales.created_at(order_id)
+    record_own_write(order_id, new_status)
+    if _buffer_pending():
+        # Com gravações na fila, esta entra atrás delas para que a ordem seja mantida
+        return await _buffer_status_write(scope, order_id, new_status, created_at)
     try:
-        order_ref = db.collection('orders').document(order_id)
-        order_ref.update({
-            'status': new_status,
-            'updatedAt': datetime.now(timezone.utc)
-        })
+        await _call('update_order_status', order_id, _write_order_status, scope, order_id, new_status, created_at)
+        _mark_write()
         return True
     except Exception as e:
-        print(f"Erro ao atualizar status do pedido: {e}")
+        if is_transient(e):
+            return await _buffer_status_write(scope, order_id, new_status, created_at)
+        FIRESTORE_ERRORS.inc(operation='update_order_status')
+        logger.error(f"Erro ao atualizar status do pedido: {e}")
         return False
 
+@instrumented
 async def get_order(order_id):
     """Busca um pedido específico"""
     try:
-        doc = db.collection('orders').document(order_id).get()
-        if doc.exists:
-            order = doc.to_dict()
-            order['id'] = doc.id
-            
-            # Converte timestamps para datetime com timezone
-            if 'createdAt' in order:
-                order['createdAt'] = convert_timestamp(order['createdAt'])
-            if 'updatedAt' in order:
-                order['updatedAt'] = convert_timestamp(order['updatedAt'])
-            
-            return order
+        order = await _call('get_order', order_id, _fetch_order, _scope(), order_id)
+        return _with_buffered_status([order])[0] if order else None
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='get_order')
+        logger.error(f"Erro ao buscar pedido {order_id}: {e}")
+        return None
+
+def _group_by_partition(items, key):
+    """Agrupa os itens pelo processo dono (um único grupo sem pool)"""
+    pool = get_pool()
+    if pool is None:
+        return [list(items)] if items else []
+    groups = {}
+    for item in items:
+        groups.setdefault(pool.partition_for(key(item)), []).append(item)
+    return list(groups.values())
+
+@instrumented
+async def get_orders(order_ids):
+    """Busca vários pedidos em uma única chamada por partição
+
+    Returns:
+        Dicionário order_id -> pedido, apenas com os pedidos encontrados
+    """
+    try:
+        scope = _scope()
+        results = await asyncio.gather(*(
+            _call('get_orders', group[0], _fetch_orders, scope, group)
+            for group in _group_by_partition(order_ids, key=lambda order_id: order_id)
+        ))
+        orders = {order_id: order for result in results for order_id, order in result.items()}
+        _with_buffered_status(orders.values())
+        return orders
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='get_orders')
+        logger.error(f"Erro ao buscar pedidos: {e}")
+        return {}
+
+@instrumented
+async def get_orders_by_status(statuses):
+    """Retorna todos os pedidos com um dos status informados"""
+    try:
+        orders = await _call('get_orders_by_status', None, _query_orders_by_status, _scope(), statuses)
+        return [order for order in _with_buffered_status(orders) if order.get('status') in statuses]
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='get_orders_by_status')
+        logger.error(f"Erro ao buscar pedidos por status: {e}")
+        return []
+
+@instrumented
+async def update_orders_status(updates):
+    """Atualiza o status de vários pedidos em WriteBatch de até 500 operações
+
+    Cada lote é gravado de forma atômica; se um lote falhar, os demais
+    continuam sendo gravados. Com processos de partição, cada um grava os
+    lotes dos seus pedidos em paralelo. Lotes que falham por indisponibilidade
+    do Firestore (ou todos, com o circuito aberto ou gravações já na fila) vão
+    para a fila durável e contam como atualizados.
+
+    Args:
+        updates: Lista de tuplas (order_id, new_status)
+
+    Returns:
+        Lista com os IDs dos pedidos atualizados com sucesso
+    """
+    scope = _scope()
+    sales = current_tenant().sales
+    for order_id, new_status in updates:
+        record_own_write(order_id, new_status)
+
+    async def buffer_all(pending):
+        return await _buffer_status_writes(scope, [
+            (order_id, new_status, sales.created_at(order_id)) for order_id, new_status in pending
+        ])
+
+    if _buffer_pending() or get_breaker().state == CircuitBreaker.OPEN:
+        return await buffer_all(updates)
+
+    groups = _group_by_partition(updates, key=lambda update: update[0])
+    results = await asyncio.gather(*(
+        _call('update_orders_status', group[0][0], _write_orders_status, scope, group, {
+            order_id: sales.created_at(order_id) for order_id, _ in group if sales.created_at(order_id)
+        }) for group in groups
+    ), return_exceptions=True)
+
+    updated = []
+    for group, result in zip(groups, results):
+        if isinstance(result, Exception):
+            # A chamada da partição inteira falhou (prazo, circuito aberto, processo encerrado)
+            if is_transient(result):
+                updated.extend(await buffer_all(group))
+            else:
+                FIRESTORE_ERRORS.inc(operation='update_orders_status')
+                logger.error(f"Erro ao atualizar lote de {len(group)} pedidos: {result}")
+            continue
+        group_updated, failures = result
+        updated.extend(group_updated)
+        for chunk, error in failures:
+            if is_transient_message(error):
+                get_breaker().record_failure()
+                updated.extend(await buffer_all(chunk))
+                continue
+            FIRESTORE_ERRORS.inc(operation='update_orders_status')
+            logger.error(f"Erro ao atualizar lote de {len(chunk)} pedidos: {error}")
+    if updated:
+        _mark_write()
+    return updated
+
+async def replay_buffered_writes(limit=FIRESTORE_BATCH_LIMIT):
+    """Regrava, na ordem em que entraram, até `limit` gravações da fila
+
+    Para no primeiro erro passageiro (o Firestore continua fora) e tenta de
+    novo na próxima rodada. Uma gravação recusada (ex.: pedido apagado) é
+    descartada com um erro no log, para não travar a fila.
+
+    Returns:
+        Número de gravações retiradas da fila
+    """
+    global _replay_lock
+    if _replay_lock is None:
+        _replay_lock = asyncio.Lock()
+    buffer = get_write_buffer()
+    async with _replay_lock:
+        done = 0
+        try:
+            for entry in buffer.peek(limit):
+                order_id = entry['key']
+                created_at = datetime.fromisoformat(entry['created_at']) if entry.get('created_at') else None
+                try:
+                    await _call(
+                        'replay_buffered_write', order_id, _write_order_status,
+                        tuple(entry['scope']), order_id, entry['status'], created_at
+                    )
+                    BUFFERED_WRITES.inc(result='replayed')
+                except Exception as e:
+                    if is_transient(e):
+                        break
+                    BUFFERED_WRITES.inc(result='dropped')
+                    logger.error(
+                        f"Gravação adiada do pedido {order_id} descartada: {e}",
+                        extra={'order_id': order_id}
+                    )
+                done += 1
+        finally:
+            if done:
+                await asyncio.to_thread(buffer.discard, done)
+                _mark_write()
+                logger.info(f"{done} gravações adiadas regravadas no Firestore ({len(buffer)} restantes)")
+        return done
+
+def iter_order_pages(scope, page_size=FIRESTORE_PAGE_SIZE, created_after=None):
+    """Percorre os pedidos da loja em páginas ordenadas por createdAt, usando o último documento como cursor
+
+    Só uma página fica em memória por vez, então serve para ler a coleção
+    inteira. Pedidos sem createdAt não entram na ordenação e são ignorados.
+    Síncrono: usado pela exportação, fora do event loop do bot.
+
+    Args:
+        scope: Escopo da loja (coleção, storeId)
+        page_size: Documentos por página
+        created_after: Se informado, só pedidos criados depois desse instante
+
+    Yields:
+        Listas de pedidos (snapshot_to_order), na ordem de criação
+    """
+    query = _orders_query(scope)
+    if created_after is not None:
+        query = query.where('createdAt', '>', created_after)
+    query = query.order_by('createdAt').limit(page_size)
+    cursor = None
+    while True:
+        page = list((query.start_after(cursor) if cursor is not None else query).stream())
+        if not page:
+            return
+        yield [snapshot_to_order(doc) for doc in page]
+        if len(page) < page_size:
+            return
+        cursor = page[-1]
+
+def _aggregate(query, *aggregations):
+    """Executa uma consulta de agregação no servidor: a contagem e (tipo, campo, alias) extras
+
+    O Firestore cobra uma leitura a cada 1000 entradas de índice contadas, sem
+    transferir os documentos.
+    """
+    aggregation_query = query.count(alias='count')
+    for kind, field, alias in aggregations:
+        getattr(aggregation_query, kind)(field, alias=alias)
+    return {result.alias: result.value for result in aggregation_query.get()[0]}
+
+def _query_sales_report(scope, start, end, statuses, currencies):
+    """Relatório do período com consultas de agregação: uma por status, uma por moeda e a do tempo de conclusão"""
+    period = _orders_query(scope).where('createdAt', '>=', start).where('createdAt', '<', end)
+    report = SalesReport(start, end, 'aggregation')
+    for status in statuses:
+        count = _aggregate(period.where('status', '==', status))['count']
+        if count:
+            report.statuses[status] = count
+    paid = period.where('status', 'in', list(PAID_STATUSES))
+    for currency in currencies:
+        result = _aggregate(paid.where('currency', '==', currency), ('sum', 'total', 'revenue'))
+        if result['count']:
+            report.paid_orders[currency] = result['count']
+            report.revenue[currency] = result['revenue'] or 0
+    completed = period.where('status', '==', 'completed')
+    report.avg_completion_seconds = _aggregate(completed, ('avg', COMPLETION_FIELD, 'average'))['average']
+    return report
+
+@instrumented
+async def get_sales_report(start, end, statuses, currencies):
+    """Relatório de vendas do período [start, end) calculado no servidor
+
+    Returns:
+        SalesReport sem as categorias (preenchidas pelo rollup local), ou None em caso de erro
+    """
+    try:
+        return await _call('get_sales_report', None, _query_sales_report, _scope(), start, end, list(statuses), list(currencies))
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='get_sales_report')
+        logger.error(f"Erro ao calcular o relatório de vendas: {e}")
+        return None
+
+@instrumented
+async def save_bot_state(state):
+    """Grava o estado do bot (watermark, jobs agendados, caches) para o próximo início"""
+    try:
+        document = get_db().collection(BOT_STATE_COLLECTION).document(BOT_STATE_DOCUMENT)
+        await _guarded('save_bot_state', lambda: asyncio.to_thread(document.set, state))
+        _mark_write()
+        return True
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='save_bot_state')
+        logger.error(f"Erro ao salvar o estado do bot: {e}")
+        return False
+
+@instrumented
+async def load_bot_state():
+    """Retorna o estado salvo no último desligamento, ou None"""
+    try:
+        document = get_db().collection(BOT_STATE_COLLECTION).document(BOT_STATE_DOCUMENT)
+        doc = await _guarded('load_bot_state', lambda: asyncio.to_thread(document.get))
+        return doc.to_dict() if doc.exists else None
+    except Exception as e:
+        FIRESTORE_ERRORS.inc(operation='load_bot_state')
+        logger.error(f"Erro ao carregar o estado do bot: {e}")
         return None
+
+@instrumented
+async def clear_bot_state():
+    """Apaga o estado salvo depois de restaurado, para que um reinício sem desligamento gradual não o reutilize"""
+    try:
+        document = get_db().collection(BOT_STATE_COLLECTION).document(BOT_STATE_DOCUMENT)
+        await _guarded('clear_bot_state', lambda: asyncio.to_thread(document.delete))
+        return True
     except Exception as e:
-        print(f"Erro ao buscar pedido {order_id}: {e}")
-        return None 
\ No newline at end of file
+        FIRESTORE_ERRORS.inc(operation='clear_bot_state')
+        logger.error(f"Erro ao apagar o estado do bot: {e}")
+        return False
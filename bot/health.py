@@ -0,0 +1,88 @@
+import json
+import logging
+import threading
+import time
+from metrics import add_route
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo para o event loop executar o callback de teste da liveness
+LOOP_PROBE_TIMEOUT_SECONDS = 5
+
+_loop = None
+_checks = {}  # Nome -> função que retorna (ok, detalhes); todas entram na readiness
+_details = {}  # Nome -> função que retorna informações extras (profundidade de filas etc.)
+
+def set_event_loop(loop):
+    """Define o event loop verificado pela liveness"""
+    global _loop
+    _loop = loop
+
+def add_check(name, check):
+    """Registra uma verificação da readiness
+
+    check() roda na thread do servidor HTTP: deve apenas ler estado já
+    disponível (atributos, contadores), nunca aguardar o event loop ou a rede.
+    Retorna (ok, detalhes), com detalhes serializáveis em JSON.
+    """
+    _checks[name] = check
+
+def add_detail(name, detail):
+    """Registra informações extras exibidas nas respostas, sem afetar o status"""
+    _details[name] = detail
+
+def probe_event_loop(timeout=LOOP_PROBE_TIMEOUT_SECONDS):
+    """Mede quanto o event loop demora para executar um callback agendado de outra thread
+
+    Returns:
+        Tupla (ok, segundos até a resposta ou None se passou do prazo)
+    """
+    if _loop is None or _loop.is_closed():
+        return False, None
+    answered = threading.Event()
+    started_at = time.monotonic()
+    try:
+        _loop.call_soon_threadsafe(answered.set)
+    except RuntimeError:
+        return False, None
+    if not answered.wait(timeout):
+        return False, None
+    return True, time.monotonic() - started_at
+
+def _run(function):
+    try:
+        return function()
+    except Exception as e:
+        logger.error(f"Erro na verificação de saúde: {e}")
+        return False, {'error': str(e)}
+
+def _collect_details():
+    details = {}
+    for name, detail in _details.items():
+        try:
+            details[name] = detail()
+        except Exception as e:
+            details[name] = {'error': str(e)}
+    return details
+
+def _response(ok, payload):
+    payload = {'status': 'ok' if ok else 'fail', **payload}
+    return 200 if ok else 503, 'application/json; charset=utf-8', json.dumps(payload, default=str)
+
+def liveness():
+    """O processo está vivo se o event loop ainda executa callbacks"""
+    ok, elapsed = probe_event_loop()
+    return _response(ok, {'event_loop_response_ms': round(elapsed * 1000, 1) if ok else None})
+
+def readiness():
+    """Pronto para trabalhar: loop responsivo e todas as verificações registradas ok"""
+    loop_ok, elapsed = probe_event_loop()
+    checks = {'event_loop': {'ok': loop_ok, 'response_ms': round(elapsed * 1000, 1) if loop_ok else None}}
+    for name, check in _checks.items():
+        ok, details = _run(check)
+        checks[name] = {'ok': bool(ok), **(details or {})}
+    ok = all(check['ok'] for check in checks.values())
+    return _response(ok, {'checks': checks, **_collect_details()})
+
+add_route('/healthz', liveness)
+add_route('/readyz', readiness)
@@ -0,0 +1,130 @@
+import math
+import discord
+from components import OrderButton, BoardPageButton
+
+# Itens por página (cada item disponível tem um botão; o Discord aceita até 25 por mensagem)
+PAGE_SIZE = 10
+
+# Título da mensagem fixada do quadro no canal dos funcionários
+BOARD_TITLE = "📋 Quadro de Trabalhos"
+
+def describe_item(item):
+    """Resumo de uma linha do item: nome, quantidade e detalhes da categoria"""
+    text = f"{item.get('name', 'Item')} ({item.get('quantity', 1)}x)"
+    if item.get('category') == 'leveling':
+        text += f" - {item.get('selectedJob', 'N/A')} {item.get('startLevel', 'N/A')} → {item.get('endLevel', 'N/A')}"
+    elif item.get('category') == 'gil':
+        text += f" - {item.get('gilAmount', 0)} milhões de Gil"
+    return text
+
+class JobBoard:
+    """Quadro com os trabalhos disponíveis e em andamento de um canal dos funcionários
+
+    Substitui uma mensagem por trabalho: todos os itens ficam em uma única
+    mensagem fixada e paginada, com um botão de aceite por item disponível.
+    O quadro só guarda o estado; quem edita a mensagem é o bot, agrupando as
+    mudanças próximas em uma só edição.
+    """
+
+    def __init__(self, channel_id, page_size=PAGE_SIZE):
+        self.channel_id = channel_id
+        self.page_size = page_size
+        self.message_id = None
+        self.message = None  # Última mensagem enviada ou buscada (não é salva no estado)
+        self.page = 0
+        self._entries = {}  # Mapeia (order_id, item_index) -> dados exibidos do item
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, order_id, item_index, item, customer_name, worker_name=None):
+        """Adiciona um item ao quadro (já com o funcionário, se foi atribuído automaticamente)"""
+        self._entries[(order_id, item_index)] = {
+            'order_id': order_id,
+            'item_index': item_index,
+            'description': describe_item(item),
+            'customer': customer_name,
+            'worker': worker_name,
+        }
+
+    def worker_for(self, order_id, item_index):
+        entry = self._entries.get((order_id, item_index))
+        return entry['worker'] if entry else None
+
+    def claim(self, order_id, item_index, worker_name):
+        """Marca o item como aceito; False se ele não estiver no quadro ou já tiver funcionário"""
+        entry = self._entries.get((order_id, item_index))
+        if entry is None or entry['worker']:
+            return False
+        entry['worker'] = worker_name
+        return True
+
+    def remove_order(self, order_id):
+        """Tira do quadro os itens de um pedido encerrado; True se algum foi removido"""
+        keys = [key for key in self._entries if key[0] == order_id]
+        for key in keys:
+            del self._entries[key]
+        return bool(keys)
+
+    def _ordered(self):
+        # Itens disponíveis primeiro, depois os em andamento, cada grupo na ordem de chegada
+        entries = list(self._entries.values())
+        return [entry for entry in entries if not entry['worker']] + [entry for entry in entries if entry['worker']]
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(len(self._entries) / self.page_size))
+
+    def set_page(self, page):
+        self.page = max(0, min(page, self.page_count - 1))
+        return self.page
+
+    def render(self):
+        """Embed e botões da página atual"""
+        self.set_page(self.page)
+        entries = self._ordered()
+        available = sum(1 for entry in entries if not entry['worker'])
+        page_entries = entries[self.page * self.page_size:(self.page + 1) * self.page_size]
+
+        embed = discord.Embed(
+            title=BOARD_TITLE,
+            description=(
+                f"{available} disponíveis · {len(entries) - available} em andamento\n"
+                "Clique no botão do item para aceitar o trabalho."
+            ),
+            color=discord.Color.blue() if available else discord.Color.green()
+        )
+        view = discord.ui.View(timeout=None)
+        buttons = 0
+        for entry in page_entries:
+            label = f"#{entry['order_id'][-6:]} · Item {(entry['item_index'] or 0) + 1}"
+            status = f"👷 {entry['worker']}" if entry['worker'] else "🟢 Disponível"
+            embed.add_field(
+                name=f"{label} - {status}",
+                value=f"{entry['description']}\nCliente: {entry['customer']}",
+                inline=False
+            )
+            if not entry['worker']:
+                view.add_item(OrderButton('claim', entry['order_id'], entry['item_index'], label=label, row=buttons // 5))
+                buttons += 1
+
+        if not entries:
+            embed.add_field(name="Nenhum trabalho no momento", value="Novos trabalhos aparecem aqui.", inline=False)
+        if self.page_count > 1:
+            embed.set_footer(text=f"Página {self.page + 1} de {self.page_count}")
+            view.add_item(BoardPageButton('prev', max(self.page - 1, 0), disabled=self.page == 0, row=4))
+            view.add_item(BoardPageButton('next', min(self.page + 1, self.page_count - 1), disabled=self.page >= self.page_count - 1, row=4))
+        return embed, view
+
+    def snapshot(self):
+        """Estado salvo no desligamento: mensagem, página e itens"""
+        return {'message_id': self.message_id, 'page': self.page, 'entries': list(self._entries.values())}
+
+    def restore(self, state):
+        """Retoma o estado salvo por snapshot()"""
+        if not state:
+            return
+        self.message_id = state.get('message_id')
+        self.page = state.get('page', 0)
+        for entry in state.get('entries') or []:
+            self._entries[(entry['order_id'], entry.get('item_index'))] = entry
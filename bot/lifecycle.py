@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class TaskTracker:
+    """Acompanha as tarefas de pedidos em andamento (listener, botões, jobs agendados)
+
+    No desligamento, `accepting` passa a False para recusar trabalho novo e
+    drain() aguarda as tarefas em andamento até o prazo.
+    """
+
+    def __init__(self):
+        self._tasks = set()
+        self.accepting = True
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def track(self, task=None):
+        """Acompanha a tarefa informada (ou a tarefa atual) até ela terminar"""
+        task = task or asyncio.current_task()
+        if task is not None and task not in self._tasks:
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return task
+
+    def spawn(self, coro, name=None):
+        """Cria uma tarefa já acompanhada"""
+        return self.track(asyncio.get_running_loop().create_task(coro, name=name))
+
+    async def drain(self, timeout):
+        """Aguarda as tarefas em andamento; as que passarem do prazo são canceladas
+
+        Returns:
+            Tupla (concluídas, canceladas)
+        """
+        current = asyncio.current_task()
+        completed = 0
+        deadline = time.monotonic() + timeout
+        # Tarefas podem criar outras enquanto terminam (ex.: agendar um arquivamento)
+        while True:
+            pending = {task for task in self._tasks if task is not current and not task.done()}
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            done, _ = await asyncio.wait(pending, timeout=remaining)
+            completed += len(done)
+
+        pending = [task for task in self._tasks if task is not current and not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return completed, len(pending)
+
+# Tarefas de pedidos em andamento no processo
+order_tasks = TaskTracker()
+
+class Scheduler:
+    """Agenda ações atrasadas (ex.: arquivar o canal de um pedido) que sobrevivem a reinícios
+
+    Cada job tem um tipo registrado com register(), argumentos serializáveis e
+    o horário de execução. No desligamento os jobs pendentes são salvos em vez
+    de aguardados, e restore() os reagenda no próximo início.
+    """
+
+    def __init__(self, tracker=order_tasks):
+        self._tracker = tracker
+        self._handlers = {}
+        self._jobs = {}  # Mapeia job_id -> (tipo, argumentos, horário em epoch, timer)
+        self._stopped = False
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def register(self, kind, handler):
+        """Registra a corrotina executada pelos jobs do tipo `kind`"""
+        self._handlers[kind] = handler
+
+    def schedule(self, kind, delay, job_id=None, **arguments):
+        """Agenda um job para daqui a `delay` segundos (substitui um job com o mesmo id)"""
+        if kind not in self._handlers:
+            raise ValueError(f"Tipo de job desconhecido: {kind}")
+        job_id = job_id or f"{kind}:{time.time_ns()}"
+        self._cancel_timer(job_id)
+        due_at = time.time() + max(0.0, delay)
+        timer = None
+        if not self._stopped:
+            timer = asyncio.get_running_loop().call_later(max(0.0, delay), self._run, job_id)
+        self._jobs[job_id] = (kind, arguments, due_at, timer)
+        return job_id
+
+    def _cancel_timer(self, job_id):
+        job = self._jobs.get(job_id)
+        if job and job[3] is not None:
+            job[3].cancel()
+
+    def _run(self, job_id):
+        kind, arguments, _, _ = self._jobs.pop(job_id)
+        self._tracker.spawn(self._execute(job_id, kind, arguments), name=job_id)
+
+    async def _execute(self, job_id, kind, arguments):
+        try:
+            await self._handlers[kind](**arguments)
+        except Exception as e:
+            logger.error(f"Erro ao executar o job agendado {job_id}: {e}")
+
+    def stop(self):
+        """Para de executar jobs; os pendentes (e os agendados depois disto) ficam em pending()"""
+        self._stopped = True
+        for job_id in list(self._jobs):
+            self._cancel_timer(job_id)
+
+    def pending(self):
+        """Lista os jobs ainda não executados, em formato serializável"""
+        return [
+            {'id': job_id, 'kind': kind, 'due_at': due_at, 'arguments': arguments}
+            for job_id, (kind, arguments, due_at, _) in self._jobs.items()
+        ]
+
+    def restore(self, jobs):
+        """Reagenda jobs salvos por pending(); os atrasados rodam imediatamente"""
+        restored = 0
+        for job in jobs or []:
+            if job.get('kind') not in self._handlers:
+                logger.warning(f"Job salvo com tipo desconhecido ignorado: {job.get('kind')}")
+                continue
+            self.schedule(job['kind'], job['due_at'] - time.time(), job_id=job['id'], **job.get('arguments', {}))
+            restored += 1
+        return restored
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+# Pasta dos módulos do bot; o frame mais interno daqui identifica quem bloqueou o loop
+_BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Frames da pilha incluídos no log de cada travamento
+STACK_LOG_DEPTH = 12
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+def describe_blocking_frame(frame):
+    """Retorna (local no bot, chamada mais interna) para a pilha que está bloqueando o loop
+
+    O local é a função do bot mais próxima do topo da pilha (ex.:
+    'firebase_service.update_order_status'); se nenhuma função do bot estiver
+    na pilha, usa a própria chamada mais interna.
+    """
+    innermost = _frame_name(frame)
+    current = frame
+    while current is not None:
+        if os.path.dirname(os.path.abspath(current.f_code.co_filename)) == _BOT_DIR:
+            return _frame_name(current), innermost
+        current = current.f_back
+    return innermost, innermost
+
+class LoopStallDetector:
+    """Mede o atraso do event loop e identifica a chamada que o bloqueou
+
+    Uma corrotina no loop registra um heartbeat a cada `interval` segundos e
+    mede o atraso do sleep. Uma thread auxiliar confere o heartbeat: se ele
+    ficar parado por mais de `threshold` segundos, amostra a pilha da thread do
+    loop (sys._current_frames) até o loop voltar e registra o local mais
+    frequente nas amostras.
+    """
+
+    def __init__(self, threshold=0.25, interval=0.1, sample_interval=0.02):
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.stalls_by_site = Counter()
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Inicia o detector; deve ser chamado de dentro do event loop monitorado"""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name='loop-stall-detector', daemon=True)
+        self._thread.start()
+        logger.info(f"Detector de travamentos do event loop ativo (limite {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            EVENT_LOOP_LAG.observe(max(0.0, now - started_at - self.interval))
+
+    def _watch(self):
+        samples = Counter()
+        stall_beat = None
+        stack = None
+        blocking_call = None
+        while not self._stop.wait(self.sample_interval):
+            last_beat = self._last_beat
+            if time.monotonic() - last_beat - self.interval > self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                site, innermost = describe_blocking_frame(frame)
+                if stall_beat is None:
+                    stall_beat = last_beat
+                    stack = ''.join(traceback.format_stack(frame)[-STACK_LOG_DEPTH:])
+                    blocking_call = innermost
+                samples[site] += 1
+                del frame
+            elif stall_beat is not None:
+                self._report(samples, last_beat - stall_beat - self.interval, blocking_call, stack)
+                samples = Counter()
+                stall_beat = None
+
+    def _report(self, samples, duration, blocking_call, stack):
+        site, count = samples.most_common(1)[0]
+        self.stalls_by_site[site] += 1
+        EVENT_LOOP_STALLS.inc(site=site)
+        logger.warning(
+            f"Event loop bloqueado por {duration * 1000:.0f}ms em {site}",
+            extra={
+                'stage': 'loop_stall',
+                'site': site,
+                'blocking_call': blocking_call,
+                'stall_ms': round(duration * 1000, 1),
+                'samples': sum(samples.values()),
+                'site_samples': count,
+                'stack': stack,
+            }
+        )
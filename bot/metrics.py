@@ -0,0 +1,329 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Buckets padrão (segundos) para latências de chamadas de API e etapas dos pedidos
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger(__name__)
+
+_registry = []  # Métricas registradas, na ordem de criação
+_routes = {}  # Caminho -> função que retorna (status, content type, corpo)
+_server = None
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Base das métricas: guarda nome, ajuda e rótulos e se registra na exportação"""
+    type_name = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Rótulos esperados para {self.name}: {self.label_names}")
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+class Counter(_Metric):
+    """Contador monotônico"""
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(_Metric):
+    """Valor instantâneo; pode ser calculado na leitura através de uma função"""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function, **labels):
+        """Usa o retorno de function() como valor no momento da exportação"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                values[key] = function()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values.items()]
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos, no formato do Prometheus"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # Mapeia rótulos -> [contagens por bucket, soma, total]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mede a duração do bloco e registra no histograma"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(series[0]), series[1], series[2]) for key, series in self._series.items()]
+        lines = []
+        for key, counts, total_sum, total_count in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, ('le', _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{labels} {total_count}")
+        return lines
+
+def render_metrics():
+    """Gera o texto de exportação de todas as métricas (formato de texto do Prometheus)"""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def add_route(path, handler):
+    """Serve `path` no mesmo servidor das métricas
+
+    handler() roda na thread do servidor HTTP (nunca no event loop) e retorna
+    uma tupla (status, content type, corpo).
+    """
+    _routes[path] = handler
+
+def _metrics_route():
+    return 200, 'text/plain; version=0.0.4; charset=utf-8', render_metrics()
+
+add_route('/metrics', _metrics_route)
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        handler = _routes.get(self.path.split('?')[0])
+        if handler is None:
+            self.send_error(404)
+            return
+        try:
+            status, content_type, body = handler()
+        except Exception as e:
+            logger.error(f"Erro ao responder {self.path}: {e}")
+            self.send_error(500)
+            return
+        body = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Não registra cada coleta do Prometheus
+        pass
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Inicia o endpoint /metrics (e as rotas de add_route) em uma thread separada (não bloqueia o event loop)
+
+    Returns:
+        O servidor HTTP, ou None se a porta for 0 (exportação desativada)
+    """
+    global _server
+    if not port:
+        return None
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"Métricas disponíveis em http://{host}:{port}/metrics")
+    return _server
+
+def stop_metrics_server():
+    """Encerra o servidor de métricas, se estiver rodando"""
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+# Métricas do bot
+FIRESTORE_LATENCY = Histogram(
+    'ffxivbot_firestore_operation_seconds',
+    'Duração das chamadas ao Firestore',
+    labels=('operation',)
+)
+FIRESTORE_ERRORS = Counter(
+    'ffxivbot_firestore_errors_total',
+    'Chamadas ao Firestore que falharam',
+    labels=('operation',)
+)
+DISCORD_API_LATENCY = Histogram(
+    'ffxivbot_discord_api_seconds',
+    'Duração das chamadas à API do Discord feitas pelo bot (incluindo novas tentativas)',
+    labels=('operation',)
+)
+DISCORD_API_RETRIES = Counter(
+    'ffxivbot_discord_api_retries_total',
+    'Novas tentativas de chamadas à API do Discord',
+    labels=('operation',)
+)
+ORDER_STAGE_LATENCY = Histogram(
+    'ffxivbot_order_stage_seconds',
+    'Tempo desde a chegada do pedido no listener até o fim de cada etapa',
+    labels=('stage',)
+)
+INTERACTION_LATENCY = Histogram(
+    'ffxivbot_interaction_action_seconds',
+    'Tempo entre o clique em um botão e o fim da ação correspondente',
+    labels=('action',)
+)
+INTERACTIONS = Counter(
+    'ffxivbot_interactions_total',
+    'Cliques em botões de pedidos',
+    labels=('action', 'result')
+)
+CACHE_SIZE = Gauge(
+    'ffxivbot_cache_entries',
+    'Número de entradas nos caches em memória',
+    labels=('cache',)
+)
+GATEWAY_LATENCY = Gauge(
+    'ffxivbot_gateway_latency_seconds',
+    'Latência do heartbeat do gateway do Discord'
+)
+SUPERVISED_SERVICES = Gauge(
+    'ffxivbot_supervised_services_live',
+    'Listeners e tarefas em segundo plano ativos',
+    labels=('kind',)
+)
+SERVICE_RESTARTS = Counter(
+    'ffxivbot_service_restarts_total',
+    'Reinícios de listeners e tarefas que pararam',
+    labels=('service',)
+)
+EVENT_LOOP_LAG = Histogram(
+    'ffxivbot_event_loop_lag_seconds',
+    'Atraso do event loop medido pelo heartbeat do detector de travamentos',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+EVENT_LOOP_STALLS = Counter(
+    'ffxivbot_event_loop_stalls_total',
+    'Travamentos do event loop acima do limite, por função do bot que bloqueou',
+    labels=('site',)
+)
+WORK_ASSIGNMENTS = Counter(
+    'ffxivbot_work_assignments_total',
+    'Trabalhos enviados aos funcionários: atribuídos automaticamente ou postados para aceite',
+    labels=('tenant', 'result')
+)
+DEBOUNCED_UPDATES = Counter(
+    'ffxivbot_debounced_updates_total',
+    'Atualizações agrupadas de mensagens: enviadas ou substituídas por uma mais recente',
+    labels=('name', 'result')
+)
+FIRESTORE_RETRIES = Counter(
+    'ffxivbot_firestore_retries_total',
+    'Novas tentativas de operações do Firestore após erros passageiros',
+    labels=('operation',)
+)
+FIRESTORE_CIRCUIT_STATE = Gauge(
+    'ffxivbot_firestore_circuit_state',
+    'Estado do circuit breaker do Firestore: 0 fechado, 1 meio aberto, 2 aberto'
+)
+BUFFERED_WRITES = Counter(
+    'ffxivbot_firestore_buffered_writes_total',
+    'Gravações de status adiadas durante quedas do Firestore: guardadas, regravadas ou descartadas',
+    labels=('result',)
+)
+SALES_REPORTS = Counter(
+    'ffxivbot_sales_reports_total',
+    'Relatórios de vendas gerados, por origem dos totais (agregação no Firestore ou rollup em memória)',
+    labels=('tenant', 'source')
+)
+TENANT_SEND_WAITS = Counter(
+    'ffxivbot_tenant_send_waits_total',
+    'Envios ao Discord que aguardaram o orçamento de envios da loja',
+    labels=('tenant',)
+)
+ADMIN_FEED_MESSAGES = Counter(
+    'ffxivbot_admin_feed_messages_total',
+    'Mensagens de avisos do canal de administração, por rota (pool de webhooks ou envio do bot)',
+    labels=('tenant', 'route')
+)
+ADMIN_ORDER_NOTIFICATIONS = Counter(
+    'ffxivbot_admin_order_notifications_total',
+    'Novos pedidos anunciados aos administradores: em mensagem própria ou no resumo',
+    labels=('tenant', 'mode')
+)
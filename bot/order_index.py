@@ -0,0 +1,105 @@
+import bisect
+
+# Tamanho do sufixo exibido para a equipe (#xxxxxx)
+SUFFIX_LENGTH = 6
+
+class OrderIndex:
+    """Índice em memória do sufixo exibido (#xxxxxx) para o ID completo do pedido
+
+    É alimentado pelo listener do Firestore e responde às buscas sem acessar o
+    banco. Os sufixos ficam em uma lista ordenada, então o autocomplete por
+    prefixo é uma busca binária em vez de uma varredura.
+    """
+
+    def __init__(self, suffix_length=SUFFIX_LENGTH):
+        self.suffix_length = suffix_length
+        self._ids_by_suffix = {}  # Mapeia sufixo (minúsculo) -> set de IDs completos
+        self._sorted_suffixes = []  # Sufixos ordenados para busca por prefixo
+        self._status = {}  # Mapeia order_id -> status atual
+
+    def __len__(self):
+        return len(self._status)
+
+    def __contains__(self, order_id):
+        return order_id in self._status
+
+    def _suffix(self, order_id):
+        return order_id[-self.suffix_length:].lower()
+
+    def upsert(self, order_id, status=None):
+        """Adiciona o pedido ao índice ou atualiza seu status"""
+        if order_id not in self._status:
+            suffix = self._suffix(order_id)
+            ids = self._ids_by_suffix.get(suffix)
+            if ids is None:
+                ids = self._ids_by_suffix[suffix] = set()
+                bisect.insort(self._sorted_suffixes, suffix)
+            ids.add(order_id)
+        self._status[order_id] = status
+
+    def remove(self, order_id):
+        """Remove o pedido do índice"""
+        if order_id not in self._status:
+            return
+        del self._status[order_id]
+        suffix = self._suffix(order_id)
+        ids = self._ids_by_suffix[suffix]
+        ids.discard(order_id)
+        if not ids:
+            del self._ids_by_suffix[suffix]
+            position = bisect.bisect_left(self._sorted_suffixes, suffix)
+            del self._sorted_suffixes[position]
+
+    def apply_change(self, change_type, order_id, order_data):
+        """Aplica uma mudança do listener do Firestore (ADDED, MODIFIED ou REMOVED)"""
+        if change_type == 'REMOVED':
+            self.remove(order_id)
+        else:
+            self.upsert(order_id, (order_data or {}).get('status'))
+
+    def get_status(self, order_id):
+        return self._status.get(order_id)
+
+    def resolve(self, text):
+        """Retorna os IDs que correspondem a um ID completo, '#xxxxxx' ou 'xxxxxx'
+
+        Os IDs do Firestore diferenciam maiúsculas de minúsculas: o sufixo vale
+        primeiro com a caixa exata e, só se nenhum pedido tiver essa caixa,
+        ignorando-a (ex.: nomes de canais, que o Discord deixa em minúsculas).
+        """
+        text = (text or '').strip().lstrip('#')
+        if not text:
+            return []
+        if text in self._status:
+            return [text]
+        if len(text) == self.suffix_length:
+            ids = self._ids_by_suffix.get(text.lower(), ())
+            return sorted([order_id for order_id in ids if order_id.endswith(text)] or ids)
+        return []
+
+    def search(self, prefix, limit=25, statuses=None):
+        """Lista até `limit` pedidos cujo sufixo começa com `prefix`
+
+        Args:
+            prefix: Início do sufixo digitado (com ou sem '#')
+            limit: Número máximo de resultados
+            statuses: Se informado, considera apenas pedidos com esses status
+
+        Returns:
+            Lista de tuplas (order_id, status)
+        """
+        prefix = (prefix or '').strip().lstrip('#').lower()
+        results = []
+        position = bisect.bisect_left(self._sorted_suffixes, prefix)
+        while position < len(self._sorted_suffixes):
+            suffix = self._sorted_suffixes[position]
+            if not suffix.startswith(prefix):
+                break
+            position += 1
+            for order_id in sorted(self._ids_by_suffix[suffix]):
+                status = self._status[order_id]
+                if statuses is None or status in statuses:
+                    results.append((order_id, status))
+                    if len(results) >= limit:
+                        return results
+        return results
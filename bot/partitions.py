@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import importlib
+import itertools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Chamadas simultâneas executadas por cada processo de partição
+WORKER_THREADS = 8
+
+class PartitionError(RuntimeError):
+    """Falha ao executar uma chamada em um processo de partição"""
+
+def partition_for(key, count):
+    """Partição estável de uma chave (ID do pedido): o mesmo pedido vai sempre para o mesmo processo"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count
+
+def _resolve(module_name, name):
+    return getattr(importlib.import_module(module_name), name)
+
+def _worker_main(connection, index, initializer, initargs, threads):
+    """Laço do processo de partição: executa as funções recebidas pelo pipe em um pool de threads"""
+    if initializer is not None:
+        initializer(*initargs)
+    send_lock = threading.Lock()
+
+    def run(request_id, module_name, name, args):
+        try:
+            response = (request_id, True, _resolve(module_name, name)(*args))
+        except Exception as e:
+            response = (request_id, False, f"{type(e).__name__}: {e}")
+        with send_lock:
+            try:
+                connection.send(response)
+            except Exception as e:
+                # O resultado não pôde ser serializado; o pickle falha antes de escrever no pipe
+                connection.send((request_id, False, f"Resultado não serializável: {e}"))
+
+    with ThreadPoolExecutor(threads, thread_name_prefix=f'partition-{index}') as executor:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            executor.submit(run, *message)
+
+class _Worker:
+    """Processo de uma partição e o pipe usado para conversar com ele"""
+
+    def __init__(self, index, context, initializer, initargs, threads):
+        self.index = index
+        self.connection, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child, index, initializer, initargs, threads),
+            name=f'order-partition-{index}',
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+        self._pending = {}  # Mapeia request_id -> future aguardando a resposta
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, name=f'order-partition-{index}-reader', daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, request_id, function, args, future):
+        with self._lock:
+            self._pending[request_id] = future
+        try:
+            self.connection.send((request_id, function.__module__, function.__qualname__, args))
+        except Exception:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise
+
+    def _read(self):
+        # Lê as respostas em uma thread e entrega os resultados no event loop de quem chamou
+        while True:
+            try:
+                request_id, ok, value = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.get_loop().call_soon_threadsafe(_resolve_future, future, ok, value)
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.get_loop().call_soon_threadsafe(
+                _resolve_future, future, False, f"Processo da partição {self.index} encerrado"
+            )
+
+    def stop(self, timeout):
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.connection.close()
+
+def _resolve_future(future, ok, value):
+    if future.done():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(PartitionError(value))
+
+class PartitionPool:
+    """Processos que dividem o trabalho dos pedidos por hash do ID
+
+    O processo principal (coordenador) mantém a conexão com o gateway e envia
+    cada chamada ao processo dono do pedido por um pipe local. As funções
+    precisam ser importáveis pelo nome no processo de destino e receber e
+    retornar valores serializáveis com pickle.
+
+    Args:
+        count: Número de processos
+        initializer: Função chamada no início de cada processo (ex.: configurar logs)
+        initargs: Argumentos do initializer
+        threads: Chamadas simultâneas por processo
+    """
+
+    def __init__(self, count, initializer=None, initargs=(), threads=WORKER_THREADS):
+        if count < 1:
+            raise ValueError("O número de partições deve ser positivo")
+        self.count = count
+        self._initializer = initializer
+        self._initargs = initargs
+        self._threads = threads
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = [None] * count
+        self._request_ids = itertools.count()
+        self._round_robin = itertools.cycle(range(count))
+        self.restarts = 0
+
+    def start(self):
+        for index in range(self.count):
+            self._worker(index)
+        logger.info(f"{self.count} processos de partição de pedidos iniciados")
+
+    def _worker(self, index):
+        worker = self._workers[index]
+        if worker is None or not worker.alive:
+            if worker is not None:
+                self.restarts += 1
+                logger.warning(f"Processo da partição {index} parou; reiniciando")
+                worker.stop(timeout=1)
+            worker = self._workers[index] = _Worker(index, self._context, self._initializer, self._initargs, self._threads)
+        return worker
+
+    def live_count(self):
+        return sum(1 for worker in self._workers if worker is not None and worker.alive)
+
+    def pending(self):
+        """Chamadas aguardando resposta, por partição"""
+        return [len(worker) if worker is not None else 0 for worker in self._workers]
+
+    def partition_for(self, key):
+        return partition_for(key, self.count)
+
+    async def call(self, key, function, *args):
+        """Executa function(*args) no processo dono de `key` (ou no próximo da fila, se key for None)"""
+        index = self.partition_for(key) if key is not None else next(self._round_robin)
+        future = asyncio.get_running_loop().create_future()
+        self._worker(index).submit(next(self._request_ids), function, args, future)
+        return await future
+
+    def stop(self, timeout=5):
+        for worker in self._workers:
+            if worker is not None:
+                worker.stop(timeout)
+        self._workers = [None] * self.count
+
+# Pool em uso; None mantém todo o trabalho no processo atual
+_pool = None
+
+def start_pool(count, initializer=None, initargs=()):
+    """Inicia os processos de partição (count 0 mantém tudo no processo atual)"""
+    global _pool
+    if count and _pool is None:
+        _pool = PartitionPool(count, initializer, initargs)
+        _pool.start()
+    return _pool
+
+def stop_pool(timeout=5):
+    global _pool
+    if _pool is not None:
+        _pool.stop(timeout)
+        _pool = None
+
+def get_pool():
+    return _pool
+
+async def run_partitioned(key, function, *args):
+    """Executa function(*args) no processo dono de `key`, ou em uma thread deste processo sem pool"""
+    if _pool is None:
+        # Em uma thread, a chamada bloqueante ao Firestore não trava o event loop
+        return await asyncio.to_thread(function, *args)
+    return await _pool.call(key, function, *args)
@@ -0,0 +1,143 @@
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import yappi
+except ImportError:  # yappi é opcional; sem ele o perfil de tempo usa cProfile
+    yappi = None
+
+logger = logging.getLogger(__name__)
+
+# Modos de perfil: tempo real (inclui espera), tempo de CPU e alocações de memória
+PROFILE_MODES = ('wall', 'cpu', 'memory')
+
+# Duração máxima de uma captura
+MAX_PROFILE_SECONDS = 300
+
+# Frames guardados por alocação no tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+# Garante um perfil por vez; fora da captura nenhum profiler fica ativo
+_profile_lock = asyncio.Lock()
+
+def is_profiling():
+    return _profile_lock.locked()
+
+def _short_location(filename, line, function):
+    if filename == '~':  # Funções nativas
+        return function
+    return f"{os.path.basename(filename)}:{line} {function}"
+
+def _summarize_pstats(path, top_n):
+    """Lista as funções com maior tempo próprio de um arquivo .pstats"""
+    stats = pstats.Stats(path).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top_n]
+    lines = [f"{'próprio':>9} {'total':>9} {'chamadas':>9}  função"]
+    for (filename, line, function), (_, calls, own_time, total_time, _) in rows:
+        lines.append(f"{own_time:8.3f}s {total_time:8.3f}s {calls:>9}  {_short_location(filename, line, function)}")
+    return lines
+
+async def _profile_time(mode, duration, top_n, path):
+    if yappi is not None:
+        # yappi acompanha as trocas de corrotina, atribuindo o tempo a cada uma
+        yappi.clear_stats()
+        yappi.set_clock_type(mode)
+        yappi.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            yappi.stop()
+        await asyncio.to_thread(yappi.get_func_stats().save, path, type='pstat')
+        yappi.clear_stats()
+        engine = 'yappi'
+    else:
+        # cProfile cobre apenas a thread do event loop, onde o perfil é iniciado
+        profiler = cProfile.Profile(time.process_time if mode == 'cpu' else time.perf_counter)
+        profiler.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+        await asyncio.to_thread(profiler.dump_stats, path)
+        engine = 'cProfile'
+
+    lines = await asyncio.to_thread(_summarize_pstats, path, top_n)
+    return f"Perfil {mode} ({engine}) de {duration}s", lines
+
+def _diff_snapshots(before, after, top_n, path):
+    """Grava o snapshot final e a diferença completa; retorna as top_n linhas"""
+    ignored = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    )
+    differences = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), 'lineno')
+    after.dump(f"{path}.snapshot")
+    with open(f"{path}.txt", 'w', encoding='utf-8') as output:
+        output.write('\n'.join(str(difference) for difference in differences[:500]))
+
+    lines = [f"{'Δ tamanho':>11} {'Δ blocos':>9}  local"]
+    for difference in differences[:top_n]:
+        frame = difference.traceback[0]
+        lines.append(
+            f"{difference.size_diff / 1024:>9.1f}KiB {difference.count_diff:>9}  "
+            f"{os.path.basename(frame.filename)}:{frame.lineno}"
+        )
+    return lines
+
+async def _profile_memory(duration, top_n, path):
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(duration)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    lines = await asyncio.to_thread(_diff_snapshots, before, after, top_n, path)
+    return f"Diferença de memória (tracemalloc) em {duration}s", lines
+
+async def capture_profile(mode, duration, top_n=15, output_dir='profiles'):
+    """Captura um perfil do processo em execução por `duration` segundos
+
+    Args:
+        mode: 'wall' ou 'cpu' (tempo por função/corrotina) ou 'memory' (diferença do tracemalloc)
+        duration: Duração da captura em segundos
+        top_n: Número de linhas do resumo
+        output_dir: Pasta onde o resultado completo é gravado
+
+    Returns:
+        Tupla (caminho do arquivo, título, linhas do resumo)
+
+    Raises:
+        ValueError: Se o modo ou a duração forem inválidos
+        RuntimeError: Se já houver uma captura em andamento
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Modo inválido. Use um dos seguintes: {', '.join(PROFILE_MODES)}")
+    if not 0 < duration <= MAX_PROFILE_SECONDS:
+        raise ValueError(f"A duração deve estar entre 1 e {MAX_PROFILE_SECONDS} segundos")
+    if _profile_lock.locked():
+        raise RuntimeError("Já existe um perfil em andamento")
+
+    async with _profile_lock:
+        os.makedirs(output_dir, exist_ok=True)
+        base_path = os.path.join(output_dir, f"{mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        logger.info(f"Iniciando perfil {mode} por {duration}s")
+        if mode == 'memory':
+            title, lines = await _profile_memory(duration, top_n, base_path)
+            path = f"{base_path}.txt"
+        else:
+            path = f"{base_path}.pstats"
+            title, lines = await _profile_time(mode, duration, top_n, path)
+        logger.info(f"Perfil {mode} gravado em {path}")
+        return path, title, lines
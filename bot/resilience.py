@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Erros do google-api-core (e do gRPC) que indicam indisponibilidade passageira do Firestore
+TRANSIENT_ERROR_NAMES = frozenset({
+    'ServiceUnavailable', 'DeadlineExceeded', 'InternalServerError', 'Aborted', 'ResourceExhausted',
+    'Unknown', 'GatewayTimeout', 'BadGateway', 'RetryError', 'TooManyRequests',
+    'TimeoutError', 'ConnectionError', 'CircuitOpenError',
+})
+
+class CircuitOpenError(RuntimeError):
+    """O circuit breaker está aberto: a chamada falha na hora, sem acessar o serviço"""
+
+def is_transient_message(message):
+    """Erro descrito como "Tipo: detalhe" (processos de partição, lotes) é passageiro"""
+    return str(message).split(':', 1)[0] in TRANSIENT_ERROR_NAMES
+
+def is_transient(error):
+    """Erro passageiro (indisponibilidade, prazo, conexão), que vale repetir ou adiar
+
+    Erros vindos dos processos de partição chegam como PartitionError com a
+    mensagem "Tipo: detalhe", então o nome do tipo também é procurado no texto;
+    um processo de partição encerrado também conta como passageiro.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    if type(error).__name__ == 'PartitionError':
+        return is_transient_message(error) or 'encerrado' in str(error)
+    return False
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    """Espera antes da tentativa `attempt` (1 = primeira repetição): backoff exponencial com full jitter"""
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """Circuit breaker de um serviço externo
+
+    Fechado: as chamadas passam. Depois de `failure_threshold` falhas
+    passageiras seguidas ele abre e as chamadas falham na hora com
+    CircuitOpenError, sem ocupar threads esperando o prazo. Passado
+    `reset_timeout`, fica meio aberto: uma única chamada de teste passa e, se
+    der certo, o circuito fecha; se falhar, abre de novo.
+
+    Args:
+        name: Nome usado nos logs
+        failure_threshold: Falhas seguidas que abrem o circuito
+        reset_timeout: Segundos aberto antes da chamada de teste
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.opened = 0  # Vezes que o circuito abriu
+
+    @property
+    def state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        """Reserva a chamada; CircuitOpenError se o circuito estiver aberto ou já houver um teste em andamento"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        raise CircuitOpenError(f"Circuito {self.name} aberto")
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info(f"Circuito {self.name} fechado: serviço respondeu")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.opened += 1
+                logger.warning(f"Circuito {self.name} aberto após {self._failures} falhas seguidas")
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+        self._probing = False
+
+    def release(self):
+        """Libera a chamada reservada sem resultado (ex.: cancelada)"""
+        self._probing = False
+
+async def call_with_retries(call, breaker, attempts=3, timeout=10.0, base_delay=0.5, max_delay=5.0, on_retry=None):
+    """Executa `await call()` com prazo, novas tentativas com jitter e o circuit breaker
+
+    Só erros passageiros são repetidos e contam como falha para o breaker;
+    outros erros (ex.: documento inexistente) sobem na hora. Com o circuito
+    aberto, falha com CircuitOpenError sem chamar o serviço.
+
+    O prazo só deixa de esperar pela tentativa: uma chamada que roda em
+    thread ou em outro processo não é interrompida e ainda pode ser aplicada
+    depois do timeout, inclusive depois de uma nova tentativa. Por isso só
+    devem passar por aqui operações idempotentes, como as gravações de status.
+
+    Args:
+        call: Função sem argumentos que retorna a corrotina da operação
+        attempts: Número máximo de tentativas
+        timeout: Prazo de cada tentativa, em segundos
+        on_retry: Função opcional chamada com o erro antes de cada nova tentativa
+    """
+    for attempt in range(1, attempts + 1):
+        breaker.before_call()
+        try:
+            result = await asyncio.wait_for(call(), timeout)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # O serviço respondeu; o erro é da operação, não da disponibilidade
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt == attempts or breaker.state == CircuitBreaker.OPEN:
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay))
+        else:
+            breaker.record_success()
+            return result
+
+class WriteBuffer:
+    """Fila durável de gravações adiadas enquanto o serviço está indisponível
+
+    Cada gravação é anexada a um arquivo JSON lines com fsync antes de a
+    chamada retornar, então sobrevive a um reinício. As gravações são
+    reaplicadas na ordem em que entraram; o arquivo é reescrito (de forma
+    atômica) depois de cada rodada de reaplicação. Reaplicar uma gravação já
+    aplicada é inofensivo para gravações idempotentes como as de status.
+
+    Args:
+        path: Arquivo da fila (vazio mantém a fila só em memória)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = []
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as buffer_file:
+                for line in buffer_file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._entries.append(json.loads(line))
+                    except ValueError:
+                        # Linha incompleta de uma gravação interrompida
+                        logger.warning(f"Linha inválida ignorada na fila de gravações {path}")
+            if self._entries:
+                logger.info(f"{len(self._entries)} gravações adiadas carregadas de {path}")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        """Anexa as gravações com um único fsync (bloqueia: no event loop, use asyncio.to_thread)"""
+        with self._lock:
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as buffer_file:
+                    for entry in entries:
+                        buffer_file.write(json.dumps(entry) + '\n')
+                    buffer_file.flush()
+                    os.fsync(buffer_file.fileno())
+            self._entries.extend(entries)
+
+    def peek(self, count=None):
+        """Primeiras gravações da fila, na ordem em que entraram"""
+        return list(self._entries[:count])
+
+    def discard(self, count):
+        """Remove as `count` primeiras gravações (já aplicadas) e reescreve o arquivo (bloqueia, como extend)"""
+        with self._lock:
+            del self._entries[:count]
+            if self.path:
+                temporary = self.path + '.tmp'
+                with open(temporary, 'w', encoding='utf-8') as buffer_file:
+                    for entry in self._entries:
+                        buffer_file.write(json.dumps(entry) + '\n')
+                    buffer_file.flush()
+                    os.fsync(buffer_file.fileno())
+                os.replace(temporary, self.path)
+
+    def latest(self, key, field):
+        """Valor mais recente de `field` entre as gravações pendentes com a chave `key`"""
+        for entry in reversed(self._entries):
+            if entry.get('key') == key:
+                return entry.get(field)
+        return None
@@ -0,0 +1,118 @@
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from tenants import current_tenant_var
+
+# Pedido sendo processado na task atual
+current_order_id = contextvars.ContextVar('order_id', default=None)
+
+# Campos padrão do LogRecord que não devem ser repetidos no JSON
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+_log_queue = None
+
+def order_trace_id(order_id):
+    """Retorna o trace id estável de um pedido
+
+    É derivado do ID do pedido, então o mesmo pedido tem o mesmo trace id no
+    listener, nos botões e após reinícios do bot, sem precisar de cache.
+    """
+    return hashlib.sha1(order_id.encode('utf-8')).hexdigest()[:16]
+
+def bind_order(order_id):
+    """Associa o pedido à task atual; os logs seguintes carregam seu trace id"""
+    current_order_id.set(order_id)
+
+class TraceContextFilter(logging.Filter):
+    """Anexa loja, order_id e trace_id ao registro no momento do log (na thread de origem)"""
+
+    def filter(self, record):
+        tenant = current_tenant_var.get()
+        if tenant is not None and not getattr(record, 'tenant', None):
+            record.tenant = tenant.id
+        order_id = getattr(record, 'order_id', None) or current_order_id.get()
+        if order_id:
+            record.order_id = order_id
+            if not getattr(record, 'trace_id', None):
+                record.trace_id = order_trace_id(order_id)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logging(level='INFO', stream=None):
+    """Direciona todos os logs para uma fila escrita por uma thread em segundo plano
+
+    O event loop apenas enfileira o registro; a escrita no stdout (ou no
+    stream informado) acontece na thread do QueueListener.
+
+    Returns:
+        O QueueListener em execução
+    """
+    global _listener, _log_queue
+    if _listener is not None:
+        return _listener
+
+    log_queue = _log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(TraceContextFilter())
+
+    output_handler = logging.StreamHandler(stream or sys.stdout)
+    output_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Esvazia a fila de logs e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def pending_log_records():
+    """Registros de log ainda não escritos pela thread em segundo plano"""
+    return _log_queue.qsize() if _log_queue is not None else 0
+
+def log_order_stage(logger, order_id, stage, elapsed=None, **fields):
+    """Registra uma etapa do ciclo de vida do pedido com seu trace id
+
+    Args:
+        logger: Logger do módulo
+        order_id: ID do pedido
+        stage: Nome da etapa (ex.: 'customer_dm', 'approved', 'completed')
+        elapsed: Duração da etapa em segundos, se medida
+        **fields: Campos adicionais incluídos no JSON
+    """
+    extra = {'order_id': order_id, 'trace_id': order_trace_id(order_id), 'stage': stage}
+    if elapsed is not None:
+        extra['elapsed_ms'] = round(elapsed * 1000, 1)
+    extra.update(fields)
+    logger.info(f"Pedido #{order_id[-6:]} - etapa '{stage}'", extra=extra)
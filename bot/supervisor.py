@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from metrics import SUPERVISED_SERVICES, SERVICE_RESTARTS
+
+logger = logging.getLogger(__name__)
+
+# Intervalo padrão entre as verificações do watchdog
+WATCHDOG_INTERVAL_SECONDS = 60
+
+class SupervisedService:
+    """Listener ou tarefa em segundo plano acompanhada pelo Supervisor
+
+    Args:
+        name: Nome do serviço (usado em logs e métricas)
+        kind: 'listener' ou 'task'
+        start: Função que inicia o serviço e retorna seu handle
+        is_alive: Função que recebe o handle e diz se o serviço está rodando
+        stop: Função opcional que recebe o handle e encerra o serviço
+    """
+
+    def __init__(self, name, kind, start, is_alive, stop=None):
+        self.name = name
+        self.kind = kind
+        self._start = start
+        self._is_alive = is_alive
+        self._stop = stop
+        self.handle = None
+        self.restarts = 0
+
+    @property
+    def alive(self):
+        if self.handle is None:
+            return False
+        try:
+            return bool(self._is_alive(self.handle))
+        except Exception:
+            return False
+
+    def start(self):
+        self.handle = self._start()
+
+    def stop(self):
+        if self.handle is not None and self._stop is not None:
+            try:
+                self._stop(self.handle)
+            except Exception as e:
+                logger.error(f"Erro ao encerrar o serviço '{self.name}': {e}")
+        self.handle = None
+
+class Supervisor:
+    """Inicia listeners e tarefas uma única vez e reinicia apenas os que pararam
+
+    O on_ready roda de novo a cada reconexão do gateway; chamar
+    ensure_running() nele é idempotente: serviços ativos não são tocados, então
+    nunca existem dois listeners do Firestore ou duas cópias de uma tarefa.
+    """
+
+    def __init__(self):
+        self._services = {}
+        self._watchdog = None
+
+    def add_service(self, name, kind, start, is_alive, stop=None):
+        if name in self._services:
+            raise ValueError(f"Serviço já registrado: {name}")
+        if not any(service.kind == kind for service in self._services.values()):
+            SUPERVISED_SERVICES.set_function(lambda kind=kind: self.live_count(kind), kind=kind)
+        service = self._services[name] = SupervisedService(name, kind, start, is_alive, stop)
+        return service
+
+    def add_listener(self, name, start):
+        """Registra listeners do Firestore: start() retorna a lista de watches (is_active/unsubscribe)
+
+        O serviço só está ativo se todos os watches estiverem; se um parar, todos são reiniciados.
+        """
+        def stop(watches):
+            for watch in watches:
+                watch.unsubscribe()
+        return self.add_service(
+            name, 'listener', start,
+            is_alive=lambda watches: all(getattr(watch, 'is_active', True) for watch in watches),
+            stop=stop
+        )
+
+    def add_loop(self, name, loop):
+        """Registra uma tarefa discord.ext.tasks.Loop"""
+        def start():
+            loop.start()
+            return loop
+        return self.add_service(name, 'task', start, is_alive=lambda task: task.is_running(), stop=lambda task: task.cancel())
+
+    def get(self, name):
+        service = self._services.get(name)
+        return service.handle if service else None
+
+    def live_count(self, kind):
+        return sum(1 for service in self._services.values() if service.kind == kind and service.alive)
+
+    def status(self):
+        """Lista (nome, tipo, ativo, reinícios) de cada serviço"""
+        return [(service.name, service.kind, service.alive, service.restarts) for service in self._services.values()]
+
+    def ensure_running(self):
+        """Inicia os serviços que não estão rodando; os ativos não são tocados
+
+        Returns:
+            Nomes dos serviços iniciados ou reiniciados
+        """
+        started = []
+        for service in self._services.values():
+            if service.alive:
+                continue
+            if service.handle is not None:
+                # Já foi iniciado antes e parou: encerra o que restou e inicia de novo
+                service.restarts += 1
+                SERVICE_RESTARTS.inc(service=service.name)
+                logger.warning(f"Serviço '{service.name}' parou; reiniciando", extra={'service': service.name})
+                service.stop()
+            try:
+                service.start()
+                started.append(service.name)
+            except Exception as e:
+                logger.error(f"Erro ao iniciar o serviço '{service.name}': {e}", extra={'service': service.name})
+
+        kinds = {service.kind for service in self._services.values()}
+        summary = ', '.join(
+            f"{self.live_count(kind)}/{sum(1 for s in self._services.values() if s.kind == kind)} {kind}"
+            for kind in sorted(kinds)
+        )
+        if started:
+            logger.info(f"Serviços iniciados: {', '.join(started)} (ativos: {summary})")
+        else:
+            logger.info(f"Todos os serviços já estavam ativos ({summary})")
+        return started
+
+    def start_watchdog(self, interval=WATCHDOG_INTERVAL_SECONDS):
+        """Verifica periodicamente os serviços e reinicia os que pararam"""
+        if self._watchdog is not None and not self._watchdog.done():
+            return self._watchdog
+        self._watchdog = asyncio.get_running_loop().create_task(self._watch(interval))
+        return self._watchdog
+
+    async def _watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            if any(not service.alive for service in self._services.values()):
+                self.ensure_running()
+
+    def stop_all(self):
+        """Encerra o watchdog e todos os serviços"""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        for service in self._services.values():
+            service.stop()
@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+import config
+from metrics import TENANT_SEND_WAITS
+from order_index import OrderIndex
+from customer_summary import CustomerSummaries
+from analytics import SalesRollup
+from assignment import FIRST_REACT, AssignmentEngine, WorkerProfile, load_workers
+
+logger = logging.getLogger(__name__)
+
+# Coleção de pedidos padrão do site
+DEFAULT_ORDERS_COLLECTION = 'orders'
+
+# Envios por segundo ao Discord permitidos por loja (0 desativa o limite)
+DEFAULT_SENDS_PER_SECOND = 5
+
+# Loja associada à task atual (pedido, clique ou comando em andamento)
+current_tenant_var = contextvars.ContextVar('tenant', default=None)
+
+class SendBudget:
+    """Orçamento de envios ao Discord de uma loja (token bucket)
+
+    Uma loja com muito movimento espera pelo próprio orçamento em vez de
+    consumir todo o limite global do bot e atrasar as demais.
+    """
+
+    def __init__(self, tenant_id, rate, burst=None):
+        self.tenant_id = tenant_id
+        self.rate = rate
+        self.capacity = burst or max(1, rate * 2)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    async def acquire(self):
+        """Consome um envio, aguardando se o orçamento estiver esgotado"""
+        if not self.rate:
+            return
+        waited = False
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            if not waited:
+                TENANT_SEND_WAITS.inc(tenant=self.tenant_id)
+                waited = True
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class Tenant:
+    """Uma loja atendida pelo bot: servidor, cargos, canais, coleção de pedidos e caches próprios
+
+    Args:
+        tenant_id: Identificador curto da loja (usado em logs e métricas)
+        guild_id: Servidor do Discord da loja
+        admin_role_id: Cargo dos administradores
+        admin_channel_id: Canal de pedidos dos administradores
+        workers_channel_id: Canal dos funcionários
+        orders_collection: Coleção do Firestore com os pedidos da loja
+        store_id: Valor do campo storeId dos pedidos, quando várias lojas usam a mesma coleção
+        sends_per_second: Orçamento de envios ao Discord da loja
+        name: Nome exibido
+        assignment_policy: Política de distribuição dos trabalhos (ver AssignmentEngine)
+        workers: Funcionários (WorkerProfile) que recebem trabalhos automaticamente
+    """
+
+    def __init__(self, tenant_id, guild_id, admin_role_id, admin_channel_id, workers_channel_id,
+                 orders_collection=DEFAULT_ORDERS_COLLECTION, store_id=None,
+                 sends_per_second=DEFAULT_SENDS_PER_SECOND, name=None,
+                 assignment_policy=FIRST_REACT, workers=()):
+        self.id = tenant_id
+        self.name = name or tenant_id
+        self.guild_id = guild_id
+        self.admin_role_id = admin_role_id
+        self.admin_channel_id = admin_channel_id
+        self.workers_channel_id = workers_channel_id
+        self.orders_collection = orders_collection
+        self.store_id = store_id
+        self.order_index = OrderIndex()
+        self.customer_summaries = CustomerSummaries()
+        self.sales = SalesRollup()
+        self.send_budget = SendBudget(tenant_id, sends_per_second)
+        self.assignment = AssignmentEngine(assignment_policy, workers)
+
+    def __repr__(self):
+        return f"Tenant({self.id!r})"
+
+_tenants = None  # Lojas configuradas; carregadas no primeiro acesso
+_by_guild = {}
+
+def configure(tenants):
+    """Define as lojas atendidas pelo processo
+
+    Raises:
+        ValueError: Se dois tenants usarem o mesmo id ou servidor, ou se
+            compartilharem uma coleção sem storeId para diferenciar os pedidos
+    """
+    global _tenants, _by_guild
+    by_id, by_guild, by_collection = {}, {}, {}
+    for tenant in tenants:
+        if tenant.id in by_id:
+            raise ValueError(f"Loja duplicada: {tenant.id}")
+        if tenant.guild_id in by_guild:
+            raise ValueError(f"As lojas {by_guild[tenant.guild_id].id} e {tenant.id} usam o mesmo servidor")
+        by_id[tenant.id] = tenant
+        by_guild[tenant.guild_id] = tenant
+        by_collection.setdefault(tenant.orders_collection, []).append(tenant)
+    for collection, sharing in by_collection.items():
+        if len(sharing) > 1 and any(tenant.store_id is None for tenant in sharing):
+            raise ValueError(f"Lojas que compartilham a coleção '{collection}' precisam de store_id")
+    _tenants = list(tenants)
+    _by_guild = by_guild
+    return _tenants
+
+def load_tenants(path=None):
+    """Lê as lojas do arquivo TENANTS_FILE (lista JSON) ou, sem ele, das variáveis DISCORD_*
+
+    Cada loja do arquivo tem: id, guild_id, admin_role_id, admin_channel_id,
+    workers_channel_id e, opcionalmente, orders_collection, store_id,
+    sends_per_second, name, assignment_policy e workers (lista no formato
+    do WORKERS_FILE).
+    """
+    path = path if path is not None else config.TENANTS_FILE
+    if not path:
+        return configure([Tenant(
+            'default',
+            config.DISCORD_GUILD_ID,
+            config.DISCORD_ADMIN_ROLE_ID,
+            config.DISCORD_ADMIN_CHANNEL_ID,
+            config.DISCORD_WORKERS_CHANNEL_ID,
+            sends_per_second=config.TENANT_SENDS_PER_SECOND,
+            assignment_policy=config.ASSIGNMENT_POLICY,
+            workers=load_workers(config.WORKERS_FILE)
+        )])
+
+    with open(path, encoding='utf-8') as tenants_file:
+        entries = json.load(tenants_file)
+    tenants = []
+    for entry in entries:
+        try:
+            tenants.append(Tenant(
+                str(entry['id']),
+                int(entry['guild_id']),
+                int(entry['admin_role_id']),
+                int(entry['admin_channel_id']),
+                int(entry['workers_channel_id']),
+                orders_collection=entry.get('orders_collection', DEFAULT_ORDERS_COLLECTION),
+                store_id=entry.get('store_id'),
+                sends_per_second=entry.get('sends_per_second', config.TENANT_SENDS_PER_SECOND),
+                name=entry.get('name'),
+                assignment_policy=entry.get('assignment_policy', config.ASSIGNMENT_POLICY),
+                workers=[WorkerProfile.from_dict(worker) for worker in entry.get('workers', [])]
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Loja inválida em {path}: {entry!r} ({e})") from None
+    logger.info(f"{len(tenants)} lojas carregadas de {path}")
+    return configure(tenants)
+
+def all_tenants():
+    return _tenants if _tenants is not None else load_tenants()
+
+def get_tenant(tenant_id):
+    return next((tenant for tenant in all_tenants() if tenant.id == tenant_id), None)
+
+def order_collections():
+    """Coleções de pedidos distintas (um listener por coleção)"""
+    return list(dict.fromkeys(tenant.orders_collection for tenant in all_tenants()))
+
+def tenant_for_guild(guild_id):
+    all_tenants()
+    return _by_guild.get(guild_id)
+
+def tenant_for_order(order):
+    """Loja de um pedido, pela coleção de origem (`_collection`) e pelo campo storeId"""
+    collection = order.get('_collection')
+    candidates = [
+        tenant for tenant in all_tenants()
+        if collection is None or tenant.orders_collection == collection
+    ]
+    if len(candidates) > 1:
+        candidates = [tenant for tenant in candidates if tenant.store_id == order.get('storeId')]
+    return candidates[0] if len(candidates) == 1 else None
+
+def tenant_for_order_id(order_id):
+    """Loja de um pedido já carregado nos índices em memória"""
+    return next((tenant for tenant in all_tenants() if order_id in tenant.order_index), None)
+
+def bind_tenant(tenant):
+    """Associa a loja à task atual (e às tasks criadas a partir dela)"""
+    current_tenant_var.set(tenant)
+    return tenant
+
+def current_tenant(default=LookupError):
+    """Loja da task atual; com uma única loja configurada, é sempre ela
+
+    Raises:
+        LookupError: Se nenhuma loja estiver associada e houver mais de uma
+    """
+    tenant = current_tenant_var.get()
+    if tenant is not None:
+        return tenant
+    tenants = all_tenants()
+    if len(tenants) == 1:
+        return tenants[0]
+    if default is LookupError:
+        raise LookupError("Nenhuma loja associada à operação atual")
+    return default
@@ -0,0 +1,182 @@
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato do arquivo de trace
+TRACE_FORMAT_VERSION = 1
+
+# Campos do pedido mantidos no trace; os demais (e-mail, dados livres do site) são descartados
+ORDER_FIELDS = ('status', 'total', 'currency')
+ITEM_FIELDS = ('name', 'category', 'quantity', 'price', 'selectedJob', 'startLevel', 'endLevel', 'gilAmount')
+PAYMENT_FIELDS = ('method',)
+
+_recorder = None
+
+class TraceRecorder:
+    """Grava mudanças do listener e cliques em botões em um arquivo JSON lines com gzip
+
+    IDs de pedidos e nomes de usuários são trocados por pseudônimos estáveis
+    dentro do trace, derivados de uma chave aleatória que não é gravada. Datas
+    viram deslocamentos em segundos a partir do início da gravação. A escrita
+    e a compressão acontecem em uma thread separada.
+    """
+
+    def __init__(self, path, admin_role_ids=(), key=None):
+        self.path = path
+        self.admin_role_ids = set(admin_role_ids)  # Cargos de administrador de todas as lojas
+        self._key = key or os.urandom(16)
+        self._started_at = time.monotonic()
+        self._started_wall = datetime.now(timezone.utc)
+        self._queue = queue.SimpleQueue()
+        self._own_writes = {}  # Mapeia order_id -> status gravados pelo bot que o listener ainda não recebeu
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._write_event({
+            'kind': 'header',
+            'version': TRACE_FORMAT_VERSION,
+            'started_at': self._started_wall.isoformat(timespec='seconds'),
+        })
+        self._thread = threading.Thread(target=self._run, name='trace-recorder', daemon=True)
+        self._thread.start()
+
+    def _pseudonym(self, kind, value):
+        digest = hashlib.blake2b(f"{kind}:{value}".encode('utf-8'), key=self._key, digest_size=10)
+        return digest.hexdigest()
+
+    def order_pseudonym(self, order_id):
+        # 20 caracteres, como um ID do Firestore (o sufixo #xxxxxx continua funcionando)
+        return self._pseudonym('order', order_id)
+
+    def user_pseudonym(self, username):
+        return f"u{self._pseudonym('user', username.lower())[:11]}"
+
+    def _elapsed(self):
+        return round(time.monotonic() - self._started_at, 3)
+
+    def anonymize_order(self, order):
+        """Mantém apenas os campos que influenciam o processamento do pedido"""
+        anonymized = {field: order[field] for field in ORDER_FIELDS if field in order}
+        username = order.get('discordId') or order.get('discordUsername')
+        if username:
+            anonymized['discordUsername'] = self.user_pseudonym(username)
+        if isinstance(order.get('payment'), dict):
+            anonymized['payment'] = {field: order['payment'][field] for field in PAYMENT_FIELDS if field in order['payment']}
+        if 'items' in order:
+            anonymized['items'] = [
+                {field: item[field] for field in ITEM_FIELDS if field in item}
+                for item in order.get('items') or [] if isinstance(item, dict)
+            ]
+        if isinstance(order.get('createdAt'), datetime):
+            anonymized['createdAt'] = round((order['createdAt'] - self._started_wall).total_seconds(), 3)
+        return anonymized
+
+    def record_own_write(self, order_id, status):
+        self._own_writes.setdefault(order_id, []).append(status)
+
+    def record_change(self, change_type, order_data):
+        event = {
+            't': self._elapsed(),
+            'kind': 'change',
+            'type': change_type,
+            'order_id': self.order_pseudonym(order_data['id']),
+            'data': self.anonymize_order(order_data),
+        }
+        # Mudanças causadas pelo próprio bot são marcadas; o replay as recria ao repetir os cliques
+        pending = self._own_writes.get(order_data['id'])
+        if change_type == 'MODIFIED' and pending and order_data.get('status') in pending:
+            pending.remove(order_data.get('status'))
+            if not pending:
+                self._own_writes.pop(order_data['id'], None)
+            event['origin'] = 'bot'
+        self._queue.put(event)
+
+    def record_interaction(self, interaction, action, order_id, item_index=None):
+        user = interaction.user
+        roles = getattr(user, 'roles', None) or ()
+        self._queue.put({
+            't': self._elapsed(),
+            'kind': 'interaction',
+            'action': action,
+            'order_id': self.order_pseudonym(order_id),
+            'item_index': item_index,
+            'user': self.user_pseudonym(user.name),
+            'admin': any(role.id in self.admin_role_ids for role in roles),
+        })
+
+    def _write_event(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':'), default=str) + '\n')
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                break
+            try:
+                self._write_event(event)
+            except Exception as e:
+                logger.error(f"Erro ao gravar evento no trace: {e}")
+        self._file.close()
+
+    def close(self, timeout=5):
+        """Grava os eventos pendentes e fecha o arquivo"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+def start_recording(path, admin_role_ids=()):
+    """Passa a gravar as mudanças do listener e os cliques em `path` (gzip)
+
+    Returns:
+        O TraceRecorder em execução
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = TraceRecorder(path, admin_role_ids)
+        atexit.register(stop_recording)
+        logger.info(f"Gravando trace de pedidos em {path}")
+    return _recorder
+
+def stop_recording():
+    """Encerra a gravação, se estiver ativa"""
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
+
+def record_change(change_type, order_data):
+    """Grava uma mudança recebida pelo listener (sem efeito se a gravação estiver desligada)"""
+    if _recorder is not None:
+        _recorder.record_change(change_type, order_data)
+
+def record_own_write(order_id, status):
+    """Avisa que o bot vai gravar `status` no pedido, para marcar a mudança correspondente no trace"""
+    if _recorder is not None:
+        _recorder.record_own_write(order_id, status)
+
+def record_interaction(interaction, action, order_id, item_index=None):
+    """Grava um clique em botão de pedido (sem efeito se a gravação estiver desligada)"""
+    if _recorder is not None:
+        _recorder.record_interaction(interaction, action, order_id, item_index)
+
+def read_trace(path):
+    """Lê os eventos de um arquivo de trace, em ordem de gravação
+
+    Raises:
+        ValueError: Se o arquivo não for um trace ou tiver versão incompatível
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as trace_file:
+        header = json.loads(next(trace_file, 'null') or 'null')
+        if not header or header.get('kind') != 'header':
+            raise ValueError(f"{path} não é um arquivo de trace")
+        if header.get('version') != TRACE_FORMAT_VERSION:
+            raise ValueError(f"Versão de trace não suportada: {header.get('version')}")
+        for line in trace_file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,165 @@
+import asyncio
+import itertools
+import logging
+from collections import deque
+import discord
+from lifecycle import order_tasks
+from metrics import ADMIN_FEED_MESSAGES, DISCORD_API_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Nome dos webhooks criados pelo bot no canal (identifica os que ele pode reutilizar)
+WEBHOOK_NAME = "FFXIV Bot Avisos"
+
+# Janela em que os avisos são agrupados em uma única mensagem
+WEBHOOK_BATCH_DELAY = 1.0
+
+# Mensagens recentes lembradas pelo feed (o bot procura mensagens de pedidos nas últimas 100 do canal)
+RECENT_MESSAGES = 100
+
+# Limites do Discord por mensagem
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+
+def split_batches(entries):
+    """Divide os avisos (conteúdo, embed) em mensagens de até 10 embeds e 6000 caracteres
+
+    Returns:
+        Lista de tuplas (conteúdo, embeds); as menções distintas do grupo são juntadas no conteúdo
+    """
+    batches, contents, embeds, characters = [], [], [], 0
+    for content, embed in entries:
+        size = len(embed)
+        if embeds and (len(embeds) >= MAX_EMBEDS_PER_MESSAGE or characters + size > MAX_EMBED_CHARACTERS):
+            batches.append((' '.join(contents) or None, embeds))
+            contents, embeds, characters = [], [], 0
+        if content and content not in contents:
+            contents.append(content)
+        embeds.append(embed)
+        characters += size
+    if embeds:
+        batches.append((' '.join(contents) or None, embeds))
+    return batches
+
+class WebhookFeed:
+    """Avisos não interativos de um canal (notificações e auditoria), enviados por um pool de webhooks
+
+    Cada webhook tem o próprio limite de envios e não usa o orçamento de envios
+    do bot, que fica para as DMs, botões e mensagens com componentes. Os avisos
+    que chegam dentro de `delay` segundos saem juntos em mensagens de até 10
+    embeds, revezando entre os webhooks do pool. Se os webhooks não puderem ser
+    usados (sem a permissão Gerenciar Webhooks, webhook apagado), os avisos
+    saem pelo envio normal do bot, ainda agrupados.
+
+    Uma mensagem pode reunir avisos de vários pedidos, então owns() identifica
+    as mensagens do feed para que a limpeza das mensagens de um pedido não as apague.
+
+    Args:
+        tenant_id: Loja do canal (usado nas métricas)
+        channel_id: Canal dos avisos
+        pool_size: Número de webhooks do pool
+        resolve_channel: Função que retorna o canal a partir do ID (ou None)
+        fallback_send: Corrotina (canal, conteúdo, embeds) usada quando não há webhook; retorna a mensagem enviada
+        bot_user: Função que retorna o usuário do bot (nome e avatar dos webhooks)
+        delay: Janela de agrupamento, em segundos
+        tracker: TaskTracker dos envios (o desligamento aguarda os pendentes)
+    """
+
+    def __init__(self, tenant_id, channel_id, pool_size, resolve_channel, fallback_send, bot_user=lambda: None,
+                 delay=WEBHOOK_BATCH_DELAY, tracker=order_tasks):
+        self.tenant_id = tenant_id
+        self.channel_id = channel_id
+        self.pool_size = pool_size
+        self.delay = delay
+        self._resolve_channel = resolve_channel
+        self._fallback_send = fallback_send
+        self._bot_user = bot_user
+        self._tracker = tracker
+        self._pending = []  # Avisos (conteúdo, embed) aguardando o envio
+        self._timer = None
+        self._webhooks = None  # Pool carregado no primeiro envio; lista vazia se não houver permissão
+        self._round_robin = itertools.count()
+        self._send_lock = asyncio.Lock()  # Mantém a ordem entre envios consecutivos
+        self.webhook_ids = set()
+        self._sent_ids = deque(maxlen=RECENT_MESSAGES)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def post(self, embed, content=None):
+        """Enfileira um aviso; ele sai na próxima mensagem do pool"""
+        self._pending.append((content, embed))
+        if len(self._pending) >= MAX_EMBEDS_PER_MESSAGE:
+            self.flush_all()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.delay, self.flush_all)
+
+    def flush_all(self):
+        """Envia agora os avisos pendentes (ex.: no desligamento), em uma tarefa acompanhada pelo tracker"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self._tracker.spawn(self._send_all(pending), name=f"admin_feed:{self.tenant_id}")
+
+    def owns(self, message):
+        """A mensagem foi enviada pelo feed (por um webhook do pool ou pelo envio do bot)"""
+        return message.webhook_id in self.webhook_ids or message.id in self._sent_ids
+
+    async def _load_webhooks(self, channel):
+        """Reutiliza os webhooks do bot no canal e cria os que faltam até pool_size"""
+        try:
+            user = self._bot_user()
+            webhooks = [
+                webhook for webhook in await channel.webhooks()
+                if webhook.name.startswith(WEBHOOK_NAME) and (user is None or getattr(webhook.user, 'id', None) == user.id)
+            ][:self.pool_size]
+            while len(webhooks) < self.pool_size:
+                webhooks.append(await channel.create_webhook(name=f"{WEBHOOK_NAME} {len(webhooks) + 1}"))
+        except discord.HTTPException as e:
+            logger.warning(f"Webhooks indisponíveis no canal {self.channel_id}, usando o envio do bot: {e}")
+            webhooks = []
+        self._webhooks = webhooks
+        self.webhook_ids = {webhook.id for webhook in webhooks}
+        return webhooks
+
+    async def _send_all(self, entries):
+        async with self._send_lock:
+            channel = self._resolve_channel(self.channel_id)
+            if channel is None:
+                logger.info(f"Canal de avisos não encontrado (ID: {self.channel_id})")
+                return
+            webhooks = self._webhooks if self._webhooks is not None else await self._load_webhooks(channel)
+            for content, embeds in split_batches(entries):
+                try:
+                    if webhooks:
+                        message = await self._send_webhook(webhooks, content, embeds)
+                        self._sent_ids.append(message.id)
+                        ADMIN_FEED_MESSAGES.inc(tenant=self.tenant_id, route='webhook')
+                        continue
+                except discord.HTTPException as e:
+                    logger.warning(f"Falha no envio por webhook, usando o envio do bot: {e}")
+                    if isinstance(e, (discord.NotFound, discord.Forbidden)):
+                        # Webhook apagado ou permissão removida: o pool é recarregado no próximo envio
+                        self._webhooks = None
+                        webhooks = []
+                try:
+                    message = await self._fallback_send(channel, content, embeds)
+                    self._sent_ids.append(message.id)
+                    ADMIN_FEED_MESSAGES.inc(tenant=self.tenant_id, route='bot')
+                except Exception as e:
+                    logger.error(f"Erro ao enviar {len(embeds)} avisos ao canal {self.channel_id}: {e}")
+
+    async def _send_webhook(self, webhooks, content, embeds):
+        webhook = webhooks[next(self._round_robin) % len(webhooks)]
+        user = self._bot_user()
+        with DISCORD_API_LATENCY.time(operation='webhook_send'):
+            return await webhook.send(
+                content=content or discord.utils.MISSING,
+                embeds=embeds,
+                username=user.name if user else discord.utils.MISSING,
+                avatar_url=user.display_avatar.url if user else discord.utils.MISSING,
+                allowed_mentions=discord.AllowedMentions(everyone=False, users=False, roles=True),
+                wait=True
+            )